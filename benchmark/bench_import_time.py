@@ -0,0 +1,107 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/9/27 09:40
+# @file         : bench_import_time.py
+# @Desc         : 使用 -X importtime 测量入口模块的导入耗时, 超出预算或导入了应延迟的依赖时返回非0
+#                 python -m benchmark.bench_import_time [--budget-scale 2.0]
+# -----------------------------------------
+
+# import from official
+import sys
+import time
+import argparse
+import subprocess
+from typing import Dict, List, Optional, Tuple
+# import from third-party
+
+# import from self-defined
+from com.util import pathUtil
+
+# 入口模块 -> 导入耗时预算(毫秒, 累计耗时的中位数)
+BUDGETS_MS: Dict[str, float] = {
+    "src.cli": 50.0,
+    "src.wiki_uploader": 50.0,
+    "src.wiki_indexer": 40.0,
+    "src.wiki_synchronizer": 40.0,
+}
+# 这些依赖应在第一次使用时才导入
+DEFERRED_MODULES = ("requests", "jinja2", "dotenv", "http.server")
+
+
+def measure(module: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    在新的解释器中导入module
+    :return: (module的累计导入耗时(毫秒), 其导入的全部模块及各自累计耗时)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=pathUtil.rootPath, capture_output=True, text=True, check=True,
+    )
+    # 输出为后序遍历: 子模块在父模块之前, 缩进表示深度
+    subtree: List[Tuple[str, float]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip() == "cumulative":
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        if depth == 0:
+            if name == module:
+                return int(cumulative) / 1000, subtree
+            subtree = []
+        else:
+            subtree.append((name, int(cumulative) / 1000))
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def measure_help(repeat: int) -> float:
+    """python -m src.cli --help 的墙钟时间中位数(毫秒), 包括解释器启动"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "src.cli", "--help"], cwd=pathUtil.rootPath,
+                       capture_output=True, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)[len(samples) // 2]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="入口模块导入耗时基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="每个模块测量的次数, 取中位数")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="预算放大倍数, 用于较慢的机器")
+    parser.add_argument("--top", type=int, default=5, help="列出最耗时的被导入模块数量")
+    args = parser.parse_args(argv)
+
+    failures = []
+    print(f"{'module':<24}{'import(ms)':>12}{'budget(ms)':>12}")
+    for module, budget in BUDGETS_MS.items():
+        runs = [measure(module) for _ in range(args.repeat)]
+        runs.sort(key=lambda run: run[0])
+        cumulative, subtree = runs[len(runs) // 2]
+        budget *= args.budget_scale
+        print(f"{module:<24}{cumulative:>12.1f}{budget:>12.1f}")
+        # 只列出直接或间接导入的第三方/标准库顶层模块中最耗时的几个
+        heaviest = sorted({name: ms for name, ms in subtree if "." not in name}.items(), key=lambda x: -x[1])
+        for name, ms in heaviest[:args.top]:
+            print(f"    {name:<20}{ms:>12.1f}")
+        if cumulative > budget:
+            failures.append(f"{module}: {cumulative:.1f}ms > {budget:.1f}ms")
+        imported = {name for name, _ in subtree}
+        eager = [name for name in DEFERRED_MODULES if name in imported]
+        if eager:
+            failures.append(f"{module}: eagerly imports {', '.join(eager)}")
+
+    print(f"python -m src.cli --help: {measure_help(args.repeat):.1f}ms")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
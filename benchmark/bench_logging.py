@@ -0,0 +1,99 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/9/26 11:20
+# @file         : bench_logging.py
+# @Desc         : 比较逐节点日志开启(debug)与默认安静运行的耗时
+#                 python -m benchmark.bench_logging --docs 10000 [--sink stdout]
+# -----------------------------------------
+
+# import from official
+import io
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO
+# import from third-party
+
+# import from self-defined
+from com.util import pathUtil
+from com.logger import configure
+from benchmark.generate_corpus import generate
+from benchmark.run_benchmarks import quiet
+
+
+def run_pipeline(locale: str, data_dir: Path) -> int:
+    """构建索引并加载、渲染全部文档, 返回文档数"""
+    from src.wiki_indexer import WikiIndexer
+    from src.wiki_renderer import WikiPTLRenderer
+
+    renderer = WikiPTLRenderer()
+    documents = WikiIndexer(locale, data_dir=data_dir).build_index().get_all_documents()
+    for doc in documents:
+        doc.render(pre_renderer=renderer)
+    return len(documents)
+
+
+def bench_mode(mode: str, locale: str, data_dir: Path, stream: TextIO, json_file: Path, repeat: int) -> Dict:
+    level = logging.WARNING if mode == "quiet" else logging.DEBUG
+    best = None
+    lines = 0
+    for _ in range(repeat):
+        if json_file.exists():
+            json_file.unlink()
+        configure(level, json_file=json_file if mode == "debug+json" else None, stream=stream)
+        position = stream.tell() if stream.seekable() else 0
+        start = time.perf_counter()
+        docs = run_pipeline(locale, data_dir)
+        stream.flush()
+        seconds = time.perf_counter() - start
+        if stream.seekable():
+            stream.seek(position)
+            lines = sum(1 for _ in stream)
+        best = seconds if best is None else min(best, seconds)
+    configure()
+    return {"seconds": round(best, 4), "docs": docs, "log_lines": lines}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="日志开销基准测试")
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--locale", default="zh")
+    parser.add_argument("--work-dir", type=Path, default=pathUtil.getTmpDir() / "bench")
+    parser.add_argument("--sink", choices=["file", "stdout"], default="file",
+                        help="文本日志写入临时文件或终端(终端更慢, 更接近原来print的开销)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    data_dir = args.work_dir / str(args.docs)
+    if not (data_dir / args.locale / "contents.json").exists():
+        print(f"生成 {args.docs} 个文档的资料树 ...")
+        with quiet():
+            generate(data_dir, args.docs, args.locale)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_file = Path(tmp_dir) / "log.jsonl"
+        if args.sink == "stdout":
+            stream = sys.stdout
+        else:
+            stream = io.open(Path(tmp_dir) / "log.txt", 'w+', encoding='utf-8')
+        results = {
+            mode: bench_mode(mode, args.locale, data_dir, stream, json_file, args.repeat)
+            for mode in ("debug", "debug+json", "quiet")
+        }
+        if stream is not sys.stdout:
+            stream.close()
+
+    quiet_seconds = results["quiet"]["seconds"]
+    print(f"{'mode':<12}{'seconds':>10}{'log lines':>12}{'vs quiet':>10}")
+    for mode, result in results.items():
+        print(f"{mode:<12}{result['seconds']:>10.4f}{result['log_lines']:>12}{result['seconds'] / quiet_seconds:>10.2f}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,75 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/9/15 09:47
+# @file         : bench_text_formatter.py
+# @Desc         : TextFormatter解析性能基准, 并校验与旧解析器输出一致
+#                 python -m benchmark.bench_text_formatter [--locale zh] [--repeat 100]
+# -----------------------------------------
+
+# import from official
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import List, Optional
+# import from third-party
+
+# import from self-defined
+from com.util import pathUtil
+from src.text_formater import TextFormatter
+from benchmark import legacy_text_formater
+
+
+def load_corpus(locale: str = "zh", data_dir: Optional[Path] = None) -> List[str]:
+    """收集卡牌资料中的全部card_info_effect文本"""
+    card_dir = (data_dir or pathUtil.getDataDir()) / locale / "card"
+    corpus = []
+    for card_file in sorted(card_dir.glob("*/*.json")):
+        if card_file.name == "contents.json":
+            continue
+        with open(card_file, 'r', encoding='utf-8') as f:
+            card = json.load(f).get("card", {})
+        corpus.append(card.get("card_info_effect") or "")
+    return corpus
+
+
+def bench(func, corpus: List[str], repeat: int) -> float:
+    """返回每条文本的平均耗时(微秒), 取repeat轮中最快的一轮"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return best / max(len(corpus), 1) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TextFormatter benchmark")
+    parser.add_argument("--locale", default="zh")
+    parser.add_argument("--data-dir", type=Path, default=None)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.locale, args.data_dir)
+    legacy = lambda text: legacy_text_formater.TextFormatter().parse_from_text(text).to_dict()
+    current = lambda text: TextFormatter().parse_from_text(text).to_dict()
+
+    # 比较序列化结果, 确保键的顺序也一致(影响写入的卡牌JSON)
+    dump = lambda result: json.dumps(result, ensure_ascii=False)
+    mismatches = [text for text in corpus if dump(legacy(text)) != dump(current(text))]
+    if mismatches:
+        raise SystemExit(f"输出不一致: {len(mismatches)} 条, 例如: {mismatches[0]!r}")
+
+    legacy_us = bench(legacy, corpus, args.repeat)
+    current_us = bench(current, corpus, args.repeat)
+    print(f"语料: {len(corpus)} 条, 输出一致")
+    print(f"legacy : {legacy_us:8.2f} us/条")
+    print(f"current: {current_us:8.2f} us/条 ({legacy_us / current_us:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
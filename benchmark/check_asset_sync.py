@@ -0,0 +1,78 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/10/7 10:40
+# @file         : check_asset_sync.py
+# @Desc         : 对本地的Wiki.js替身运行资源同步: 文件上传到对应的文件夹, 未变化时第二次运行不上传任何文件
+#                 python -m benchmark.check_asset_sync
+# -----------------------------------------
+
+# import from official
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+# import from third-party
+
+# import from self-defined
+from com.graphql import WikiJSGraphQLClient
+from src.wiki_asset_sync import WikiAssetSync
+from benchmark.fake_wiki import FakeWiki
+
+ASSETS = {
+    "/image/card/a.jpg": b"card a",
+    "/image/card/b.jpg": b"card b",
+    "/icon/action.png": b"icon",
+}
+
+
+def check() -> List[str]:
+    """:return: 未通过的检查"""
+    errors = []
+    with tempfile.TemporaryDirectory() as tmp, FakeWiki() as wiki:
+        asset_dir = Path(tmp) / "assets"
+        for asset, content in ASSETS.items():
+            path = asset_dir / asset.lstrip("/")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+        manifest_file = Path(tmp) / "asset_manifest.json"
+        client = WikiJSGraphQLClient(wiki.url, "token")
+
+        def run():
+            return WikiAssetSync(client, asset_dir=asset_dir, manifest_file=manifest_file).sync(ASSETS, jobs=2)
+
+        first = run()
+        if first.uploaded != sorted(ASSETS) or first.failed:
+            errors.append(f"第一次运行应上传全部资源: {first.to_dict()}")
+        if wiki.paths() != sorted(ASSETS):
+            errors.append(f"远程资源路径不正确(folderId未生效?): {wiki.paths()}")
+
+        uploads, requests = len(wiki.uploads), len(wiki.requests)
+        second = run()
+        if second.uploaded or second.unchanged != len(ASSETS):
+            errors.append(f"未变化时第二次运行不应上传: {second.to_dict()}")
+        if len(wiki.uploads) != uploads or len(wiki.requests) != requests:
+            errors.append(f"未变化时第二次运行不应发送请求: {wiki.uploads[uploads:]} {wiki.requests[requests:]}")
+
+        (asset_dir / "icon" / "action.png").write_bytes(b"icon v2")
+        third = run()
+        if third.uploaded != ["/icon/action.png"]:
+            errors.append(f"只应上传变化的资源: {third.to_dict()}")
+        if wiki.requests[requests:].count("createAssetFolder"):
+            errors.append("已存在的文件夹不应重复创建")
+    return errors
+
+
+def main() -> int:
+    errors = check()
+    for error in errors:
+        print(f"FAILED: {error}")
+    if not errors:
+        print("资源同步检查通过")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/10/7 10:15
+# @file         : fake_wiki.py
+# @Desc         : 本地的Wiki.js资源接口替身(http.server): /u 上传接口与资源文件夹的GraphQL操作, 用于不连接真实Wiki的检查
+# -----------------------------------------
+
+# import from official
+import json
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+# import from third-party
+
+# import from self-defined
+
+
+class FakeWiki:
+    """
+    内存中的Wiki.js资源存储
+
+    与Wiki.js一致: /u 的第一个mediaUpload字段为JSON的目标文件夹信息, 只读取其中的folderId,
+    缺少时上传到根目录(0); 第二个字段为文件本身, 同一文件夹中的同名文件被覆盖
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.folders: List[Dict] = []  # {"id", "slug", "name", "parent"}
+        self.files: Dict[Tuple[int, str], bytes] = {}  # (文件夹ID, 文件名) -> 内容
+        self.uploads: List[Tuple[int, str]] = []  # 每次上传的(文件夹ID, 文件名)
+        self.requests: List[str] = []  # 收到的GraphQL操作名
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def folder_path(self, folder_id: int) -> str:
+        """文件夹ID对应的路径, 例如 /image/card"""
+        parts = []
+        while folder_id:
+            folder = next(item for item in self.folders if item["id"] == folder_id)
+            parts.append(folder["slug"])
+            folder_id = folder["parent"]
+        return "/" + "/".join(reversed(parts))
+
+    def paths(self) -> List[str]:
+        """已上传的资源路径"""
+        with self._lock:
+            return sorted(f"{self.folder_path(folder_id).rstrip('/')}/{name}" for folder_id, name in self.files)
+
+    def upload(self, content_type: str, body: bytes) -> int:
+        """处理 /u 的multipart请求, 返回HTTP状态码"""
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+        )
+        parts = [part for part in message.iter_parts() if part.get_param("name", header="content-disposition") == "mediaUpload"]
+        if len(parts) != 2 or not parts[1].get_filename():
+            return 400
+        try:
+            folder_id = int(json.loads(parts[0].get_content()).get("folderId") or 0)
+        except (TypeError, ValueError):
+            return 400
+        with self._lock:
+            if folder_id and not any(item["id"] == folder_id for item in self.folders):
+                return 400
+            self.files[(folder_id, parts[1].get_filename())] = parts[1].get_payload(decode=True)
+            self.uploads.append((folder_id, parts[1].get_filename()))
+        return 200
+
+    def graphql(self, request: Dict) -> Dict:
+        variables = request.get("variables") or {}
+        query = request["query"]
+        with self._lock:
+            if "listAssetFolders" in query:
+                self.requests.append("listAssetFolders")
+                folders = [item for item in self.folders if item["parent"] == variables["parentFolderId"]]
+                return {"data": {"assets": {"folders": [
+                    {key: item[key] for key in ("id", "slug", "name")} for item in folders
+                ]}}}
+            if "createAssetFolder" in query:
+                self.requests.append("createAssetFolder")
+                self.folders.append({
+                    "id": len(self.folders) + 1,
+                    "slug": variables["slug"],
+                    "name": variables.get("name") or variables["slug"],
+                    "parent": variables["parentFolderId"],
+                })
+                result = {"succeeded": True, "errorCode": 0, "slug": "ok", "message": "Asset Folder has been created"}
+                return {"data": {"assets": {"createFolder": {"responseResult": result}}}}
+        return {"errors": [{"message": "unsupported operation"}]}
+
+    def start(self, port: int = 0) -> 'FakeWiki':
+        wiki = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path == "/u":
+                    status, payload = wiki.upload(self.headers.get("Content-Type", ""), body), b"ok"
+                elif self.path == "/graphql":
+                    status, payload = 200, json.dumps(wiki.graphql(json.loads(body))).encode("utf-8")
+                else:
+                    status, payload = 404, b""
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'FakeWiki':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,164 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/9/22 10:05
+# @file         : generate_corpus.py
+# @Desc         : 生成用于基准测试的合成资料树
+#                 python -m benchmark.generate_corpus --docs 10000 --output tmp/bench/10000
+# -----------------------------------------
+
+# import from official
+import sys
+import json
+import random
+import shutil
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+# import from third-party
+
+# import from self-defined
+from com.util import pathUtil
+
+# 由同步生成的字段, 不属于设计资料
+DERIVED_CARD_KEYS = {
+    "card_element_mark", "card_image_url", "card_attribute", "card_tag", "effects", "unlock", "master",
+    "unlock_tokens", "master_tokens",
+}
+CARDS_PER_DIR = 500
+CARDS_PER_DECK = 50
+RULE_RATIO = 0.1
+
+
+def load_design_samples(locale: str = "zh") -> List[Dict]:
+    """以现有卡牌资料中的设计字段作为样本"""
+    samples = []
+    for card_file in sorted((pathUtil.getDataDir() / locale / "card").glob("*/*.json")):
+        if card_file.name == "contents.json":
+            continue
+        with open(card_file, 'r', encoding='utf-8') as f:
+            card = json.load(f).get("card", {})
+        samples.append({key: value for key, value in card.items() if key not in DERIVED_CARD_KEYS})
+    return samples
+
+
+def load_rule_samples(locale: str = "zh") -> List[str]:
+    samples = []
+    for rule_file in sorted((pathUtil.getDataDir() / locale / "rule").glob("*.md")):
+        with open(rule_file, 'r', encoding='utf-8') as f:
+            samples.append(f.read())
+    return samples or ["# 规则\n\n示例内容\n"]
+
+
+def _dump(path: Path, data, indent: int = 4) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+
+
+def generate(output: Path, docs: int, locale: str = "zh", seed: int = 0, sync: bool = True) -> Dict:
+    """
+    生成合成资料树
+        <output>/<locale>/contents.json, templates/, rule/<section>/*.md, card/<dir>/*.json
+        <output>/<locale>/card_json/deck_*.json (设计资料) 以及 <output>/deck_json_register.json
+    卡牌资料通过WikiSynchronizer由设计资料生成, 与当前结构一致
+    :param output: 输出目录(会被清空)
+    :param docs: 文档总数, 其中约10%为规则文档
+    :param locale: 语言
+    :param seed: 随机种子
+    :param sync: 是否同步生成卡牌资料
+    :return: 生成信息
+    """
+    rng = random.Random(seed)
+    design_samples = load_design_samples(locale)
+    rule_samples = load_rule_samples(locale)
+
+    if output.exists():
+        shutil.rmtree(output)
+    locale_dir = output / locale
+    shutil.copytree(pathUtil.getDataDir() / locale / "templates", locale_dir / "templates")
+
+    rule_count = max(1, int(docs * RULE_RATIO))
+    card_count = max(1, docs - rule_count)
+
+    # 规则文档: rule/<section>/contents.json
+    rule_sections: Dict[str, Dict] = {}
+    for idx in range(rule_count):
+        section = f"section_{idx // CARDS_PER_DIR:03d}"
+        name = f"chap_{idx:06d}"
+        section_dir = locale_dir / "rule" / section
+        section_dir.mkdir(parents=True, exist_ok=True)
+        with open(section_dir / f"{name}.md", 'w', encoding='utf-8') as f:
+            f.write(rng.choice(rule_samples))
+        rule_sections.setdefault(section, {"children": {}})["children"][name] = {"data": f"{name}.md"}
+    for section, content in rule_sections.items():
+        _dump(locale_dir / "rule" / section / "contents.json", content)
+    _dump(locale_dir / "rule" / "contents.json", {
+        "children": {section: {"index": "contents.json"} for section in rule_sections}
+    })
+
+    # 卡牌设计资料与登记文件
+    register: Dict[str, List[Dict]] = {}
+    card_dirs = set()
+    for deck_start in range(0, card_count, CARDS_PER_DECK):
+        deck_name = f"deck_syn_{deck_start // CARDS_PER_DECK:05d}.json"
+        records = []
+        for idx in range(deck_start, min(deck_start + CARDS_PER_DECK, card_count)):
+            record = dict(rng.choice(design_samples))
+            record["card_name"] = f"{record.get('card_name') or '卡牌'}_{idx}"
+            records.append(record)
+            card_dir = f"dir_{idx // CARDS_PER_DIR:03d}"
+            card_dirs.add(card_dir)
+            register.setdefault(deck_name, []).append({"dir": card_dir, "file": f"card_syn_{idx:06d}.json"})
+        _dump(locale_dir / "card_json" / deck_name, records, indent=2)
+    register_file = output / "deck_json_register.json"
+    _dump(register_file, register, indent=2)
+
+    (locale_dir / "card").mkdir(parents=True, exist_ok=True)
+    for card_dir in card_dirs:
+        (locale_dir / "card" / card_dir).mkdir(parents=True, exist_ok=True)
+    _dump(locale_dir / "card" / "contents.json", {
+        "children": {
+            card_dir: {"index": "contents.json", "template": "card_intelligence_template.html"}
+            for card_dir in sorted(card_dirs)
+        }
+    })
+    _dump(locale_dir / "contents.json", {
+        "template": "main_template.md",
+        "children": {
+            "rule": {"index": "contents.json", "template": "rule_template.md"},
+            "card": {"index": "contents.json", "template": "card_template.md"},
+        }
+    })
+
+    if sync:
+        from src.wiki_synchronizer import WikiSynchronizer
+        WikiSynchronizer(locale, register_file=str(register_file), data_dir=output).sync(force_sync=True)
+
+    return {
+        "output": str(output),
+        "locale": locale,
+        "docs": rule_count + card_count,
+        "rules": rule_count,
+        "cards": card_count,
+        "register_file": str(register_file),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="生成合成资料树")
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--output", type=Path, default=None, help="默认为 tmp/bench/<docs>")
+    parser.add_argument("--locale", default="zh")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    output = args.output or pathUtil.getTmpDir() / "bench" / str(args.docs)
+    info = generate(output, args.docs, args.locale, args.seed)
+    print(json.dumps(info, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
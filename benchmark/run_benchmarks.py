@@ -0,0 +1,157 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/9/22 14:30
+# @file         : run_benchmarks.py
+# @Desc         : 端到端基准测试, 结果保存为JSON便于比较
+#                 python -m benchmark.run_benchmarks --sizes 1000 10000 [--compare tmp/bench/baseline.json]
+# -----------------------------------------
+
+# import from official
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+# import from third-party
+
+# import from self-defined
+from com.util import pathUtil
+from benchmark.generate_corpus import generate
+
+
+@contextmanager
+def quiet():
+    """屏蔽被测代码中的print, 避免终端输出影响计时"""
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+        yield
+
+
+def timed(func: Callable[[], int]) -> Dict[str, float]:
+    """执行func(返回处理条目数)并返回耗时与吞吐量"""
+    with quiet():
+        start = time.perf_counter()
+        items = func()
+        seconds = time.perf_counter() - start
+    return {
+        "seconds": round(seconds, 6),
+        "items": items,
+        "items_per_second": round(items / seconds, 2) if seconds > 0 else None,
+    }
+
+
+def run_size(size: int, locale: str, work_dir: Path) -> Dict[str, Dict[str, float]]:
+    from src.wiki_indexer import WikiIndexer
+    from src.wiki_renderer import WikiPTLRenderer
+    from src.wiki_synchronizer import WikiSynchronizer
+    from src.text_formater import TextFormatter
+    from src.card_store import CardStore
+
+    output = work_dir / str(size)
+    with quiet():
+        info = generate(output, size, locale, sync=False)
+
+    results: Dict[str, Dict[str, float]] = {}
+    synchronizer = WikiSynchronizer(locale, register_file=info["register_file"], data_dir=output)
+    results["sync_full"] = timed(lambda: synchronizer.sync(force_sync=True).total)
+    results["sync_noop"] = timed(lambda: synchronizer.sync(force_sync=True).total)
+    # 并行同步并写入卡牌存储(存储只在主进程中写入)
+    store = CardStore(output / "cards.sqlite", data_dir=output)
+    parallel = WikiSynchronizer(locale, register_dict=synchronizer.register_dict, data_dir=output, card_store=store)
+    results["sync_jobs2_store"] = timed(lambda: parallel.sync(force_sync=True, jobs=2).total)
+    store.close()
+
+    indexer = WikiIndexer(locale, data_dir=output)
+    results["build_index"] = timed(lambda: len(indexer.build_index().get_all_documents()))
+    documents = indexer.get_all_documents()
+
+    def load_all() -> int:
+        for doc in documents:
+            doc.load_data()
+        return len(documents)
+
+    results["load_data"] = timed(load_all)
+
+    renderer = WikiPTLRenderer()
+    pre_rendered = []
+
+    def pre_render_all() -> int:
+        for doc in documents:
+            pre_rendered.append(renderer.render(doc.data))
+        return len(documents)
+
+    results["ptl_render"] = timed(pre_render_all)
+
+    def template_render_all() -> int:
+        for doc, data in zip(documents, pre_rendered):
+            doc.template.render(data)
+        return len(documents)
+
+    results["template_render"] = timed(template_render_all)
+
+    texts = [doc.data["card"].get("card_info_effect") or "" for doc in documents if "card" in doc.data]
+
+    def parse_all() -> int:
+        for text in texts:
+            TextFormatter().parse_from_text(text).to_dict(tokens=True)
+        return len(texts)
+
+    results["text_formatter"] = timed(parse_all)
+    results["text_formatter_cached"] = timed(lambda: len(TextFormatter.parse_many(texts)))
+
+    return results
+
+
+def compare(current: Dict, baseline: Dict) -> str:
+    """输出与基准结果的耗时比值(>1表示变慢)"""
+    lines = [f"{'size':>8}  {'benchmark':<24}{'baseline(s)':>12}{'current(s)':>12}{'ratio':>8}"]
+    for size, benchmarks in current["results"].items():
+        for name, result in benchmarks.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if not base:
+                continue
+            ratio = result["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+            lines.append(f"{size:>8}  {name:<24}{base['seconds']:>12.4f}{result['seconds']:>12.4f}{ratio:>8.2f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="端到端基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="文档数量, 例如 1000 10000 100000")
+    parser.add_argument("--locale", default="zh")
+    parser.add_argument("--work-dir", type=Path, default=pathUtil.getTmpDir() / "bench")
+    parser.add_argument("--output", type=Path, default=None, help="结果文件, 默认为 <work-dir>/results-<时间>.json")
+    parser.add_argument("--compare", type=Path, default=None, help="与之前的结果文件比较")
+    args = parser.parse_args(argv)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": {},
+    }
+    for size in args.sizes:
+        print(f"运行规模 {size} ...")
+        report["results"][str(size)] = run_size(size, args.locale, args.work_dir)
+        for name, result in report["results"][str(size)].items():
+            print(f"  {name:<24}{result['seconds']:>10.4f}s {result['items_per_second'] or '-':>12}/s")
+
+    output = args.output or args.work_dir / f"results-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"结果已保存: {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print(compare(report, json.load(f)))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -9,11 +9,28 @@
 # -----------------------------------------
 
 # import from official
+import re
 import json
+import time
+import threading
+from functools import lru_cache
 from typing import Dict, Optional, List, Any
 # import from third-party
-import requests
+# requests在第一次发送请求时才导入, 以加快命令行启动
 # import from self-defined
+from com.logger import get_logger
+from com.metrics import GRAPHQL_REQUESTS, GRAPHQL_LATENCY, GRAPHQL_BYTES_SENT
+
+logger = get_logger("graphql")
+
+OPERATION_PATTERN = re.compile(r"^\s*(?:query|mutation)\s+(\w+)")
+
+
+@lru_cache(maxsize=64)
+def operation_name(query: str) -> str:
+    """GraphQL操作名(例如 getPageByPath), 用作指标标签"""
+    match = OPERATION_PATTERN.match(query)
+    return match.group(1) if match else "anonymous"
 
 
 class WikiJSGraphQLClient:
@@ -41,6 +58,21 @@ class WikiJSGraphQLClient:
         if self.api_token:
             self.headers["Authorization"] = f"Bearer {self.api_token}"
 
+        # 上传使用多个线程, 每个线程记录自己最近一次请求的错误
+        self._local = threading.local()
+
+    @property
+    def last_error(self) -> Optional[Dict]:
+        """
+        当前线程最近一次请求的错误, 成功时为None
+
+        :return: {"status": "graphql_error"/"http_error", "code": 错误码或HTTP状态码, "message": 错误信息}
+        """
+        return getattr(self._local, "error", None)
+
+    def _set_error(self, status: str, code: Any = None, message: str = "") -> None:
+        self._local.error = {"status": status, "code": code, "message": message}
+
     def login(self, email: str, password: str) -> bool:
         """
         使用用户名密码登录Wiki.js，获取并存储API令牌
@@ -103,11 +135,19 @@ class WikiJSGraphQLClient:
         if not include_auth and "Authorization" in headers:
             del headers["Authorization"]
 
+        import requests
+
+        operation = operation_name(query)
+        body = json.dumps(payload)
+        GRAPHQL_BYTES_SENT.inc(len(body.encode('utf-8')), operation=operation)
+        status = "ok"
+        self._local.error = None
+        start = time.perf_counter()
         try:
             response = requests.post(
                 self.graphql_endpoint,
                 headers=headers,
-                data=json.dumps(payload)
+                data=body
             )
 
             response.raise_for_status()
@@ -115,14 +155,24 @@ class WikiJSGraphQLClient:
 
             # 检查是否有GraphQL错误
             if "errors" in result:
-                print(f"GraphQL错误: {result['errors']}")
+                status = "graphql_error"
+                error = result["errors"][0] if result["errors"] else {}
+                extensions = error.get("extensions") or {}
+                code = (extensions.get("exception") or {}).get("code", extensions.get("code"))
+                self._set_error(status, code, "; ".join(str(e.get("message")) for e in result["errors"]))
+                logger.warning("GraphQL错误(%s): %s", operation, result["errors"])
                 return None
 
             return result
 
         except requests.exceptions.RequestException as e:
-            print(f"请求错误: {e}")
+            status = "http_error"
+            self._set_error(status, getattr(e.response, "status_code", None), str(e))
+            logger.error("请求错误(%s): %s", operation, e)
             return None
+        finally:
+            GRAPHQL_LATENCY.observe(time.perf_counter() - start, operation=operation)
+            GRAPHQL_REQUESTS.inc(operation=operation, status=status)
 
     def get_page(self, page_id: int) -> Optional[Dict]:
         """
@@ -218,18 +268,20 @@ class WikiJSGraphQLClient:
 
         return None
 
-    def list_pages(self, limit: int = 50) -> Optional[List[Dict]]:
+    def list_pages(self, limit: int = 50, order_by: str = "TITLE", order_by_direction: str = "ASC") -> Optional[List[Dict]]:
         """
         获取页面列表
 
         :param limit: 最大返回数量
+        :param order_by: 排序字段: CREATED / ID / PATH / TITLE / UPDATED
+        :param order_by_direction: 排序方向: ASC / DESC
         :return: 页面列表，出错时返回None
         """
         query = """
-        query listPages($limit: Int)
+        query listPages($limit: Int, $orderBy: PageOrderBy, $orderByDirection: PageOrderByDirection)
         {
           pages {
-            list (limit: $limit, orderBy: TITLE) {
+            list (limit: $limit, orderBy: $orderBy, orderByDirection: $orderByDirection) {
               id
               path
               locale
@@ -249,6 +301,8 @@ class WikiJSGraphQLClient:
 
         variables = {
             "limit": limit,
+            "orderBy": order_by,
+            "orderByDirection": order_by_direction,
         }
 
         response = self.graphql_request(query, variables)
@@ -457,6 +511,99 @@ class WikiJSGraphQLClient:
 
         return False
 
+    def list_asset_folders(self, parent_folder_id: int = 0) -> Optional[List[Dict]]:
+        """
+        获取资源文件夹列表
+
+        :param parent_folder_id: 父文件夹ID，0为根目录
+        :return: 文件夹列表，出错时返回None
+        """
+        query = """
+        query listAssetFolders($parentFolderId: Int!) {
+            assets {
+                folders(parentFolderId: $parentFolderId) {
+                    id
+                    slug
+                    name
+                }
+            }
+        }
+        """
+
+        variables = {
+            "parentFolderId": parent_folder_id
+        }
+
+        response = self.graphql_request(query, variables)
+
+        if response and "data" in response and "assets" in response["data"]:
+            return response["data"]["assets"]["folders"]
+
+        return None
+
+    def create_asset_folder(self, parent_folder_id: int, slug: str, name: Optional[str] = None) -> bool:
+        """
+        创建资源文件夹
+
+        :param parent_folder_id: 父文件夹ID，0为根目录
+        :param slug: 文件夹路径名
+        :param name: 文件夹显示名，默认与slug相同
+        :return: 创建成功返回True，否则返回False
+        """
+        query = """
+        mutation createAssetFolder($parentFolderId: Int!, $slug: String!, $name: String) {
+            assets {
+                createFolder(parentFolderId: $parentFolderId, slug: $slug, name: $name) {
+                    responseResult {
+                        succeeded
+                        errorCode
+                        slug
+                        message
+                    }
+                }
+            }
+        }
+        """
+
+        variables = {
+            "parentFolderId": parent_folder_id,
+            "slug": slug,
+            "name": name or slug
+        }
+
+        response = self.graphql_request(query, variables)
+
+        if response and "data" in response and "assets" in response["data"]:
+            return response["data"]["assets"]["createFolder"]["responseResult"].get("succeeded", False)
+
+        return False
+
+    def upload_asset(self, folder_id: int, filename: str, content: bytes, mime_type: str = "application/octet-stream") -> bool:
+        """
+        上传资源文件(Wiki.js的 /u 接口, 同名文件会被覆盖)
+
+        :param folder_id: 目标文件夹ID，0为根目录
+        :param filename: 文件名
+        :param content: 文件内容
+        :param mime_type: 文件类型
+        :return: 上传成功返回True，否则返回False
+        """
+        import requests
+
+        headers = {key: value for key, value in self.headers.items() if key != "Content-Type"}
+        # 两个同名字段: 第一个为目标文件夹信息, 第二个为文件本身
+        files = [
+            ("mediaUpload", (None, json.dumps({"folderId": folder_id}))),
+            ("mediaUpload", (filename, content, mime_type)),
+        ]
+        try:
+            response = requests.post(f"{self.base_url}/u", headers=headers, files=files)
+            response.raise_for_status()
+            return True
+        except requests.exceptions.RequestException as e:
+            logger.error("上传错误: %s: %s", filename, e)
+            return False
+
     def get_tags(self) -> Optional[List[Dict]]:
         """
         获取所有标签
@@ -468,9 +615,10 @@ class WikiJSGraphQLClient:
             tags {
                 list {
                     id
-                    name
-                    color
-                    pageCount
+                    tag
+                    title
+                    createdAt
+                    updatedAt
                 }
             }
         }
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# @Author       :
+# @Time         : 2025-09-26
+# @File         : logger.py
+# @Desc         : 分级日志, 支持按文档附加上下文以及JSON Lines输出
+#
+# -----------------------------------------
+
+# import from official
+import sys
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, TextIO, Union
+# import from third-party
+# import from self-defined
+
+ROOT_LOGGER = "wiki"
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s %(name)s%(doc_suffix)s: %(message)s"
+
+# 当前处理的文档等上下文信息, 会附加到该上下文中产生的每条日志
+_log_context: ContextVar[Dict[str, Any]] = ContextVar("wiki_log_context", default={})
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    获取模块日志器, 统一挂在 wiki 日志器下
+    逐节点的信息使用debug级别, 默认不输出
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+@contextmanager
+def log_context(**fields) -> Iterator[None]:
+    """
+    在上下文中为日志附加字段, 例如 with log_context(doc=doc.doc_key): ...
+    基于contextvars, 线程之间互不影响
+    """
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """将log_context中的字段写入日志记录"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _log_context.get()
+        record.context = context
+        record.doc_suffix = f" [{context['doc']}]" if "doc" in context else ""
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """每条日志输出为一行JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **getattr(record, "context", {}),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def configure(
+        level: Union[int, str] = logging.WARNING,
+        json_file: Optional[Path] = None,
+        stream: Optional[TextIO] = None,
+) -> logging.Logger:
+    """
+    配置 wiki 日志器, 重复调用会替换之前的输出
+    :param level: 日志级别, 默认WARNING(逐节点的debug/info信息不输出)
+    :param json_file: 额外以JSON Lines格式写入该文件(记录所有级别>=level的日志)
+    :param stream: 文本日志输出流, 默认为stderr
+    :return: wiki 日志器
+    """
+    logger = logging.getLogger(ROOT_LOGGER)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.setLevel(level)
+    logger.propagate = False
+
+    text_handler = logging.StreamHandler(stream or sys.stderr)
+    text_handler.addFilter(ContextFilter())
+    text_handler.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt="%H:%M:%S"))
+    logger.addHandler(text_handler)
+
+    if json_file is not None:
+        json_file.parent.mkdir(parents=True, exist_ok=True)
+        json_handler = logging.FileHandler(json_file, mode='a', encoding='utf-8')
+        json_handler.addFilter(ContextFilter())
+        json_handler.setFormatter(JsonLinesFormatter())
+        logger.addHandler(json_handler)
+
+    return logger
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# @Author       :
+# @Time         : 2025-09-25
+# @File         : metrics.py
+# @Desc         : 运行指标(计数器/直方图/仪表), 以OpenMetrics文本格式导出到文件或本地端口
+#
+# -----------------------------------------
+
+# import from official
+import bisect
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+# import from third-party
+# import from self-defined
+from com.util import write_text_atomic
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, lock: threading.Lock):
+        self.name = name
+        self.documentation = documentation
+        self._lock = lock
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# TYPE {self.name} {self.TYPE}", f"# HELP {self.name} {self.documentation}", *self.samples()]
+
+
+class Counter(_Metric):
+    """单调递增的计数器, 导出为 <name>_total"""
+    TYPE = "counter"
+
+    def __init__(self, name: str, documentation: str, lock: threading.Lock):
+        super().__init__(name, documentation, lock)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError(f"counter {self.name} can only increase")
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def reset(self) -> None:
+        self._values.clear()
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}_total{_format_labels(key)} {_format_value(value)}" for key, value in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    """可任意设置的仪表"""
+    TYPE = "gauge"
+
+    def __init__(self, name: str, documentation: str, lock: threading.Lock):
+        super().__init__(name, documentation, lock)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def reset(self) -> None:
+        self._values.clear()
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    """分桶直方图(累计计数), 导出为 <name>_bucket/_count/_sum"""
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, lock: threading.Lock, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, lock)
+        self.buckets = tuple(sorted(buckets))
+        # 每组标签: [各桶计数(不累计, 最后一个为+Inf), 总和]
+        self._values: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            counts, _ = self._values.get(_label_key(labels), ([], [0.0]))
+            return sum(counts)
+
+    def reset(self) -> None:
+        self._values.clear()
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total[0])}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    指标注册表
+    同名指标只注册一次, 重复注册返回已有的实例
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, cls, name: str, documentation: str, **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, self._lock, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"metric {name} already registered as {metric.TYPE}")
+            return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._register(Counter, name, documentation)
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self._register(Gauge, name, documentation)
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, buckets=buckets)
+
+    def reset(self) -> None:
+        with self._lock:
+            for metric in self._metrics.values():
+                metric.reset()
+
+    def render(self) -> str:
+        """输出OpenMetrics文本(以 # EOF 结尾)"""
+        with self._lock:
+            lines = [line for name in sorted(self._metrics) for line in self._metrics[name].render()]
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Path) -> None:
+        """原子地写出指标文件, 供node_exporter textfile collector等读取"""
+        write_text_atomic(path, self.render(), newline='\n')
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+        """
+        在后台线程中通过HTTP提供 /metrics
+        :return: 服务器实例, 调用shutdown()停止
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+metrics = MetricsRegistry()
+
+# GraphQL请求
+GRAPHQL_REQUESTS = metrics.counter("wiki_graphql_requests", "GraphQL requests by operation and result status.")
+GRAPHQL_LATENCY = metrics.histogram("wiki_graphql_request_duration_seconds", "GraphQL request latency by operation.")
+GRAPHQL_BYTES_SENT = metrics.counter("wiki_graphql_request_bytes", "Bytes of GraphQL request bodies sent by operation.")
+# 文档处理
+DOCUMENTS = metrics.counter("wiki_documents", "Documents processed by action (rendered/saved/uploaded/retagged/unchanged/skipped/failed).")
+RETRIES = metrics.counter("wiki_upload_retries", "Retried remote operations by operation.")
+# 资源文件
+ASSETS = metrics.counter("wiki_assets", "Referenced asset files by action (unchanged/uploaded/missing/failed).")
+ASSET_BYTES = metrics.counter("wiki_asset_upload_bytes", "Bytes of asset files uploaded.")
+# 运行
+RUN_LAST_FINISHED = metrics.gauge("wiki_run_last_finished_timestamp_seconds", "Unix time the last run finished, by command and status.")
+RUN_DURATION = metrics.gauge("wiki_run_duration_seconds", "Wall time of the last run by command.")
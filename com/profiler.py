@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# @Author       :
+# @Time         : 2025-09-24
+# @File         : profiler.py
+# @Desc         : 可选的分阶段性能剖析(墙钟时间/CPU时间/内存分配), 默认关闭
+#
+# -----------------------------------------
+
+# import from official
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+# import from third-party
+# import from self-defined
+
+
+class StageProfiler:
+    """
+    分阶段剖析器
+    使用 profiler.stage(name, doc=..., template=...) 包裹被测代码, 未启用时几乎没有开销
+
+    记录内容:
+        - 每个阶段: 调用次数、墙钟时间、CPU时间(当前线程)、内存(需要trace_memory)
+        - 每个文档: 墙钟时间、CPU时间、内存, 以及各阶段的墙钟时间
+        - 每个模板: 调用次数、墙钟时间
+    内存为tracemalloc统计的整个进程的内存:
+        - net_alloc_bytes: 阶段结束与开始时已分配内存的差(净值, 释放多于分配时为负)
+        - peak_bytes: 阶段内已分配内存的峰值相对开始时的增量
+    与其它线程的阶段同时执行时(例如 upload --jobs N)无法区分各线程的分配, 这样的阶段不计入内存统计,
+    mem_samples为计入内存统计的次数
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.trace_memory = False
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._documents: Dict[str, Dict[str, float]] = {}
+        self._templates: Dict[str, Dict[str, float]] = {}
+        self._started_tracemalloc = False
+        self._local = threading.local()
+        self._active: Dict[int, int] = {}  # 线程 -> 正在执行的阶段数
+        self._overlaps = 0  # 不同线程的阶段同时执行的次数
+
+    def enable(self, trace_memory: bool = True) -> None:
+        """
+        开启剖析
+        :param trace_memory: 是否使用tracemalloc统计内存分配(会明显拖慢执行)
+        """
+        self.reset()
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def disable(self) -> None:
+        self.enabled = False
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._documents.clear()
+            self._templates.clear()
+            self._active.clear()
+            self._overlaps = 0
+
+    def stage(self, name: str, doc: Optional[str] = None, template: Optional[str] = None):
+        """
+        剖析上下文
+        :param name: 阶段名称
+        :param doc: 所属文档(用于按文档汇总)
+        :param template: 使用的模板(用于按模板汇总)
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._measure(name, doc, template)
+
+    def _enter(self) -> Tuple[bool, int]:
+        """记录当前线程开始一个阶段, 返回(是否已有其它线程的阶段在执行, 开始时的重叠计数)"""
+        thread = threading.get_ident()
+        with self._lock:
+            overlapped = any(count for other, count in self._active.items() if other != thread)
+            if overlapped:
+                self._overlaps += 1
+            self._active[thread] = self._active.get(thread, 0) + 1
+            return overlapped, self._overlaps
+
+    def _exit(self, overlapped: bool, overlaps: int) -> bool:
+        """记录当前线程结束一个阶段, 返回阶段执行期间是否与其它线程重叠"""
+        thread = threading.get_ident()
+        with self._lock:
+            self._active[thread] -= 1
+            if not self._active[thread]:
+                del self._active[thread]
+            return overlapped or self._overlaps != overlaps
+
+    @contextmanager
+    def _measure(self, name: str, doc: Optional[str], template: Optional[str]) -> Iterator[None]:
+        # 阶段可以嵌套, 每层记录开始时的内存以及子阶段结束前见到的峰值(子阶段开始时会重置峰值)
+        frames = self._local.__dict__.setdefault("frames", [])
+        overlapped, overlaps = self._enter()
+        frame = {"seen_peak": 0}
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if frames:
+                frames[-1]["seen_peak"] = max(frames[-1]["seen_peak"], peak)
+            tracemalloc.reset_peak()
+            frame["memory_before"] = current
+        frames.append(frame)
+        # 文档的总耗时只累计最外层阶段, 避免render中嵌套的load_data被重复计算
+        doc_depth = getattr(self._local, "doc_depth", 0)
+        if doc is not None:
+            self._local.doc_depth = doc_depth + 1
+        cpu_start = time.thread_time()
+        wall_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            if doc is not None:
+                self._local.doc_depth = doc_depth
+            frames.pop()
+            memory = None
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, frame["seen_peak"])
+                if frames:
+                    frames[-1]["seen_peak"] = max(frames[-1]["seen_peak"], peak)
+                if not self._exit(overlapped, overlaps):
+                    memory = (current - frame["memory_before"], peak - frame["memory_before"])
+            else:
+                self._exit(overlapped, overlaps)
+            with self._lock:
+                stage = self._stages.setdefault(name, self._new_record({"calls": 0}))
+                stage["calls"] += 1
+                self._add(stage, wall, cpu, memory)
+                if doc is not None:
+                    record = self._documents.setdefault(doc, self._new_record({}))
+                    if doc_depth == 0:
+                        self._add(record, wall, cpu, memory)
+                    record[name] = record.get(name, 0.0) + wall
+                if template is not None:
+                    record = self._templates.setdefault(template, {"calls": 0, "wall": 0.0})
+                    record["calls"] += 1
+                    record["wall"] += wall
+
+    def _new_record(self, record: Dict[str, float]) -> Dict[str, float]:
+        record.update(wall=0.0, cpu=0.0)
+        if self.trace_memory:
+            record.update(net_alloc_bytes=0, peak_bytes=0, mem_samples=0)
+        return record
+
+    @staticmethod
+    def _add(record: Dict[str, float], wall: float, cpu: float, memory: Optional[Tuple[int, int]]) -> None:
+        record["wall"] += wall
+        record["cpu"] += cpu
+        if memory is not None:
+            record["net_alloc_bytes"] += memory[0]
+            record["peak_bytes"] = max(record["peak_bytes"], memory[1])
+            record["mem_samples"] += 1
+
+    @staticmethod
+    def _top(records: Dict[str, Dict[str, float]], top_n: int, key: str):
+        ranked = sorted(records.items(), key=lambda item: item[1]["wall"], reverse=True)[:top_n]
+        return [{key: name, **{k: round(v, 6) for k, v in record.items()}} for name, record in ranked]
+
+    def report(self, top_n: int = 20) -> Dict[str, Any]:
+        """
+        :param top_n: 输出最慢的文档/模板数量
+        :return: 剖析结果
+        """
+        with self._lock:
+            stages = {
+                name: {key: round(value, 6) for key, value in stage.items()}
+                for name, stage in self._stages.items()
+            }
+            return {
+                "stages": stages,
+                "slowest_documents": self._top(self._documents, top_n, "document"),
+                "slowest_templates": self._top(self._templates, top_n, "template"),
+            }
+
+    def dump(self, path: Path, top_n: int = 20) -> Dict[str, Any]:
+        """写出JSON报告"""
+        report = self.report(top_n)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
+
+
+profiler = StageProfiler()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# @Author       :
+# @Time         : 2025-09-18
+# @File         : stage_timer.py
+# @Desc         : 分阶段计时, 输出耗时与吞吐量表格
+#
+# -----------------------------------------
+
+# import from official
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+# import from third-party
+# import from self-defined
+
+
+class StageTimer:
+    """
+    分阶段统计耗时和处理条目数(线程安全)
+    同名阶段多次进入时累加, 可用于统计循环中的每一步
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0) -> Iterator[Dict[str, float]]:
+        """
+        计时上下文, 可以在上下文中修改 record["items"] 记录实际处理的条目数
+        :param name: 阶段名称
+        :param items: 处理的条目数
+        """
+        record = {"items": items}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.add(name, time.perf_counter() - start, int(record["items"]))
+
+    def add(self, name: str, seconds: float, items: int = 0) -> None:
+        with self._lock:
+            stage = self._stages.setdefault(name, {"seconds": 0.0, "items": 0, "calls": 0})
+            stage["seconds"] += seconds
+            stage["items"] += items
+            stage["calls"] += 1
+
+    def merge(self, stages: Dict[str, Dict[str, float]]) -> None:
+        """合并其它计时器(例如子进程)的to_dict结果"""
+        with self._lock:
+            for name, other in stages.items():
+                stage = self._stages.setdefault(name, {"seconds": 0.0, "items": 0, "calls": 0})
+                for key in ("seconds", "items", "calls"):
+                    stage[key] += other[key]
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: dict(stage) for name, stage in self._stages.items()}
+
+    def format_table(self) -> str:
+        """按阶段首次出现的顺序输出表格"""
+        rows: List[List[str]] = [["stage", "wall(s)", "calls", "items", "items/s"]]
+        for name, stage in self.to_dict().items():
+            seconds = stage["seconds"]
+            throughput = f"{stage['items'] / seconds:.1f}" if seconds > 0 and stage["items"] else "-"
+            rows.append([name, f"{seconds:.3f}", str(stage["calls"]), str(stage["items"]), throughput])
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        lines = []
+        for idx, row in enumerate(rows):
+            cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+            lines.append("  ".join(cells))
+            if idx == 0:
+                lines.append("  ".join("-" * width for width in widths))
+        return "\n".join(lines)
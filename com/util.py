@@ -7,7 +7,10 @@
 # -----------------------------------------
 
 # import from official
+import os
+import tempfile
 from pathlib import Path
+from typing import Optional
 # import from third-party
 # import from self-defined
 from com.singleton_type import SingletonType
@@ -38,8 +41,78 @@ class PathUtil(metaclass=SingletonType):
     def getTmpDir(self) -> Path:
         return self.rootPath / "tmp"
 
+    # 返回卡牌图片/图标等静态资源路径, 结构与Wiki.js中的资源路径一致(image/..., icon/...)
+    def getAssetDir(self) -> Path:
+        return self.rootPath / "assets"
+
 pathUtil = PathUtil()
 
+# 进程的umask, 新建文件的权限为 0o666 & ~umask (在导入时读取一次, os.umask不是线程安全的)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def write_text_temp(target_path: Path, text: str, newline: Optional[str] = None) -> Path:
+    """
+    写入目标文件同目录下的临时文件, 由调用者重命名为目标文件(os.replace)或删除
+    mkstemp创建的临时文件权限为0600, 这里改为目标文件原有的权限(不存在时按umask), 不影响其他用户读取
+    :param target_path: 目标文件
+    :param text: 文件内容
+    :param newline: 同open的newline参数
+    :return: 临时文件
+    """
+    target_path = Path(target_path)
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = target_path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    fd, tmp_name = tempfile.mkstemp(dir=target_path.parent, prefix=f".{target_path.name}.", suffix=".tmp")
+    try:
+        if hasattr(os, "fchmod"):
+            os.fchmod(fd, mode)
+        with os.fdopen(fd, 'w', encoding='utf-8', newline=newline) as f:
+            f.write(text)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+    return Path(tmp_name)
+
+
+def write_text_atomic(target_path: Path, text: str, newline: Optional[str] = None) -> None:
+    """
+    先写入同目录下的临时文件再重命名, 避免并发或中断时留下半个文件
+    :param target_path: 目标文件
+    :param text: 文件内容
+    :param newline: 同open的newline参数
+    """
+    tmp_path = write_text_temp(target_path, text, newline)
+    try:
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+def data_relative_path(data_file: Path, data_dir: Optional[Path] = None) -> Optional[str]:
+    """
+    数据文件相对data目录的路径(posix格式, 例如 zh/card/intelligence/card_std01_co_06.json), 在不同机器上相同
+    :param data_file: 数据文件
+    :param data_dir: data目录, 默认为项目的data目录
+    :return: 不在data目录下时返回None
+    """
+    data_file = Path(data_file)
+    data_dir = Path(data_dir or pathUtil.getDataDir())
+    try:
+        return data_file.relative_to(data_dir).as_posix()
+    except ValueError:
+        pass
+    # 经过符号链接或相对路径时按实际路径比较
+    try:
+        return data_file.resolve().relative_to(data_dir.resolve()).as_posix()
+    except ValueError:
+        return None
+
 if __name__ == '__main__':
     """测试"""
     print(pathUtil.rootPath)
@@ -0,0 +1,281 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/10/4 10:30
+# @file         : card_store.py
+# @Desc         : 卡牌资料的SQLite存储, 按等级/资源类型/标签/Wiki.js路径建立索引, 可导出为原有的JSON文件结构
+# -----------------------------------------
+
+# import from official
+import json
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+# import from third-party
+
+# import from self-defined
+from com.util import pathUtil, write_text_atomic, data_relative_path
+from com.logger import get_logger
+
+logger = get_logger("card_store")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    key TEXT PRIMARY KEY,              -- 相对data目录的数据文件路径, 例如 zh/card/intelligence/card_std01_co_06.json
+    locale TEXT NOT NULL,
+    dir TEXT NOT NULL,                 -- 相对card目录的子目录, 例如 intelligence
+    name TEXT NOT NULL,                -- 文件名(不含后缀)
+    path TEXT,                         -- Wiki.js页面路径
+    card_name TEXT,
+    card_level TEXT,
+    resource_type TEXT,
+    sha256 TEXT NOT NULL,              -- data的摘要, 内容相同时不重写
+    data TEXT NOT NULL,
+    source_size INTEGER,               -- 写入时数据文件的大小与修改时间, 与文件不同时说明文件被直接修改过
+    source_mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS cards_locale_dir ON cards (locale, dir);
+CREATE INDEX IF NOT EXISTS cards_level ON cards (locale, card_level);
+CREATE INDEX IF NOT EXISTS cards_resource_type ON cards (locale, resource_type);
+CREATE INDEX IF NOT EXISTS cards_path ON cards (path);
+CREATE TABLE IF NOT EXISTS card_tags (
+    tag TEXT NOT NULL,
+    key TEXT NOT NULL REFERENCES cards (key) ON DELETE CASCADE,
+    PRIMARY KEY (tag, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS card_tags_key ON card_tags (key);
+"""
+
+
+# 旧版本的数据库中没有的列, 打开时补充
+MIGRATIONS = {
+    "source_size": "ALTER TABLE cards ADD COLUMN source_size INTEGER",
+    "source_mtime_ns": "ALTER TABLE cards ADD COLUMN source_mtime_ns INTEGER",
+}
+
+
+def dump_card_info(saved_info: Dict) -> str:
+    """与WikiSynchronizer.dump_card_info相同的序列化格式, 导出的文件与同步写出的文件一致"""
+    return json.dumps(saved_info, indent=4, ensure_ascii=False)
+
+
+class CardStore:
+    """
+    卡牌资料的SQLite存储
+
+    每张卡牌一行(完整资料以JSON保存), 常用的查询字段单独成列并建立索引, 标签单独成表;
+    WikiSynchronizer开启存储时同时写入, WikiNode.card_store设置后load_data优先从存储读取;
+    每行记录写入时数据文件的大小与修改时间, 文件之后被直接修改时以文件为准并重新导入
+    """
+
+    def __init__(self, db_file: Optional[Path] = None, data_dir: Optional[Path] = None):
+        """
+        :param db_file: 数据库文件, 默认为 data/cards.sqlite
+        :param data_dir: 资料根目录, 键为相对该目录的路径, 默认为项目的data目录
+        """
+        self.data_dir = Path(data_dir or pathUtil.getDataDir())
+        self.db_file = Path(db_file or self.data_dir / "cards.sqlite")
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(cards)")}
+            for column, statement in MIGRATIONS.items():
+                if column not in columns:
+                    self._conn.execute(statement)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def key_of(self, data_file: Path) -> Optional[str]:
+        """数据文件对应的键, 不在data目录下时返回None"""
+        return data_relative_path(data_file, self.data_dir)
+
+    @staticmethod
+    def _split_key(key: str) -> Tuple[str, str, str]:
+        """zh/card/intelligence/x.json -> (zh, intelligence, x)"""
+        parts = key.split("/")
+        if len(parts) != 4 or parts[1] != "card" or not parts[3].endswith(".json"):
+            raise ValueError(f"not a card data file: {key}")
+        return parts[0], parts[2], parts[3][:-len(".json")]
+
+    def _source(self, key: str) -> Tuple[Optional[int], Optional[int]]:
+        """键对应的数据文件当前的(大小, 修改时间), 文件不存在时为(None, None)"""
+        try:
+            stat = (self.data_dir / key).stat()
+        except FileNotFoundError:
+            return None, None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _row(self, key: str, saved_info: Dict) -> Tuple:
+        locale, dir_name, name = self._split_key(key)
+        card = saved_info.get("card") or {}
+        text = dump_card_info(saved_info)
+        return (key, locale, dir_name, name, saved_info.get("path"), card.get("card_name"), card.get("card_level"),
+                card.get("card_resource_type"), hashlib.sha256(text.encode("utf-8")).hexdigest(), text, *self._source(key))
+
+    def put_many(self, cards: Iterable[Tuple[str, Dict]]) -> int:
+        """
+        写入多张卡牌, 同时记录数据文件当前的大小与修改时间(应在写出文件之后调用)
+        :param cards: (键, 卡牌资料)
+        :return: 内容有变化而写入的卡牌数
+        """
+        written = 0
+        with self._lock, self._conn:
+            for key, saved_info in cards:
+                row = self._row(key, saved_info)
+                existing = self._conn.execute("SELECT sha256 FROM cards WHERE key = ?", (key,)).fetchone()
+                if existing is not None and existing["sha256"] == row[8]:
+                    self._conn.execute(
+                        "UPDATE cards SET source_size = ?, source_mtime_ns = ? WHERE key = ?", (*row[10:], key)
+                    )
+                    continue
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cards (key, locale, dir, name, path, card_name, card_level, resource_type, sha256, data, "
+                    "source_size, source_mtime_ns) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+                self._conn.execute("DELETE FROM card_tags WHERE key = ?", (key,))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO card_tags (tag, key) VALUES (?, ?)",
+                    [(str(tag), key) for tag in saved_info.get("tags") or []],
+                )
+                written += 1
+        return written
+
+    def put(self, key: str, saved_info: Dict) -> bool:
+        return self.put_many([(key, saved_info)]) > 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM cards WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def get_file(self, data_file: Path) -> Optional[Dict]:
+        """
+        按数据文件读取卡牌资料, 不在存储中时返回None
+        数据文件的大小或修改时间与写入时不同(被直接修改过)时读取文件并重新导入
+        """
+        key = self.key_of(data_file)
+        if not key:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, source_size, source_mtime_ns FROM cards WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        source = self._source(key)
+        if source == (None, None) or source == (row["source_size"], row["source_mtime_ns"]):
+            return json.loads(row["data"])
+        logger.info("数据文件已修改, 重新导入: %s", key)
+        with open(self.data_dir / key, 'r', encoding='utf-8') as f:
+            saved_info = json.load(f)
+        self.put(key, saved_info)
+        return saved_info
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cards WHERE key = ?", (key,))
+
+    def count(self, locale: Optional[str] = None) -> int:
+        with self._lock:
+            if locale is None:
+                row = self._conn.execute("SELECT COUNT(*) AS n FROM cards").fetchone()
+            else:
+                row = self._conn.execute("SELECT COUNT(*) AS n FROM cards WHERE locale = ?", (locale,)).fetchone()
+        return row["n"]
+
+    def query(
+            self,
+            locale: str,
+            level: Optional[str] = None,
+            resource_type: Optional[str] = None,
+            tags: Iterable[str] = (),
+            path_prefix: Optional[str] = None
+    ) -> List[str]:
+        """
+        按条件查询卡牌(条件之间为AND), 例如 等级为低级、资源类型为情报、带有造物标签的卡牌
+        :param locale: 语言
+        :param level: 卡牌等级
+        :param resource_type: 资源类型
+        :param tags: 必须全部带有的标签
+        :param path_prefix: Wiki.js路径前缀
+        :return: 满足条件的键, 按键排序
+        """
+        sql = ["SELECT key FROM cards WHERE locale = ?"]
+        params: List = [locale]
+        if level is not None:
+            sql.append("AND card_level = ?")
+            params.append(level)
+        if resource_type is not None:
+            sql.append("AND resource_type = ?")
+            params.append(resource_type)
+        for tag in tags:
+            sql.append("AND key IN (SELECT key FROM card_tags WHERE tag = ?)")
+            params.append(tag)
+        if path_prefix is not None:
+            # 用范围比较代替LIKE, 可以使用path上的索引
+            sql.append("AND path >= ? AND path < ?")
+            params.extend([path_prefix, path_prefix + "\U0010ffff"])
+        sql.append("ORDER BY key")
+        with self._lock:
+            return [row["key"] for row in self._conn.execute(" ".join(sql), params)]
+
+    def import_json(self, locale: str) -> int:
+        """
+        从 data/<locale>/card 下的JSON文件导入
+        :return: 写入的卡牌数
+        """
+        card_dir = self.data_dir / locale / "card"
+
+        def iter_cards():
+            for data_file in sorted(card_dir.glob("*/*.json")):
+                if data_file.name == "contents.json":
+                    continue
+                with open(data_file, 'r', encoding='utf-8') as f:
+                    yield self.key_of(data_file), json.load(f)
+
+        written = self.put_many(iter_cards())
+        logger.info("已导入 %s 的卡牌资料: %d 张有变化", locale, written)
+        return written
+
+    def export_json(self, locale: str, data_dir: Optional[Path] = None) -> List[Path]:
+        """
+        导出为 data/<locale>/card/<dir>/<name>.json 与各目录的contents.json(与同步写出的格式相同), 内容相同的文件不重写
+        :param locale: 语言
+        :param data_dir: 导出的资料根目录, 默认为存储对应的data目录
+        :return: 写入的文件
+        """
+        from src.wiki_synchronizer import WikiSynchronizer
+
+        data_dir = Path(data_dir or self.data_dir)
+        card_dir = data_dir / locale / "card"
+        with self._lock:
+            rows = self._conn.execute("SELECT key, dir, name, data FROM cards WHERE locale = ? ORDER BY key", (locale,)).fetchall()
+
+        written = []
+        dirs = set()
+        for row in rows:
+            target = card_dir / row["dir"] / f"{row['name']}.json"
+            dirs.add(row["dir"])
+            if target.exists() and target.read_text(encoding='utf-8') == row["data"]:
+                continue
+            write_text_atomic(target, row["data"])
+            written.append(target)
+            if data_dir == self.data_dir:
+                # 导出的文件与存储一致, 记录新的大小与修改时间, 避免读取时当作被修改而重新导入
+                with self._lock, self._conn:
+                    self._conn.execute(
+                        "UPDATE cards SET source_size = ?, source_mtime_ns = ? WHERE key = ?", (*self._source(row["key"]), row["key"])
+                    )
+        if dirs:
+            written.extend(WikiSynchronizer.write_contents(card_dir, dirs))
+        return written
@@ -0,0 +1,610 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/9/18 16:02
+# @file         : cli.py
+# @Desc         : 统一命令行入口
+#                 python -m src.cli {sync,index,render,upload,retry,assets,diff,prune} [options]
+# -----------------------------------------
+
+# import from official
+import sys
+import json
+import time
+import logging
+import argparse
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+# import from third-party
+
+# import from self-defined
+from com.util import pathUtil
+from com.logger import configure as configure_logging
+from com.profiler import profiler
+from com.metrics import metrics, DOCUMENTS, RUN_DURATION, RUN_LAST_FINISHED
+from com.stage_timer import StageTimer
+from src.wiki_node import WikiNode
+
+
+def make_selector(
+        locale: str,
+        patterns: Optional[List[str]],
+        shard: Optional[str] = None,
+        match: Optional[str] = None,
+        documents: Optional[List[WikiNode]] = None
+) -> Callable[[WikiNode], bool]:
+    """
+    根据路径/通配符构建文档过滤器
+    匹配对象为数据文件相对 data/<locale> 的路径(含或不含后缀)以及节点名, 例如
+    card/intelligence/card_dlc01_co_* 或 card_std01_*
+    指定shard(形如 "2/4")时只保留属于该分片的文档
+    指定match(检索表达式, 形如 "icon:tR01 AND tag:造物")时只保留满足条件的文档, documents用于增量更新检索索引
+    """
+    if match:
+        from src.wiki_search import SearchIndex
+        index = SearchIndex(locale)
+        index.update(documents or [])
+        matched = index.selector(match)
+        base = make_selector(locale, patterns, shard)
+        return lambda doc: base(doc) and matched(doc)
+    if shard:
+        from src.wiki_shard import Shard
+        return Shard.parse(shard).selector(make_selector(locale, patterns) if patterns else None)
+    if not patterns:
+        return lambda doc: True
+
+    locale_dir = pathUtil.getDataDir() / locale
+
+    def selector(doc: WikiNode) -> bool:
+        data_path = doc.path / doc.data_file
+        try:
+            rel_path = data_path.relative_to(locale_dir).as_posix()
+        except ValueError:
+            rel_path = data_path.as_posix()
+        candidates = (rel_path, rel_path.rsplit(".", 1)[0], doc.name)
+        return any(fnmatch(candidate, pattern) for pattern in patterns for candidate in candidates)
+
+    return selector
+
+
+def _selector(args, documents: List[WikiNode], timer: StageTimer) -> Callable[[WikiNode], bool]:
+    match = getattr(args, "match", None)
+    with timer.stage("search-index", len(documents) if match else 0):
+        return make_selector(args.locale, args.select, args.shard, match, documents)
+
+
+def _build_documents(args, timer: StageTimer) -> List[WikiNode]:
+    from src.wiki_indexer import WikiIndexer
+
+    with timer.stage("index") as record:
+        documents = WikiIndexer(args.locale).build_index().get_all_documents()
+        record["items"] = len(documents)
+    selector = _selector(args, documents, timer)
+    return [doc for doc in documents if selector(doc)]
+
+
+def _local_pages(documents: List[WikiNode], timer: StageTimer) -> Dict[str, WikiNode]:
+    """本地文档的Wiki.js路径 -> 文档(没有path的文档不参与比较)"""
+    pages = {}
+    with timer.stage("load", len(documents)):
+        for doc in documents:
+            if doc.data is None:
+                doc.load_data()
+            path = (doc.data or {}).get("path")
+            if path:
+                pages[path] = doc
+    return pages
+
+
+def _open_mirror(args, uploader, timer: StageTimer, full: bool = False) -> None:
+    """刷新远程页面镜像并交给上传器使用, --no-mirror时每次都请求远程"""
+    if args.no_mirror:
+        return
+    from src.wiki_mirror import RemotePageMirror
+
+    mirror = RemotePageMirror(uploader.wiki_client)
+    with timer.stage("refresh-mirror") as record:
+        report = mirror.refresh(full=full or args.full_refresh)
+        record["items"] = report.fetched
+    uploader.mirror = mirror
+
+
+def _remote_pages(uploader, locale: str, timer: StageTimer) -> Dict[str, Dict]:
+    if uploader.mirror is not None:
+        return uploader.mirror.pages(locale)
+    with timer.stage("list-remote") as record:
+        pages = uploader.wiki_client.list_pages(limit=1000000)
+        if pages is None:
+            raise RuntimeError("获取远程页面列表失败")
+        record["items"] = len(pages)
+    return {page["path"]: page for page in pages if page.get("locale") == locale}
+
+
+def cmd_sync(args, timer: StageTimer) -> None:
+    from src.wiki_synchronizer import WikiSynchronizer
+
+    synchronizer = WikiSynchronizer(args.locale, card_store=WikiNode.card_store)
+    sync_kwargs = dict(
+        design_dir=args.design_dir,
+        force_sync=args.force,
+        jobs=args.jobs,
+        cards=args.cards,
+        decks=args.decks,
+    )
+    if not args.publish:
+        with timer.stage("sync") as record:
+            report = synchronizer.sync(**sync_kwargs)
+            record["items"] = report.total
+        return
+
+    from src.wiki_renderer import WikiPTLRenderer
+    from src.wiki_uploader import WikiUploader
+
+    # 同步后只渲染并上传有变化的卡牌, 同步得到的资料直接交给上传器
+    uploader = WikiUploader(locale=args.locale, renderer=WikiPTLRenderer())
+    _open_mirror(args, uploader, timer)
+    report = uploader.sync_and_publish(
+        synchronizer,
+        is_save=args.save,
+        upload_jobs=args.upload_jobs,
+        timer=timer,
+        retry_wait=args.retry_wait,
+        **sync_kwargs
+    )
+    print(f"同步 {report.total} 张卡牌, 发布 {len(report.changed)} 张有变化的卡牌")
+
+
+def cmd_cards(args, timer: StageTimer) -> None:
+    from src.card_store import CardStore
+
+    store = WikiNode.card_store or CardStore()
+    if args.action == "import":
+        with timer.stage("import") as record:
+            record["items"] = store.import_json(args.locale)
+        print(f"已导入，共 {store.count(args.locale)} 张卡牌，{record['items']} 张有变化")
+    elif args.action == "export":
+        with timer.stage("export") as record:
+            written = store.export_json(args.locale, data_dir=args.output)
+            record["items"] = len(written)
+        print(f"已导出 {store.count(args.locale)} 张卡牌，写入 {len(written)} 个文件")
+    else:
+        with timer.stage("query") as record:
+            keys = store.query(args.locale, level=args.level, resource_type=args.type, tags=args.tag or (),
+                               path_prefix=args.path_prefix)
+            record["items"] = len(keys)
+        for key in keys:
+            print(key)
+        print(f"共 {len(keys)} 张卡牌")
+
+
+def cmd_index(args, timer: StageTimer) -> None:
+    documents = _build_documents(args, timer)
+    for doc in documents:
+        if args.list:
+            print(doc.data_key)
+    print(f"共 {len(documents)} 个文档")
+
+
+def cmd_render(args, timer: StageTimer) -> None:
+    from src.wiki_renderer import WikiPTLRenderer
+    from src.wiki_uploader import WikiUploader
+
+    documents = _build_documents(args, timer)
+    renderer = WikiPTLRenderer()
+    for doc in documents:
+        with timer.stage("render", 1):
+            content = doc.render(pre_renderer=renderer)
+        DOCUMENTS.inc(action="rendered")
+        if args.save:
+            with timer.stage("save", 1):
+                WikiUploader._save(doc, content)
+            DOCUMENTS.inc(action="saved")
+    print(f"共渲染 {len(documents)} 个文档")
+
+
+def cmd_upload(args, timer: StageTimer) -> None:
+    from src.wiki_renderer import WikiPTLRenderer
+    from src.wiki_uploader import WikiUploader
+
+    exporter = None
+    if args.backend == "git":
+        from src.wiki_git_exporter import WikiGitExporter
+        exporter = WikiGitExporter(
+            args.git_dir or pathUtil.getTmpDir() / "wiki_git", locale_namespace=args.locale_namespace, branch=args.branch
+        )
+
+    manifest = manifest_file = None
+    if args.shard or args.manifest:
+        from src.wiki_shard import Shard, UploadManifest
+        shard = Shard.parse(args.shard) if args.shard else None
+        manifest = UploadManifest(args.locale, shard)
+        manifest_file = args.manifest or (shard.default_manifest(args.locale) if shard else None)
+
+    uploader = WikiUploader(locale=args.locale, renderer=WikiPTLRenderer())
+    with timer.stage("index") as record:
+        record["items"] = len(uploader.wiki_indexer.get_all_documents())
+    if args.backend == "graphql":
+        _open_mirror(args, uploader, timer)
+    try:
+        uploader.upload(
+            is_save=args.save,
+            is_upload=args.backend == "graphql",
+            filter_func=_selector(args, uploader.wiki_indexer.get_all_documents(), timer),
+            jobs=args.jobs,
+            timer=timer,
+            exporter=exporter,
+            commit_message=args.message,
+            manifest=manifest,
+            retry_wait=args.retry_wait if args.backend == "graphql" else None,
+        )
+    finally:
+        # 失败时也写出清单, 合并时可以看到失败的文档
+        if manifest_file is not None:
+            manifest.save(manifest_file)
+            print(f"上传清单已保存: {manifest_file}")
+
+
+def cmd_retry(args, timer: StageTimer) -> None:
+    from src.wiki_renderer import WikiPTLRenderer
+    from src.wiki_uploader import WikiUploader
+    from src.wiki_dead_letter import RetryScheduler
+
+    uploader = WikiUploader(locale=args.locale, renderer=WikiPTLRenderer())
+    queue = uploader.dead_letters
+    if args.list or not len(queue):
+        if len(queue):
+            print(queue.format())
+        print(f"死信队列中共 {len(queue)} 条文档")
+        return
+
+    with timer.stage("index") as record:
+        documents = uploader.wiki_indexer.get_all_documents()
+        record["items"] = len(documents)
+    # 本地已不存在的文档不再重试
+    local = {doc.data_key for doc in documents if doc.data_file}
+    for key in [key for key in queue.entries if key not in local]:
+        queue.discard(key)
+        print(f"本地已不存在, 从死信队列移除: {key}")
+
+    _open_mirror(args, uploader, timer)
+    scheduler = RetryScheduler(uploader, queue, max_wait=args.wait)
+    with timer.stage("retry") as record:
+        report = scheduler.run(documents, force=args.all, is_save=args.save, timer=timer)
+        record["items"] = report.attempted
+    print(report)
+    if len(queue):
+        print(queue.format())
+
+
+def cmd_merge_shards(args, timer: StageTimer) -> int:
+    from src.wiki_shard import merge_manifests, shard_key
+
+    manifests = []
+    for manifest_file in args.manifests:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifests.append(json.load(f))
+
+    expected = None
+    if args.check_index:
+        # 与分片发布时使用相同的选择条件, 得到应当被处理的全部文档
+        args.shard = None
+        expected = {shard_key(doc) for doc in _build_documents(args, timer)}
+
+    with timer.stage("merge", len(manifests)):
+        report = merge_manifests(manifests, expected)
+    print(report)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, indent=2, ensure_ascii=False)
+        print(f"合并清单已保存: {args.output}")
+    if not report.ok:
+        print("分片清单检查未通过", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_build(args, timer: StageTimer) -> int:
+    from src.multi_locale import MultiLocaleBuilder, available_locales
+
+    locales = args.locales or available_locales()
+    builder = MultiLocaleBuilder(
+        locales,
+        sync=args.sync,
+        force_sync=args.force,
+        save=args.save,
+        upload=args.upload and args.backend == "graphql",
+        git_dir=(args.git_dir or pathUtil.getTmpDir() / "wiki_git") if args.backend == "git" else None,
+        branch=args.branch,
+        locale_namespace=args.locale_namespace,
+    )
+    with timer.stage("build", len(locales)):
+        report = builder.run(jobs=args.jobs, commit_message=args.message)
+    print(report)
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, indent=2, ensure_ascii=False)
+    if report.failed:
+        print(f"构建失败的语言: {', '.join(report.failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_diff(args, timer: StageTimer) -> None:
+    from src.wiki_renderer import WikiPTLRenderer
+    from src.wiki_uploader import WikiUploader
+    from src.wiki_mirror import content_digest
+
+    uploader = WikiUploader(locale=args.locale, renderer=WikiPTLRenderer())
+    documents = uploader.wiki_indexer.get_all_documents()
+    selector = _selector(args, documents, timer)
+    local = _local_pages([doc for doc in documents if selector(doc)], timer)
+    _open_mirror(args, uploader, timer)
+    remote = _remote_pages(uploader, args.locale, timer)
+
+    for path in sorted(set(local) - set(remote)):
+        print(f"+ {path}")
+    if not args.select and not args.match:
+        for path in sorted(set(remote) - set(local)):
+            print(f"- {path}")
+
+    if args.content:
+        common = sorted(set(local) & set(remote))
+        with timer.stage("compare", len(common)):
+            for path in common:
+                content = local[path].render(pre_renderer=uploader.renderer)
+                # 镜像中内容摘要仍然有效时不需要请求页面内容
+                page = uploader.mirror.snapshot(args.locale, path) if uploader.mirror is not None else None
+                if page is None:
+                    page = uploader.wiki_client.get_page_by_path(path=path, locale=args.locale)
+                    if page is not None and uploader.mirror is not None:
+                        uploader.mirror.record_page(page)
+                if page is None or (page.get("content_sha256") or content_digest(page.get("content") or "")) != content_digest(content):
+                    print(f"~ {path}")
+
+
+def cmd_prune(args, timer: StageTimer) -> None:
+    from src.wiki_uploader import WikiUploader
+
+    uploader = WikiUploader(locale=args.locale)
+    local = _local_pages(uploader.wiki_indexer.get_all_documents(), timer)
+    # 删除前全量刷新, 排除已被删除的页面并包含新建的页面
+    _open_mirror(args, uploader, timer, full=True)
+    remote = _remote_pages(uploader, args.locale, timer)
+
+    orphans = sorted(path for path in set(remote) - set(local) if path.startswith(args.prefix))
+    with timer.stage("prune", len(orphans)):
+        for path in orphans:
+            if not args.yes:
+                print(f"[dry-run] 将删除: {path}")
+                continue
+            if uploader.wiki_client.delete_page(remote[path]["id"]):
+                if uploader.mirror is not None:
+                    uploader.mirror.remove(remote[path]["id"])
+                print(f"已删除: {path}")
+            else:
+                print(f"删除失败: {path}")
+    if not args.yes:
+        print(f"共 {len(orphans)} 个页面待删除, 使用 --yes 执行删除")
+
+
+def cmd_assets(args, timer: StageTimer) -> None:
+    from src.wiki_asset_sync import WikiAssetSync, collect_assets
+
+    documents = _build_documents(args, timer)
+    assets = set()
+    with timer.stage("collect", len(documents)):
+        for doc in documents:
+            if doc.data is None:
+                doc.load_data()
+            assets.update(collect_assets(doc.data))
+
+    client = None
+    if not args.dry_run:
+        from src.wiki_uploader import WikiUploader
+        client = WikiUploader(locale=args.locale).wiki_client
+    syncer = WikiAssetSync(client, asset_dir=args.asset_dir)
+    with timer.stage("assets", len(assets)):
+        report = syncer.sync(assets, jobs=args.jobs, dry_run=args.dry_run, force=args.force)
+    if args.dry_run:
+        for asset in report.uploaded:
+            print(f"[dry-run] 将上传: {asset}")
+    print(report)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Wiki.js 维护工具")
+    parser.add_argument("--locale", default="zh", help="语言, 对应 data/<locale>")
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                        help="输出更多日志, -v为info, -vv为逐文档的debug信息")
+    parser.add_argument("--log-json", type=Path, default=None, metavar="JSONL",
+                        help="同时以JSON Lines格式将日志追加到该文件")
+    parser.add_argument("--profile", action="store_true", help="使用cProfile运行并输出最耗时的函数")
+    parser.add_argument("--profile-report", type=Path, default=None, metavar="JSON",
+                        help="开启分阶段剖析(墙钟/CPU/内存), 并将报告与最慢的文档/模板写入该文件")
+    parser.add_argument("--profile-top", type=int, default=20, help="报告中最慢文档/模板的数量")
+    parser.add_argument("--no-trace-memory", dest="trace_memory", action="store_false",
+                        help="剖析时不统计内存分配(tracemalloc开销较大)")
+    parser.add_argument("--metrics-file", type=Path, default=None, metavar="PROM",
+                        help="运行结束时将指标以OpenMetrics文本格式写入该文件")
+    parser.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                        help="运行期间在 127.0.0.1:PORT/metrics 提供指标")
+    parser.add_argument("--card-store", type=Path, default=None, metavar="SQLITE",
+                        help="使用卡牌存储(例如 data/cards.sqlite): 同步时同时写入, 加载卡牌资料时优先读取")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_select(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("-s", "--select", action="append", metavar="GLOB",
+                         help="按数据文件路径/节点名选择文档, 可重复, 例如 'card/intelligence/card_dlc01_co_*'")
+        sub.add_argument("--shard", default=None, metavar="i/N",
+                         help="只处理第i个分片(1<=i<=N), 按Wiki.js路径的稳定哈希分配文档")
+        sub.add_argument("--match", default=None, metavar="QUERY",
+                         help="按卡牌文本/标签/图标检索文档, 例如 'icon:tR01 AND tag:造物' 或 '弃置 OR 丢弃'")
+
+    def add_mirror(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("--no-mirror", action="store_true",
+                         help="不使用远程页面镜像(tmp/wiki_mirror.sqlite), 逐个请求远程页面")
+        sub.add_argument("--full-refresh", action="store_true",
+                         help="全量刷新远程页面镜像(默认按updatedAt增量刷新)")
+
+    sub = subparsers.add_parser("sync", help="同步卡牌设计资料")
+    sub.add_argument("--design-dir", default="card_json")
+    sub.add_argument("--force", action="store_true", help="强制重新初始化卡牌资料")
+    sub.add_argument("--jobs", type=int, default=1, help="并行处理卡组的进程数")
+    sub.add_argument("--cards", nargs="+", metavar="CARD", help="只同步这些卡牌")
+    sub.add_argument("--decks", nargs="+", metavar="DECK", help="只同步这些卡组文件")
+    sub.add_argument("--publish", action="store_true", help="同步后立即渲染并上传有变化的卡牌")
+    sub.add_argument("--upload-jobs", type=int, default=1, help="--publish: 并行上传的线程数")
+    sub.add_argument("--no-save", dest="save", action="store_false", help="--publish: 不保存到tmp")
+    sub.add_argument("--retry-wait", type=float, default=60.0, metavar="SECONDS",
+                     help="--publish: 上传失败的文档记入死信队列, 结束前最多等待该秒数按退避时间重试, 0为只记录")
+    add_mirror(sub)
+    sub.set_defaults(func=cmd_sync)
+
+    sub = subparsers.add_parser("cards", help="卡牌存储: 从JSON导入、导出为JSON、按条件查询")
+    sub.add_argument("action", choices=["import", "export", "query"])
+    sub.add_argument("--level", default=None, help="查询: 卡牌等级, 例如 低级")
+    sub.add_argument("--type", default=None, help="查询: 资源类型, 例如 情报")
+    sub.add_argument("--tag", action="append", help="查询: 标签, 可重复(需全部满足)")
+    sub.add_argument("--path-prefix", default=None, help="查询: Wiki.js路径前缀")
+    sub.add_argument("--output", type=Path, default=None, help="导出: 资料根目录, 默认为data目录")
+    sub.set_defaults(func=cmd_cards)
+
+    sub = subparsers.add_parser("index", help="构建索引并列出文档")
+    add_select(sub)
+    sub.add_argument("--list", action="store_true", help="列出选中的文档")
+    sub.set_defaults(func=cmd_index)
+
+    sub = subparsers.add_parser("render", help="渲染文档")
+    add_select(sub)
+    sub.add_argument("--no-save", dest="save", action="store_false", help="只渲染不保存到tmp")
+    sub.set_defaults(func=cmd_render)
+
+    sub = subparsers.add_parser("upload", help="渲染并上传文档")
+    add_select(sub)
+    sub.add_argument("--jobs", type=int, default=1, help="并行上传的线程数")
+    sub.add_argument("--no-save", dest="save", action="store_false", help="不保存到tmp")
+    sub.add_argument("--backend", choices=["graphql", "git"], default="graphql",
+                     help="graphql: 逐页调用API上传; git: 写入Wiki.js git存储仓库并一次性提交变化的文件")
+    sub.add_argument("--git-dir", type=Path, default=None, help="git存储仓库目录, 默认为 tmp/wiki_git")
+    sub.add_argument("--locale-namespace", action="store_true",
+                     help="git存储按语言分目录(<repo>/<locale>/<path>, path已以语言开头时不重复添加), 同一仓库应始终使用相同的设置")
+    sub.add_argument("--branch", default=None, help="提交到该分支, 默认为当前分支")
+    sub.add_argument("-m", "--message", default=None, help="提交信息")
+    sub.add_argument("--manifest", type=Path, default=None,
+                     help="上传清单文件, 指定--shard时默认为 tmp/shards/<locale>-shard-i-of-N.json")
+    sub.add_argument("--retry-wait", type=float, default=60.0, metavar="SECONDS",
+                     help="上传失败的文档记入死信队列, 结束前最多等待该秒数按退避时间重试, 0为只记录")
+    add_mirror(sub)
+    sub.set_defaults(func=cmd_upload)
+
+    sub = subparsers.add_parser("retry", help="重试死信队列中上传失败的文档")
+    sub.add_argument("--list", action="store_true", help="只列出死信队列")
+    sub.add_argument("--all", action="store_true", help="立即重试全部文档, 包括未到重试时间与已停止自动重试的文档")
+    sub.add_argument("--wait", type=float, default=0.0, metavar="SECONDS",
+                     help="最多等待该秒数, 继续重试未到时间或再次失败的文档")
+    sub.add_argument("--no-save", dest="save", action="store_false", help="不保存到tmp")
+    add_mirror(sub)
+    sub.set_defaults(func=cmd_retry)
+
+    sub = subparsers.add_parser("merge-shards", help="合并分片上传清单并检查遗漏与重叠")
+    sub.add_argument("manifests", nargs="+", type=Path, help="各分片的上传清单")
+    sub.add_argument("--output", type=Path, default=None, help="合并后的清单")
+    sub.add_argument("--check-index", action="store_true", help="与本地索引比较, 检查没有被任何分片处理的文档")
+    sub.add_argument("-s", "--select", action="append", metavar="GLOB", help="分片发布时使用的选择条件")
+    sub.add_argument("--match", default=None, metavar="QUERY", help="分片发布时使用的检索条件")
+    sub.set_defaults(func=cmd_merge_shards)
+
+    sub = subparsers.add_parser("build", help="多语言并行同步/渲染/发布")
+    sub.add_argument("--locales", nargs="+", metavar="LOCALE", help="要构建的语言, 默认为data下的全部语言")
+    sub.add_argument("--jobs", type=int, default=2, help="并行构建的进程数")
+    sub.add_argument("--sync", action="store_true", help="先同步卡牌设计资料")
+    sub.add_argument("--force", action="store_true", help="强制同步")
+    sub.add_argument("--no-save", dest="save", action="store_false", help="不保存渲染结果到tmp")
+    sub.add_argument("--upload", action="store_true", help="发布(默认只渲染)")
+    sub.add_argument("--backend", choices=["graphql", "git"], default="graphql")
+    sub.add_argument("--git-dir", type=Path, default=None, help="git存储仓库目录, 默认为 tmp/wiki_git")
+    sub.add_argument("--locale-namespace", action="store_true",
+                     help="git存储按语言分目录(<repo>/<locale>/<path>, path已以语言开头时不重复添加), 同一仓库应始终使用相同的设置")
+    sub.add_argument("--branch", default=None)
+    sub.add_argument("-m", "--message", default=None, help="提交信息")
+    sub.add_argument("--report", type=Path, default=None, metavar="JSON", help="将汇总报告写入该文件")
+    sub.set_defaults(func=cmd_build)
+
+    sub = subparsers.add_parser("assets", help="上传文档引用的新增或变化的卡牌图片与图标")
+    add_select(sub)
+    sub.add_argument("--jobs", type=int, default=4, help="并行上传的线程数")
+    sub.add_argument("--dry-run", action="store_true", help="只列出需要上传的资源")
+    sub.add_argument("--force", action="store_true", help="忽略远程资源清单, 上传全部资源")
+    sub.add_argument("--asset-dir", type=Path, default=None, help="本地资源目录, 默认为 assets")
+    sub.set_defaults(func=cmd_assets)
+
+    sub = subparsers.add_parser("diff", help="比较本地文档与远程页面")
+    add_select(sub)
+    sub.add_argument("--content", action="store_true", help="同时比较渲染结果与远程内容(镜像中内容未知的页面每个一次请求)")
+    add_mirror(sub)
+    sub.set_defaults(func=cmd_diff)
+
+    sub = subparsers.add_parser("prune", help="删除本地已不存在的远程页面")
+    sub.add_argument("--prefix", required=True, help="只处理该路径前缀下的页面, 例如 'card/'")
+    sub.add_argument("--yes", action="store_true", help="实际执行删除, 默认只列出")
+    add_mirror(sub)
+    sub.set_defaults(func=cmd_prune)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    configure_logging(max(logging.DEBUG, logging.WARNING - 10 * args.verbose), json_file=args.log_json)
+    timer = StageTimer()
+    if args.card_store is not None:
+        from src.card_store import CardStore
+        WikiNode.card_store = CardStore(args.card_store)
+
+    function_profiler = None
+    if args.profile:
+        import cProfile
+        function_profiler = cProfile.Profile()
+    if args.profile_report:
+        profiler.enable(trace_memory=args.trace_memory)
+    metrics_server = metrics.serve(args.metrics_port) if args.metrics_port is not None else None
+    status = "failed"
+    start = time.perf_counter()
+    with timer.stage("total"):
+        if function_profiler:
+            function_profiler.enable()
+        try:
+            # 命令可以返回非0的退出码表示检查未通过(报告已输出), 不抛出异常
+            exit_code = args.func(args, timer) or 0
+            status = "succeeded" if exit_code == 0 else "failed"
+        finally:
+            if function_profiler:
+                function_profiler.disable()
+            if args.profile_report:
+                profiler.disable()
+            RUN_DURATION.set(time.perf_counter() - start, command=args.command)
+            RUN_LAST_FINISHED.set(time.time(), command=args.command, status=status)
+            if args.metrics_file:
+                metrics.write_textfile(args.metrics_file)
+            if metrics_server:
+                metrics_server.shutdown()
+
+    if function_profiler:
+        import pstats
+        pstats.Stats(function_profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+    print(timer.format_table())
+    if args.profile_report:
+        report = profiler.dump(args.profile_report, args.profile_top)
+        print(f"剖析报告已保存: {args.profile_report}")
+        for item in report["slowest_documents"][:5]:
+            print(f"  {item['wall']:.4f}s  cpu {item['cpu']:.4f}s  {item['document']}")
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
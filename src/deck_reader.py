@@ -0,0 +1,126 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/9/12 10:21
+# @file         : deck_reader.py
+# @Desc         : 卡组设计文件的流式读取
+# -----------------------------------------
+
+# import from official
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+# import from third-party
+
+# import from self-defined
+
+
+class DeckReader:
+    """
+    流式读取卡组设计文件(顶层为卡牌记录数组的JSON)
+
+    每次只解析并返回一条卡牌记录, 内存占用与单张卡牌而不是整个卡组相关;
+    指定expected_count时在读取过程中校验卡牌数量与登记文件是否一致
+    """
+    WHITESPACE = " \t\n\r"
+    DELIMITERS = ",]" + WHITESPACE
+
+    def __init__(self, path: Path, expected_count: Optional[int] = None, chunk_size: int = 64 * 1024):
+        """
+        :param path: 卡组设计文件
+        :param expected_count: 登记文件中的卡牌数量, None表示不校验
+        :param chunk_size: 每次读取的字符数
+        """
+        self.path = path
+        self.expected_count = expected_count
+        self.chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+
+    def _count_error(self, count: str) -> ValueError:
+        return ValueError(f"{self.path} has {count} cards, but {self.expected_count} cards in register file")
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if not self.path.exists():
+            raise FileNotFoundError(f"{self.path} not found")
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            buffer = ""
+            pos = 0
+            eof = False
+
+            def fill() -> bool:
+                """读取下一块数据, 返回是否读到了内容"""
+                nonlocal buffer, pos, eof
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    eof = True
+                    return False
+                # 丢弃已经解析过的部分, 保证缓冲区只包含当前记录
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                return True
+
+            def skip_whitespace() -> None:
+                nonlocal pos
+                while True:
+                    while pos < len(buffer) and buffer[pos] in self.WHITESPACE:
+                        pos += 1
+                    if pos < len(buffer) or not fill():
+                        return
+
+            def expect(chars: str) -> str:
+                skip_whitespace()
+                if pos >= len(buffer) or buffer[pos] not in chars:
+                    found = buffer[pos] if pos < len(buffer) else "EOF"
+                    raise ValueError(f"{self.path}: expected one of {chars!r} at char {pos}, found {found!r}")
+                return buffer[pos]
+
+            expect("[")
+            pos += 1
+            count = 0
+
+            skip_whitespace()
+            if pos < len(buffer) and buffer[pos] == "]":
+                pos += 1
+            else:
+                while True:
+                    skip_whitespace()
+                    while True:
+                        try:
+                            record, end = self._decoder.raw_decode(buffer, pos)
+                        except json.JSONDecodeError:
+                            if eof or not fill():
+                                raise
+                            continue
+                        # 数值等标量可能被块边界截断, 直到其后出现分隔符才算解析完整
+                        truncated = end == len(buffer) or buffer[end] not in self.DELIMITERS
+                        if truncated and not eof and fill():
+                            continue
+                        break
+                    pos = end
+
+                    if self.expected_count is not None and count >= self.expected_count:
+                        raise self._count_error(f"more than {self.expected_count}")
+                    count += 1
+                    yield record
+
+                    if expect(",]") == "]":
+                        pos += 1
+                        break
+                    pos += 1
+
+            skip_whitespace()
+            if pos < len(buffer):
+                raise ValueError(f"{self.path}: unexpected data after deck array at char {pos}")
+
+        if self.expected_count is not None and count != self.expected_count:
+            raise self._count_error(str(count))
+
+
+if __name__ == '__main__':
+    import sys
+
+    for idx, card in enumerate(DeckReader(Path(sys.argv[1]), chunk_size=256)):
+        print(idx, card.get("card_name"))
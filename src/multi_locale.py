@@ -0,0 +1,225 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/9/29 14:18
+# @file         : multi_locale.py
+# @Desc         : 多语言并行构建: 每个语言在独立进程中同步/索引/渲染/发布, 最后汇总报告
+# -----------------------------------------
+
+# import from official
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+# import from third-party
+
+# import from self-defined
+from com.util import pathUtil
+from com.stage_timer import StageTimer
+
+
+class LocaleTask(NamedTuple):
+    """单个语言的构建参数(需要可以pickle以传给子进程)"""
+    locale: str
+    sync: bool = False
+    force_sync: bool = False
+    save: bool = True
+    upload: bool = False
+    git_dir: Optional[Path] = None  # 设置时导出到git存储仓库, 由主进程统一提交
+    locale_namespace: bool = False  # git存储是否按语言分目录
+    register_dict: Optional[Dict] = None  # 主进程解析好的登记信息
+    bytecode_cache_dir: Optional[Path] = None  # 进程间共用的Jinja2字节码缓存
+
+
+def available_locales() -> List[str]:
+    """data目录下包含contents.json的语言"""
+    return sorted(path.parent.name for path in pathUtil.getDataDir().glob("*/contents.json"))
+
+
+def build_locale(task: LocaleTask) -> Dict:
+    """
+    构建单个语言(在子进程中执行)
+    出错时不抛出异常, 而是记录在结果中, 避免一个语言的失败中断其它语言
+    :return: 该语言的构建结果
+    """
+    from src.wiki_template import Template
+    from src.wiki_renderer import WikiPTLRenderer
+    from src.wiki_uploader import WikiUploader
+
+    Template.bytecode_cache_dir = task.bytecode_cache_dir
+    timer = StageTimer()
+    result = {"locale": task.locale, "documents": 0, "processed": 0, "sync": None, "changed_files": [], "error": None}
+    start = time.perf_counter()
+    exporter = None
+    try:
+        if task.sync:
+            from src.wiki_synchronizer import WikiSynchronizer
+
+            with timer.stage("sync") as record:
+                report = WikiSynchronizer(task.locale, register_dict=task.register_dict).sync(force_sync=task.force_sync)
+                record["items"] = report.total
+            result["sync"] = report.to_dict()
+
+        uploader = WikiUploader(locale=task.locale, renderer=WikiPTLRenderer())
+        with timer.stage("index") as record:
+            record["items"] = result["documents"] = len(uploader.wiki_indexer.get_all_documents())
+
+        if task.git_dir is not None:
+            from src.wiki_git_exporter import WikiGitExporter
+            exporter = WikiGitExporter(task.git_dir, locale_namespace=task.locale_namespace)
+
+        result["processed"] = uploader.upload(
+            is_save=task.save,
+            is_upload=task.upload,
+            filter_func=lambda doc: True,
+            timer=timer,
+            exporter=exporter,
+            commit=False,
+        )
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    finally:
+        # 出错前已写出的文件也要提交, 否则下次导出时内容相同不会再被记录
+        if exporter is not None:
+            result["changed_files"] = [str(path) for path in exporter.changed_files]
+
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    result["stages"] = timer.to_dict()
+    return result
+
+
+class MultiLocaleReport:
+    """多语言构建的汇总结果"""
+
+    def __init__(self, results: List[Dict], commit: Optional[str] = None):
+        self.results = results
+        self.commit = commit
+        self.timer = StageTimer()
+        for result in results:
+            self.timer.merge(result["stages"])
+
+    @property
+    def failed(self) -> List[str]:
+        return [result["locale"] for result in self.results if result["error"]]
+
+    def to_dict(self) -> Dict:
+        return {
+            "locales": {result["locale"]: {k: v for k, v in result.items() if k != "locale"} for result in self.results},
+            "documents": sum(result["documents"] for result in self.results),
+            "processed": sum(result["processed"] for result in self.results),
+            "failed": self.failed,
+            "commit": self.commit,
+        }
+
+    def __str__(self) -> str:
+        rows = [["locale", "documents", "processed", "synced", "seconds", "status"]]
+        for result in self.results:
+            sync = result["sync"]
+            synced = str(sync["updated"] + sync["created"]) if sync else "-"
+            status = result["error"] or "ok"
+            rows.append([result["locale"], str(result["documents"]), str(result["processed"]), synced,
+                         f"{result['seconds']:.3f}", status])
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        lines = ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows]
+        lines.insert(1, "  ".join("-" * width for width in widths))
+        if self.commit:
+            lines.append(f"git提交: {self.commit}")
+        lines.append("各阶段合计(子进程耗时之和):")
+        lines.append(self.timer.format_table())
+        return "\n".join(lines)
+
+
+class MultiLocaleBuilder:
+    """
+    多语言并行构建
+        - 登记文件只在主进程解析一次, 传给各语言的同步器
+        - 各进程共用Jinja2字节码缓存(tmp/jinja_cache), 同一进程内同一模板文件只编译一次
+        - 导出到git存储时各进程只写文件, 主进程将所有语言的变化合并为一次提交
+    """
+
+    def __init__(
+            self,
+            locales: List[str],
+            sync: bool = False,
+            force_sync: bool = False,
+            save: bool = True,
+            upload: bool = False,
+            git_dir: Optional[Path] = None,
+            branch: Optional[str] = None,
+            bytecode_cache_dir: Optional[Path] = None,
+            locale_namespace: bool = False
+    ):
+        """
+        :param locales: 语言列表
+        :param sync: 是否先同步卡牌设计资料
+        :param force_sync: 是否强制同步
+        :param save: 是否保存渲染结果到tmp
+        :param upload: 是否通过GraphQL上传
+        :param git_dir: git存储仓库目录, 设置时导出并提交
+        :param branch: git提交的分支
+        :param bytecode_cache_dir: Jinja2字节码缓存目录, 默认为 tmp/jinja_cache
+        :param locale_namespace: git存储是否按语言分目录, 与构建的语言数量无关, 同一仓库应始终使用相同的设置
+        """
+        if len(set(locales)) != len(locales):
+            raise ValueError(f"duplicate locales: {locales}")
+        self.locales = locales
+        self.sync = sync
+        self.force_sync = force_sync
+        self.save = save
+        self.upload = upload
+        self.git_dir = git_dir
+        self.branch = branch
+        self.locale_namespace = locale_namespace
+        self.bytecode_cache_dir = bytecode_cache_dir or pathUtil.getTmpDir() / "jinja_cache"
+
+    def _tasks(self) -> List[LocaleTask]:
+        register_dict = None
+        if self.sync:
+            from src.wiki_synchronizer import WikiSynchronizer
+            register_dict = WikiSynchronizer.load_register(pathUtil.getSrcDir() / "deck_json_register.json")
+        return [
+            LocaleTask(
+                locale=locale,
+                sync=self.sync,
+                force_sync=self.force_sync,
+                save=self.save,
+                upload=self.upload,
+                git_dir=self.git_dir,
+                locale_namespace=self.locale_namespace,
+                register_dict=register_dict,
+                bytecode_cache_dir=self.bytecode_cache_dir,
+            )
+            for locale in self.locales
+        ]
+
+    def run(self, jobs: int = 1, commit_message: Optional[str] = None) -> MultiLocaleReport:
+        """
+        :param jobs: 并行的进程数, 1表示在当前进程中依次构建
+        :param commit_message: git提交信息
+        :return: 汇总结果
+        """
+        exporter = None
+        if self.git_dir is not None:
+            from src.wiki_git_exporter import WikiGitExporter
+            exporter = WikiGitExporter(self.git_dir, locale_namespace=self.locale_namespace, branch=self.branch)
+            # 在启动子进程前初始化仓库与分支, 子进程只写文件
+            exporter.ensure_repo()
+
+        tasks = self._tasks()
+        if jobs <= 1 or len(tasks) <= 1:
+            results = [build_locale(task) for task in tasks]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+                results = list(executor.map(build_locale, tasks))
+
+        commit = None
+        if exporter is not None:
+            changed = [Path(path) for result in results for path in result["changed_files"]]
+            locales = ", ".join(result["locale"] for result in results if result["changed_files"])
+            commit = exporter.commit(commit_message or f"Publish {len(changed)} pages ({locales})", paths=changed)
+        return MultiLocaleReport(results, commit)
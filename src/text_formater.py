@@ -1,6 +1,8 @@
 import re
 from enum import Enum, unique
-from typing import Dict, List, Any, Optional, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Any, Mapping, Optional, Tuple
 
 
 @unique
@@ -21,6 +23,86 @@ class EnumIntelKeyword(str, Enum):
     KEYWORD_INTEL_UNLOCK = "解锁"
     KEYWORD_INTEL_MASTER = "精通"
 
+# 解析结果缓存的最大条目数
+PARSE_CACHE_SIZE = 4096
+
+# 块标记: <b..>开始新的块, <n..>在当前块中换行
+BLOCK_TAG_PATTERN = re.compile(r'<([bn])\d+>')
+# 中英文冒号
+COLON_PATTERN = re.compile(r'[:：]')
+# 匹配形如 a_part(location) 的中英文括号
+EFFECT_LOCATION_PATTERN = re.compile(r'^(.+?)\s*[(\uff08](.*?)[)\uff09]\s*$')
+# 行内元素: ${图标} 或 换行
+INLINE_TOKEN_PATTERN = re.compile(r'\$\{([a-zA-Z0-9_-]+)\}|\n')
+
+# 行内token: [TOKEN_TEXT, 文本] / [TOKEN_ICON, 图标名] / [TOKEN_BREAK]
+TOKEN_TEXT = "t"
+TOKEN_ICON = "i"
+TOKEN_BREAK = "br"
+# 字段 key 的token保存在同级的 key + TOKENS_SUFFIX 中, 渲染时直接使用而不再扫描字符串;
+# 卡牌文件在同步后被手动修改时, 加载时由strip_tokens移除token(见WikiNode.load_data), 改为按文本处理
+TOKENS_SUFFIX = "_tokens"
+
+
+def tokenize_inline(text: str) -> List[List[str]]:
+    """将文本切分为文本、图标、换行token"""
+    tokens = []
+    pos = 0
+    for match in INLINE_TOKEN_PATTERN.finditer(text):
+        if match.start() > pos:
+            tokens.append([TOKEN_TEXT, text[pos:match.start()]])
+        icon = match.group(1)
+        tokens.append([TOKEN_ICON, icon] if icon is not None else [TOKEN_BREAK])
+        pos = match.end()
+    if pos < len(text):
+        tokens.append([TOKEN_TEXT, text[pos:]])
+    return tokens
+
+
+def stored_tokens(content: Mapping, key: str) -> Optional[List]:
+    """字段key的token, 没有token或字段不是文本时返回None, 此时应当按文本处理"""
+    tokens = content.get(key + TOKENS_SUFFIX)
+    if not isinstance(tokens, (list, tuple)) or not isinstance(content.get(key), str):
+        return None
+    return tokens
+
+
+def strip_tokens(content: Any) -> None:
+    """移除数据中所有的token(原地修改), 用于文本可能已被手动修改、token不再可信的数据"""
+    if isinstance(content, dict):
+        for key in [key for key in content if key.endswith(TOKENS_SUFFIX)]:
+            del content[key]
+        for value in content.values():
+            strip_tokens(value)
+    elif isinstance(content, list):
+        for item in content:
+            strip_tokens(item)
+
+
+def iter_icons(content: Any) -> Iterable[str]:
+    """遍历数据中所有token里引用的图标名"""
+    if isinstance(content, Mapping):
+        for key, value in content.items():
+            if key.endswith(TOKENS_SUFFIX):
+                continue
+            tokens = stored_tokens(content, key)
+            if tokens is not None:
+                for token in tokens:
+                    if token[0] == TOKEN_ICON:
+                        yield token[1]
+            else:
+                yield from iter_icons(value)
+    elif isinstance(content, (list, tuple)):
+        for item in content:
+            yield from iter_icons(item)
+
+
+def find_unknown_icons(content: Any, known_icons: Iterable[str]) -> List[str]:
+    """返回数据中引用但不在known_icons中的图标名(去重并排序)"""
+    known_icons = set(known_icons)
+    return sorted({icon for icon in iter_icons(content) if icon not in known_icons})
+
+
 class EffectFormatter:
     def __init__(self):
         self.name: str = ""
@@ -38,9 +120,7 @@ class EffectFormatter:
         返回:
             元组 (a_main, self.location)，其中self.location可能为None
         """
-        # 匹配中英文括号中的内容
-        pattern = re.compile(r'^(.+?)\s*[(\uff08](.*?)[)\uff09]\s*$')
-        match = pattern.match(a_part)
+        match = EFFECT_LOCATION_PATTERN.match(a_part)
 
         if match:
             return match.group(1).strip(), match.group(2).strip()
@@ -83,27 +163,33 @@ class EffectFormatter:
         }
 
 class KeywordFormatter:
+    KEYWORD_REFLECTION = {
+        EnumIntelKeyword.KEYWORD_INTEL_UNLOCK: "unlock",
+        EnumIntelKeyword.KEYWORD_INTEL_MASTER: "master"
+    }
+
     def __init__(self):
         self.is_match: bool = False
         self.keyword: str = ""
         self.text: str = ""
 
+    @classmethod
+    def match_line(cls, line: str) -> Optional[Tuple[str, str]]:
+        """匹配 关键字：内容 结构，返回 (关键字, 内容)"""
+        # 使用冒号分割，只分割第一个冒号
+        parts = COLON_PATTERN.split(line, 1)
+        if len(parts) != 2:
+            return None
+        keyword = cls.KEYWORD_REFLECTION.get(parts[0].strip())
+        if keyword is None:
+            return None
+        return keyword, parts[1].strip()
+
     def parse_from_lines(self, lines: List[str]) -> 'KeywordFormatter':
-        colon_pattern = re.compile(r'[:：]')
-        keyword_reflection = {
-            EnumIntelKeyword.KEYWORD_INTEL_UNLOCK: "unlock",
-            EnumIntelKeyword.KEYWORD_INTEL_MASTER: "master"
-        }
-        # 检查是否包含任何类型的冒号
-        if colon_pattern.search(lines[0]):
-            # 使用冒号分割，只分割第一个冒号
-            parts = colon_pattern.split(lines[0], 1)
-            key = parts[0].strip()
-            value = parts[1].strip()
-            if key in keyword_reflection:
-                self.is_match = True
-                self.keyword = keyword_reflection[key]
-                self.text = value
+        matched = self.match_line(lines[0])
+        if matched:
+            self.is_match = True
+            self.keyword, self.text = matched
 
         return self
 
@@ -113,48 +199,109 @@ class KeywordFormatter:
             ret = {self.keyword: self.text}
         return ret
 
+def freeze(value: Any) -> Any:
+    """将解析结果转换为不可变结构(dict -> MappingProxyType, list -> tuple)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """将不可变结构还原为可修改的dict/list副本"""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_cached(text: str) -> Mapping:
+    return freeze(TextFormatter().parse_from_text(text).to_dict(tokens=True))
+
+
 class TextFormatter:
+    """
+    卡牌效果文本解析
+
+    一次扫描块标记即可得到每个块已去除空白的行, to_dict直接基于这些行生成关键字和效果
+    """
+
     def __init__(self):
-        self.blocks: List[str] = []
+        self.block_lines: List[List[str]] = []
+
+    @property
+    def blocks(self) -> List[str]:
+        return ['\n'.join(lines) for lines in self.block_lines]
 
     def parse_from_text(self, text: str):
-        pattern = r'<[bn]\d+>'
-        parts = re.split(pattern, text)
-        tags = re.findall(pattern, text)
-        current_block = []
-        for tag, content in zip(tags, parts[1:]):
-            content_stripped = content.strip()
-            if not content_stripped:
+        current_block: List[str] = []
+        # 带捕获组的split一次扫描得到 [前缀, 标记类型, 内容, 标记类型, 内容, ...], 前缀被忽略
+        tokens = BLOCK_TAG_PATTERN.split(text)
+        for i in range(1, len(tokens), 2):
+            lines = [line for line in (each.strip() for each in tokens[i + 1].split('\n')) if line]
+            if not lines:
                 continue
-            if tag.startswith('<b'):
-                if current_block:
-                    self.blocks.append('\n'.join(current_block))
-                    current_block = []
-                current_block.append(content_stripped)
-            else:
-                current_block.append(content_stripped)
+            if tokens[i] == 'b' and current_block:
+                self.block_lines.append(current_block)
+                current_block = []
+            current_block.extend(lines)
 
         if current_block:
-            self.blocks.append('\n'.join(current_block))
+            self.block_lines.append(current_block)
 
         return self
 
-    def to_dict(self) -> Dict:
+    def to_dict(self, tokens: bool = False) -> Dict:
+        """
+        :param tokens: 是否为关键字内容、效果消耗和效果文本附加行内token(key + TOKENS_SUFFIX)
+        """
         result = {}
         effects = []
-        for current_block in self.blocks:
-            lines = [line.strip() for line in current_block.split('\n') if line.strip()]
-
+        for lines in self.block_lines:
             # 处理A:B结构, 如果无法匹配则按照效果匹配
-            keyword_result = KeywordFormatter().parse_from_lines(lines).to_dict()
+            keyword_result = KeywordFormatter.match_line(lines[0])
             if keyword_result:
-                result.update(keyword_result)
+                keyword, text = keyword_result
+                result[keyword] = text
+                if tokens:
+                    result[keyword + TOKENS_SUFFIX] = tokenize_inline(text)
             else:
-                effects.append(EffectFormatter().parse_from_lines(lines).to_dict())
+                effect = EffectFormatter().parse_from_lines(lines).to_dict()
+                if tokens:
+                    if effect['consumption'] is not None:
+                        effect['consumption' + TOKENS_SUFFIX] = tokenize_inline(effect['consumption'])
+                    effect['text' + TOKENS_SUFFIX] = tokenize_inline(effect['text'])
+                effects.append(effect)
         if effects:
             result['effects'] = effects
         return result
 
+    @staticmethod
+    def parse_cached(text: str) -> Mapping:
+        """
+        解析文本并缓存结果(按原始文本做LRU缓存)
+        返回的结果不可修改, 需要修改时先用thaw复制
+        """
+        return _parse_cached(text)
+
+    @staticmethod
+    def parse_many(texts: Iterable[str]) -> List[Mapping]:
+        """
+        批量解析, 相同的文本只解析一次
+        :param texts: 原始文本
+        :return: 与输入顺序一致的不可变解析结果
+        """
+        texts = list(texts)
+        parsed = {text: _parse_cached(text) for text in dict.fromkeys(texts)}
+        return [parsed[text] for text in texts]
+
+    @staticmethod
+    def cache_info():
+        return _parse_cached.cache_info()
+
 # 测试代码
 if __name__ == "__main__":
     test_text = """
@@ -0,0 +1,274 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/10/1 09:52
+# @file         : wiki_asset_sync.py
+# @Desc         : 收集文档引用的卡牌图片与图标, 按内容哈希与远程资源清单比较, 只并行上传新增或变化的文件
+# -----------------------------------------
+
+# import from official
+import json
+import hashlib
+import threading
+import mimetypes
+from pathlib import Path, PurePosixPath
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, TYPE_CHECKING
+# import from third-party
+
+# import from self-defined
+from com.util import pathUtil, write_text_atomic
+from com.logger import get_logger
+from com.metrics import ASSETS, ASSET_BYTES
+from src.text_formater import iter_icons
+from src.wiki_renderer import WikiPTLRenderer
+
+if TYPE_CHECKING:
+    from com.graphql import WikiJSGraphQLClient
+
+logger = get_logger("asset_sync")
+
+ASSET_MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def normalize_asset_path(url: Optional[str]) -> Optional[str]:
+    """
+    将数据中的资源地址规范为Wiki.js中的绝对路径, 例如 ./image/a.jpg -> /image/a.jpg
+    外部地址(http(s)://, //, data:)与非法路径返回None
+    """
+    if not url or not isinstance(url, str):
+        return None
+    url = url.strip()
+    if url.startswith(("http://", "https://", "//", "data:")):
+        return None
+    if url.startswith("./"):
+        url = url[1:]
+    path = PurePosixPath("/" + url.lstrip("/"))
+    if ".." in path.parts or path == PurePosixPath("/"):
+        return None
+    return path.as_posix()
+
+
+def _iter_strings(content: Any) -> Iterator[str]:
+    if isinstance(content, str):
+        yield content
+    elif isinstance(content, dict):
+        for value in content.values():
+            yield from _iter_strings(value)
+    elif isinstance(content, (list, tuple)):
+        for item in content:
+            yield from _iter_strings(item)
+
+
+def collect_assets(data: Optional[Dict]) -> Set[str]:
+    """
+    文档数据中引用的资源(Wiki.js路径)
+        - 卡牌图片: card.card_image_url
+        - 图标: token中的图标, 以及字符串中的 ${icon} 占位符, 对应 /icon/<icon>.png
+    """
+    if not data:
+        return set()
+    assets = set()
+    image = normalize_asset_path((data.get("card") or {}).get("card_image_url"))
+    if image:
+        assets.add(image)
+    icons = set(iter_icons(data))
+    for text in _iter_strings(data):
+        if "${" in text:
+            icons.update(WikiPTLRenderer.ICON_PATTERN.findall(text))
+    assets.update(f"{WikiPTLRenderer.IMAGE_STORAGE_PATH}/{icon}.png" for icon in icons)
+    return assets
+
+
+def file_digest(path: Path) -> str:
+    """分块读取文件计算sha256, 不把整个文件读入内存"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AssetSyncReport:
+    """一次资源同步的统计结果"""
+
+    def __init__(self):
+        self.referenced: int = 0
+        self.unchanged: int = 0  # 与远程清单中的哈希相同, 不需要上传
+        self.uploaded: List[str] = []  # 已上传(dry-run时为待上传)的资源
+        self.missing: List[str] = []  # 被引用但本地不存在的资源
+        self.failed: List[str] = []
+        self.bytes: int = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "referenced": self.referenced,
+            "unchanged": self.unchanged,
+            "uploaded": self.uploaded,
+            "missing": self.missing,
+            "failed": self.failed,
+            "bytes": self.bytes,
+        }
+
+    def __str__(self) -> str:
+        lines = [f"共引用 {self.referenced} 个资源，{self.unchanged} 个未变化，{len(self.uploaded)} 个已上传"
+                 f"({self.bytes} 字节)，{len(self.missing)} 个本地缺失，{len(self.failed)} 个上传失败"]
+        for title, items in (("本地缺失", self.missing), ("上传失败", self.failed)):
+            if items:
+                preview = ", ".join(items[:10])
+                lines.append(f"  {title}: {preview}{' ...' if len(items) > 10 else ''}")
+        return "\n".join(lines)
+
+
+class WikiAssetSync:
+    """
+    资源文件同步
+
+    本地资源目录的结构与Wiki.js资源路径一致(assets/image/..., assets/icon/...);
+    清单(data/.asset_manifest.json)记录本地文件的哈希(按大小与修改时间缓存, 避免重复读取)
+    以及已上传到远程的各资源的哈希, 两者相同的资源不再上传
+    """
+
+    def __init__(
+            self,
+            client: Optional['WikiJSGraphQLClient'] = None,
+            asset_dir: Optional[Path] = None,
+            manifest_file: Optional[Path] = None
+    ):
+        """
+        :param client: Wiki.js客户端, dry-run时可以为None
+        :param asset_dir: 本地资源目录, 默认为 assets
+        :param manifest_file: 资源清单文件, 默认为 data/.asset_manifest.json
+        """
+        self.client = client
+        self.asset_dir = Path(asset_dir or pathUtil.getAssetDir())
+        self.manifest_file = Path(manifest_file or pathUtil.getDataDir() / ".asset_manifest.json")
+        self._lock = threading.Lock()
+        self._folders: Dict[PurePosixPath, int] = {PurePosixPath("/"): 0}
+        self.local: Dict[str, Dict] = {}
+        self.remote: Dict[str, str] = {}
+        self._load_manifest()
+
+    def _load_manifest(self) -> None:
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        if manifest.get("version") != ASSET_MANIFEST_VERSION:
+            return
+        self.local = manifest.get("local", {})
+        self.remote = manifest.get("remote", {})
+
+    def save_manifest(self) -> None:
+        with self._lock:
+            text = json.dumps({
+                "version": ASSET_MANIFEST_VERSION,
+                "local": dict(sorted(self.local.items())),
+                "remote": dict(sorted(self.remote.items())),
+            }, indent=2, ensure_ascii=False)
+        write_text_atomic(self.manifest_file, text)
+
+    def local_file(self, asset: str) -> Path:
+        return self.asset_dir / asset.lstrip("/")
+
+    def local_digest(self, asset: str) -> Optional[str]:
+        """本地文件的sha256, 文件不存在时返回None; 大小与修改时间未变时使用清单中的缓存"""
+        path = self.local_file(asset)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        cached = self.local.get(asset)
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["sha256"]
+        digest = file_digest(path)
+        with self._lock:
+            self.local[asset] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+        return digest
+
+    def _folder_id(self, folder: PurePosixPath) -> int:
+        """逐级查找资源文件夹, 不存在时创建"""
+        if folder in self._folders:
+            return self._folders[folder]
+        parent_id = self._folder_id(folder.parent)
+        folders = self.client.list_asset_folders(parent_id)
+        if folders is None:
+            raise RuntimeError(f"获取资源文件夹失败: {folder.parent}")
+        found = next((item["id"] for item in folders if item["slug"] == folder.name), None)
+        if found is None:
+            if not self.client.create_asset_folder(parent_id, folder.name):
+                raise RuntimeError(f"创建资源文件夹失败: {folder}")
+            folders = self.client.list_asset_folders(parent_id) or []
+            found = next((item["id"] for item in folders if item["slug"] == folder.name), None)
+            if found is None:
+                raise RuntimeError(f"创建资源文件夹失败: {folder}")
+            logger.info("已创建资源文件夹: %s", folder)
+        self._folders[folder] = found
+        return found
+
+    def _upload(self, asset: str, report: AssetSyncReport) -> None:
+        path = PurePosixPath(asset)
+        content = self.local_file(asset).read_bytes()
+        # 哈希后文件可能又被修改, 清单以实际上传的内容为准
+        digest = hashlib.sha256(content).hexdigest()
+        mime_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        if self.client.upload_asset(self._folders[path.parent], path.name, content, mime_type):
+            with self._lock:
+                self.remote[asset] = digest
+                report.uploaded.append(asset)
+                report.bytes += len(content)
+            ASSETS.inc(action="uploaded")
+            ASSET_BYTES.inc(len(content))
+            logger.debug("已上传资源: %s", asset)
+        else:
+            with self._lock:
+                report.failed.append(asset)
+            ASSETS.inc(action="failed")
+
+    def sync(self, assets: Iterable[str], jobs: int = 4, dry_run: bool = False, force: bool = False) -> AssetSyncReport:
+        """
+        :param assets: 引用的资源(Wiki.js路径)
+        :param jobs: 并行上传的线程数
+        :param dry_run: 只比较, 不上传; 待上传的资源记录在report.uploaded
+        :param force: 忽略远程清单, 上传全部本地存在的资源
+        :return: 同步结果
+        """
+        report = AssetSyncReport()
+        pending: List[str] = []
+        try:
+            for asset in sorted(set(assets)):
+                report.referenced += 1
+                digest = self.local_digest(asset)
+                if digest is None:
+                    report.missing.append(asset)
+                    ASSETS.inc(action="missing")
+                elif not force and self.remote.get(asset) == digest:
+                    report.unchanged += 1
+                    ASSETS.inc(action="unchanged")
+                else:
+                    pending.append(asset)
+
+            if dry_run:
+                report.uploaded = pending
+                report.bytes = sum(self.local[asset]["size"] for asset in pending)
+                return report
+            if not pending:
+                return report
+            if self.client is None:
+                raise ValueError("client is required to upload assets")
+
+            # 文件夹在上传前依次解析, 避免并行创建同一文件夹
+            for folder in sorted({PurePosixPath(asset).parent for asset in pending}):
+                self._folder_id(folder)
+            with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+                list(executor.map(lambda asset: self._upload(asset, report), pending))
+            report.uploaded.sort()
+            report.failed.sort()
+        finally:
+            # 中断时也保存已上传的部分, 下次只上传剩余的资源
+            self.save_manifest()
+        return report
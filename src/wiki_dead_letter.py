@@ -0,0 +1,274 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/10/6 11:20
+# @file         : wiki_dead_letter.py
+# @Desc         : 上传失败文档的死信队列(持久化错误码与错误信息), 按指数退避加随机抖动安排重试
+# -----------------------------------------
+
+# import from official
+import json
+import time
+import random
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, TYPE_CHECKING
+# import from third-party
+
+# import from self-defined
+from com.util import pathUtil, write_text_atomic
+from com.logger import get_logger
+from com.metrics import RETRIES
+from src.wiki_node import WikiNode
+
+if TYPE_CHECKING:
+    from com.graphql import WikiJSGraphQLClient
+    from src.wiki_uploader import WikiUploader
+
+logger = get_logger("dead_letter")
+
+QUEUE_VERSION = 1
+
+
+class UploadError(Exception):
+    """上传单个文档失败, 记录失败的操作以及Wiki.js返回的错误码与错误信息"""
+
+    def __init__(self, operation: str, name: str, code: Any = None, message: str = ""):
+        """
+        :param operation: 失败的操作, 例如 createPage / updatePage / getPageByPath
+        :param name: 文档名
+        :param code: responseResult.errorCode, 或请求错误的错误码/HTTP状态码
+        :param message: responseResult.message, 或请求错误的错误信息
+        """
+        super().__init__(f"Failed to {operation}: {name}, code: {code}, message: {message}")
+        self.operation = operation
+        self.code = code
+        self.message = message
+
+    @classmethod
+    def from_response(cls, operation: str, name: str, client: 'WikiJSGraphQLClient', response: Optional[Dict]) -> Optional['UploadError']:
+        """
+        由变更的返回结果得到错误, 成功时返回None
+        :param response: create_page/update_page的返回值, 为None时使用客户端记录的请求错误
+        """
+        if response is None:
+            error = client.last_error or {}
+            return cls(operation, name, error.get("code"), error.get("message") or "no response")
+        result = response.get("responseResult")
+        if isinstance(result, Dict) and not result.get("succeeded", True):
+            return cls(operation, name, result.get("errorCode"), result.get("message") or "")
+        return None
+
+
+def backoff_delay(attempts: int, base: float, cap: float, rng: random.Random = random) -> float:
+    """
+    第attempts次失败后的等待时间: 指数退避, 在上限内取后一半加随机抖动, 避免多个文档同时重试
+    :param attempts: 已失败的次数(从1开始)
+    :param base: 第一次失败后的基础等待时间(秒)
+    :param cap: 等待时间上限(秒)
+    """
+    delay = min(cap, base * 2 ** (max(attempts, 1) - 1))
+    return delay / 2 + rng.uniform(0, delay / 2)
+
+
+class DeadLetterQueue:
+    """
+    上传失败的文档(线程安全), 持久化在 tmp/dead_letter/<locale>.json
+
+    键为相对data目录的数据文件路径; 每条记录失败的操作、错误码与错误信息、失败次数以及下次重试的时间,
+    失败次数达到max_attempts后不再自动重试, 只能通过 retry --all 重试
+    """
+
+    def __init__(
+            self,
+            locale: str,
+            queue_file: Optional[Path] = None,
+            base_delay: float = 2.0,
+            max_delay: float = 300.0,
+            max_attempts: int = 5
+    ):
+        """
+        :param locale: 语言
+        :param queue_file: 队列文件, 默认为 tmp/dead_letter/<locale>.json
+        :param base_delay: 第一次失败后的基础等待时间(秒)
+        :param max_delay: 等待时间上限(秒)
+        :param max_attempts: 自动重试的最大失败次数
+        """
+        self.locale = locale
+        self.queue_file = Path(queue_file or pathUtil.getTmpDir() / "dead_letter" / f"{locale}.json")
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.queue_file, 'r', encoding='utf-8') as f:
+                queue = json.load(f)
+        except (OSError, ValueError):
+            return
+        if queue.get("version") == QUEUE_VERSION:
+            self.entries = queue["entries"]
+
+    def save(self) -> None:
+        """有变化时写入队列文件, 队列为空时删除文件"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(sorted(self.entries.items()))
+            self._dirty = False
+        if not entries:
+            if self.queue_file.exists():
+                self.queue_file.unlink()
+            return
+        text = json.dumps({"version": QUEUE_VERSION, "locale": self.locale, "entries": entries}, indent=2, ensure_ascii=False)
+        write_text_atomic(self.queue_file, text)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def record(self, doc: WikiNode, error: Exception, now: Optional[float] = None) -> Dict:
+        """
+        记录一次失败并安排下次重试
+        :return: 更新后的记录
+        """
+        now = time.time() if now is None else now
+        key = doc.data_key
+        with self._lock:
+            entry = self.entries.get(key) or {"path": (doc.data or {}).get("path"), "attempts": 0, "first_failed": now}
+            entry["attempts"] += 1
+            entry.update(
+                operation=getattr(error, "operation", None),
+                code=getattr(error, "code", None),
+                message=getattr(error, "message", None) or f"{type(error).__name__}: {error}",
+                last_failed=now,
+                next_attempt=now + backoff_delay(entry["attempts"], self.base_delay, self.max_delay),
+            )
+            self.entries[key] = entry
+            self._dirty = True
+        return entry
+
+    def resolve(self, doc: WikiNode) -> bool:
+        """文档已上传成功, 从队列中移除"""
+        return self.discard(doc.data_key)
+
+    def discard(self, key: str) -> bool:
+        with self._lock:
+            if self.entries.pop(key, None) is None:
+                return False
+            self._dirty = True
+            return True
+
+    def exhausted(self, key: str) -> bool:
+        return self.entries[key]["attempts"] >= self.max_attempts
+
+    def due(self, keys: Optional[Iterable[str]] = None, now: Optional[float] = None) -> List[str]:
+        """已到重试时间且未达到最大失败次数的记录"""
+        now = time.time() if now is None else now
+        with self._lock:
+            keys = list(self.entries) if keys is None else [key for key in keys if key in self.entries]
+            return sorted(key for key in keys if not self.exhausted(key) and self.entries[key]["next_attempt"] <= now)
+
+    def next_attempt(self, keys: Optional[Iterable[str]] = None) -> Optional[float]:
+        """未达到最大失败次数的记录中最早的下次重试时间"""
+        with self._lock:
+            keys = list(self.entries) if keys is None else [key for key in keys if key in self.entries]
+            times = [self.entries[key]["next_attempt"] for key in keys if not self.exhausted(key)]
+        return min(times) if times else None
+
+    def format(self) -> str:
+        now = time.time()
+        lines = []
+        for key, entry in sorted(self.entries.items()):
+            if self.exhausted(key):
+                when = "已停止自动重试"
+            else:
+                when = f"{max(0.0, entry['next_attempt'] - now):.0f}s 后重试"
+            lines.append(f"{key}  [{entry['operation']}] code={entry['code']} {entry['message']}  "
+                         f"(失败 {entry['attempts']} 次, {when})")
+        return "\n".join(lines)
+
+
+class RetryReport:
+    """一次重试的统计结果"""
+
+    def __init__(self):
+        self.attempted = 0
+        self.statuses: Dict[str, str] = {}  # 文档 -> 最后一次重试的上传结果
+        self.succeeded: List[str] = []
+        self.failed: List[str] = []  # 本次重试仍然失败的文档
+        self.remaining = 0  # 重试结束后队列中剩余的文档
+
+    def __str__(self) -> str:
+        return (f"重试 {self.attempted} 次，{len(self.succeeded)} 条文档上传成功，{len(self.failed)} 条仍然失败，"
+                f"死信队列中剩余 {self.remaining} 条")
+
+
+class RetryScheduler:
+    """
+    按死信队列中的重试时间重新处理失败的文档
+
+    每一轮处理已到时间的文档, 仍然失败的按退避时间重新安排;
+    下一次重试时间超过max_wait秒的截止时间时结束, 剩余的文档留在队列中由之后的 retry 命令处理
+    """
+
+    def __init__(
+            self,
+            uploader: 'WikiUploader',
+            queue: DeadLetterQueue,
+            max_wait: float = 60.0,
+            sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        :param uploader: 上传器, 文档通过其_process重新渲染并上传
+        :param queue: 死信队列
+        :param max_wait: 最多等待的时间(秒), 0表示只处理已到时间的文档
+        :param sleep: 等待函数
+        """
+        self.uploader = uploader
+        self.queue = queue
+        self.max_wait = max_wait
+        self.sleep = sleep
+
+    def run(self, documents: Iterable[WikiNode], force: bool = False, **process_kwargs) -> RetryReport:
+        """
+        :param documents: 可重试的文档, 只处理其中在队列中的文档
+        :param force: 第一轮不论重试时间与失败次数, 立即重试全部文档
+        :param process_kwargs: 传给uploader._process的参数
+        :return: 重试结果
+        """
+        report = RetryReport()
+        nodes = {doc.data_key: doc for doc in documents if doc.data_file}
+        nodes = {key: doc for key, doc in nodes.items() if key in self.queue}
+        deadline = time.time() + self.max_wait
+        try:
+            keys = sorted(nodes) if force else self.queue.due(nodes)
+            while True:
+                for key in keys:
+                    report.attempted += 1
+                    RETRIES.inc(operation="document")
+                    _, status = self.uploader._process(nodes[key], is_upload=True, **process_kwargs)
+                    report.statuses[key] = status
+                next_attempt = self.queue.next_attempt(nodes)
+                if next_attempt is None or next_attempt > deadline:
+                    break
+                wait = next_attempt - time.time()
+                if wait > 0:
+                    logger.info("等待 %.1fs 后重试", wait)
+                    self.sleep(wait)
+                keys = self.queue.due(nodes)
+        finally:
+            self.queue.save()
+        report.succeeded = sorted(key for key, status in report.statuses.items() if status != "failed")
+        report.failed = sorted(key for key, status in report.statuses.items() if status == "failed")
+        report.remaining = len(self.queue)
+        logger.info("%s", report)
+        return report
@@ -0,0 +1,180 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/9/28 10:12
+# @file         : wiki_git_exporter.py
+# @Desc         : 将渲染结果导出为Wiki.js git存储格式的文件, 并批量提交到本地git仓库
+# -----------------------------------------
+
+# import from official
+import json
+import threading
+import subprocess
+from pathlib import Path, PurePosixPath
+from typing import Iterable, List, NamedTuple, Optional
+# import from third-party
+
+# import from self-defined
+from com.logger import get_logger
+from src.wiki_node import DocumentNode
+from src.wiki_tags import normalize_tags
+
+logger = get_logger("git_exporter")
+
+# Wiki.js的编辑器 -> 存储文件后缀
+EDITOR_SUFFIX = {
+    "markdown": ".md",
+    "code": ".html",
+}
+# 导出仓库没有配置提交者时使用的身份
+DEFAULT_IDENTITY = ("Wiki Publisher", "wiki-publisher@localhost")
+
+
+class PageMeta(NamedTuple):
+    """发布一个文档所需的页面信息(GraphQL上传与git导出共用)"""
+    path: str  # Wiki.js页面路径
+    locale: str
+    title: str
+    tags: List[str]
+    editor: str  # markdown / code
+
+    @classmethod
+    def from_document(cls, doc: DocumentNode, locale: str) -> 'PageMeta':
+        """
+        从文档的数据与模板推导页面信息
+            path/tags来自数据文件(标签经过规范化), 标题优先使用卡牌名, html模板使用code编辑器
+        """
+        data = doc.data or {}
+        editor = "code" if doc.template.template_path.suffix == ".html" else "markdown"
+        title = doc.name
+        if data.get("card", {}).get("card_name", None):
+            title = data["card"]["card_name"]
+        return cls(path=data.get("path"), locale=locale, title=title, tags=normalize_tags(data.get("tags")), editor=editor)
+
+
+class WikiGitExporter:
+    """
+    Wiki.js git存储导出器
+
+    每个文档写为 <repo>/<path>.md|.html (开启多语言命名空间且path不以语言开头时为 <repo>/<locale>/<path>), 文件头部为Wiki.js的front matter;
+    只有内容变化的文件会被写入, commit()将这些文件一次性提交, 没有变化时不产生提交
+    """
+
+    def __init__(self, repo_dir: Path, locale_namespace: bool = False, branch: Optional[str] = None):
+        """
+        :param repo_dir: 本地git仓库目录, 不存在时自动初始化
+        :param locale_namespace: 是否按语言分目录(对应Wiki.js的多语言命名空间; 现有资料的path已包含语言前缀, 不会重复添加)
+        :param branch: 提交前切换到该分支(不存在时创建), None表示使用当前分支
+        """
+        self.repo_dir = Path(repo_dir)
+        self.locale_namespace = locale_namespace
+        self.branch = branch
+        self._lock = threading.Lock()
+        self._changed: List[Path] = []
+        self.exported = 0
+        self.skipped = 0  # 没有页面路径(path)而跳过的文档
+
+    def _git(self, *args: str, stdin: Optional[str] = None, check: bool = True) -> str:
+        result = subprocess.run(
+            ["git", *args], cwd=self.repo_dir, input=stdin, capture_output=True, text=True, encoding="utf-8"
+        )
+        if check and result.returncode != 0:
+            raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+        return result.stdout
+
+    def ensure_repo(self) -> None:
+        """初始化仓库并切换到指定分支"""
+        self.repo_dir.mkdir(parents=True, exist_ok=True)
+        if not (self.repo_dir / ".git").exists():
+            self._git("init", "-q")
+            logger.info("已初始化git仓库: %s", self.repo_dir)
+        if not self._git("config", "user.email", check=False).strip():
+            self._git("config", "user.name", DEFAULT_IDENTITY[0])
+            self._git("config", "user.email", DEFAULT_IDENTITY[1])
+        if self.branch:
+            current = self._git("symbolic-ref", "--short", "-q", "HEAD", check=False).strip()
+            if current == self.branch:
+                return
+            exists = self._git("rev-parse", "--verify", "-q", f"refs/heads/{self.branch}", check=False).strip()
+            self._git("checkout", "-q", *([self.branch] if exists else ["-b", self.branch]))
+
+    def target_file(self, meta: PageMeta) -> Path:
+        """页面对应的存储文件"""
+        if not meta.path:
+            raise ValueError(f"{meta.title}: 缺少页面路径(path)")
+        page_path = PurePosixPath(meta.path.strip("/"))
+        if page_path.is_absolute() or ".." in page_path.parts:
+            raise ValueError(f"{meta.title}: 非法的页面路径 {meta.path}")
+        # 已带语言前缀的路径(现有资料的path均为 <locale>/...)不再重复添加
+        if self.locale_namespace and page_path.parts[0] != meta.locale:
+            page_path = PurePosixPath(meta.locale, page_path)
+        return self.repo_dir / (page_path.as_posix() + EDITOR_SUFFIX.get(meta.editor, ".md"))
+
+    @staticmethod
+    def render_file(meta: PageMeta, content: str) -> str:
+        """
+        生成带front matter的文件内容(与Wiki.js git存储写出的格式一致)
+        不包含日期字段, 保证内容不变时文件也不变
+        """
+        header = "\n".join([
+            f"title: {json.dumps(meta.title, ensure_ascii=False)}",
+            "description: ",
+            "published: true",
+            f"tags: {', '.join(meta.tags)}",
+            f"editor: {meta.editor}",
+        ])
+        if meta.editor == "code":
+            return f"<!--\n{header}\n-->\n\n{content}"
+        return f"---\n{header}\n---\n\n{content}"
+
+    def export(self, meta: PageMeta, content: str) -> bool:
+        """
+        写出一个页面, 内容未变化时不写入; 没有页面路径的文档(例如纯文本规则)不导出
+        :return: 文件是否有变化
+        """
+        if not meta.path:
+            with self._lock:
+                self.skipped += 1
+            logger.debug("%s: 没有页面路径, 跳过导出", meta.title)
+            return False
+        target = self.target_file(meta)
+        text = self.render_file(meta, content)
+        data = text.encode("utf-8")
+        with self._lock:
+            self.exported += 1
+            if target.exists() and target.read_bytes() == data:
+                return False
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+            self._changed.append(target)
+        logger.debug("已导出: %s", target)
+        return True
+
+    @property
+    def changed_files(self) -> List[Path]:
+        return list(self._changed)
+
+    def commit(self, message: Optional[str] = None, paths: Optional[Iterable[Path]] = None) -> Optional[str]:
+        """
+        将本次导出中变化的文件作为一次提交
+        :param message: 提交信息, 默认为"Publish N pages"
+        :param paths: 其它导出器(例如子进程中)写出的变化文件, 一并提交
+        :return: 提交的hash, 没有变化时返回None
+        """
+        with self._lock:
+            changed, self._changed = self._changed + list(paths or []), []
+        if not changed:
+            return None
+
+        paths = "\0".join(path.relative_to(self.repo_dir).as_posix() for path in changed)
+        self._git("add", "--pathspec-from-file=-", "--pathspec-file-nul", stdin=paths)
+        # 内容与已提交版本相同(例如上次导出后未提交又被还原)时没有需要提交的改动
+        status = self._git("diff", "--cached", "--name-only")
+        if not status.strip():
+            return None
+        self._git("commit", "-q", "-m", message or f"Publish {len(changed)} pages")
+        commit = self._git("rev-parse", "HEAD").strip()
+        logger.info("已提交 %d 个文件: %s", len(changed), commit)
+        return commit
@@ -16,21 +16,25 @@ from typing import Dict, Any, Optional, List
 
 # import from self-defined
 from com.util import pathUtil
+from com.profiler import profiler
+from com.logger import get_logger
 from src.wiki_node import DirectoryNode, DocumentNode, WikiNode
 from src.wiki_template import Template
 
+logger = get_logger("indexer")
 
 class WikiIndexer:
     """Wiki索引管理器，负责构建整个资料树"""
 
-    def __init__(self, locale: str = "zh", root_index: str = "contents.json"):
+    def __init__(self, locale: str = "zh", root_index: str = "contents.json", data_dir: Optional[Path] = None):
         """初始化索引管理器
         Args:
             locale: 语言
             root_index: 根目录索引文件
+            data_dir: 资料根目录, 默认为项目的data目录
         """
         self.locale = locale
-        self.root_path = pathUtil.getDataDir() / locale
+        self.root_path = (data_dir or pathUtil.getDataDir()) / locale
         self.templates_path = self.root_path / "templates"
         self.root_index_file = self.root_path / root_index
         self.root_node: Optional[DirectoryNode] = None
@@ -39,14 +43,14 @@ class WikiIndexer:
         """设置节点的数据文件和模板"""
         if "template" in node_info and node_info["template"] is not None:
             template_path = self.templates_path / node_info["template"]
-            print(f"{node.name}: 加载自定义模板 {template_path}")
-            node.template = Template(template_path)
+            logger.debug("%s: 加载自定义模板 %s", node.name, template_path)
+            node.template = Template.load(template_path)
             return
         elif node.template is not None:
-            print(f"{node.name}: 已有模板{node.template.template_path}")
+            logger.debug("%s: 已有模板 %s", node.name, node.template.template_path)
             return
         elif node.parent is not None and node.parent.template is not None:
-            print(f"{node.name}: 使用父级模板 {node.parent.template.template_path}")
+            logger.debug("%s: 使用父级模板 %s", node.name, node.parent.template.template_path)
             node.template = node.parent.template
             return
 
@@ -61,17 +65,18 @@ class WikiIndexer:
         if not self.root_index_file.exists():
             raise FileNotFoundError(f"根目录索引文件不存在: {self.root_index_file}")
 
-        # 解析根目录
-        with open(self.root_index_file, 'r', encoding='utf-8') as f:
-            root_data = json.load(f)
+        with profiler.stage("build_index"):
+            # 解析根目录
+            with open(self.root_index_file, 'r', encoding='utf-8') as f:
+                root_data = json.load(f)
 
-        self.root_node = DirectoryNode(
-            name="root",
-            path=self.root_path,
-            index_file=self.root_index_file
-        )
-        # 递归解析子节点
-        self._parse_directory(self.root_node, root_data)
+            self.root_node = DirectoryNode(
+                name="root",
+                path=self.root_path,
+                index_file=self.root_index_file
+            )
+            # 递归解析子节点
+            self._parse_directory(self.root_node, root_data)
 
         return self
 
@@ -98,7 +103,7 @@ class WikiIndexer:
         :param directory_node: 目录节点
         :param dir_data: 目录信息
         """
-        print(f"开始解析: {directory_node.name}")
+        logger.debug("开始解析: %s", directory_node.name)
 
         # 处理当前节点自身数据和模板
         self._set_node_template(directory_node, dir_data)
@@ -0,0 +1,262 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/10/3 14:20
+# @file         : wiki_mirror.py
+# @Desc         : 远程页面元数据的本地SQLite镜像, 按updatedAt增量刷新, 用于判断页面是否存在、是否需要更新
+# -----------------------------------------
+
+# import from official
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, TYPE_CHECKING
+# import from third-party
+
+# import from self-defined
+from com.util import pathUtil
+from com.logger import get_logger
+from src.wiki_tags import normalize_tags, page_tags
+
+if TYPE_CHECKING:
+    from com.graphql import WikiJSGraphQLClient
+
+logger = get_logger("mirror")
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    locale TEXT NOT NULL,
+    title TEXT,
+    hash TEXT,
+    updated_at TEXT,
+    tags TEXT NOT NULL DEFAULT '[]',
+    editor TEXT,
+    content_sha256 TEXT,
+    content_updated_at TEXT,
+    pending INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS pages_locale_path ON pages (locale, path);
+CREATE INDEX IF NOT EXISTS pages_updated_at ON pages (updated_at);
+"""
+# 增量刷新时第一次请求的页面数, 不够覆盖所有新变化的页面时按倍数扩大
+REFRESH_BATCH = 100
+
+
+def content_digest(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class RefreshReport:
+    """一次刷新的统计结果"""
+
+    def __init__(self, full: bool):
+        self.full = full
+        self.requests = 0
+        self.fetched = 0
+        self.upserted = 0
+        self.deleted = 0
+
+    def __str__(self) -> str:
+        mode = "全量" if self.full else "增量"
+        return f"{mode}刷新远程页面镜像: {self.requests} 次请求, 获取 {self.fetched} 个页面, 更新 {self.upserted} 个, 删除 {self.deleted} 个"
+
+
+class RemotePageMirror:
+    """
+    远程页面的本地镜像(SQLite)
+
+    pages表来自listPages(id, path, locale, title, updatedAt, tags), 另外记录
+        - content_sha256/content_updated_at: 已知的页面内容摘要, 以及得到该摘要时页面的updatedAt
+        - pending: 本次运行刚上传, 还不知道上传后的updatedAt; 下次刷新时采用刷新得到的updatedAt
+    updatedAt与content_updated_at相同(或pending)时说明远程内容没有被其他人修改, 可以直接与本地内容的摘要比较
+
+    listPages不能按时间过滤, 增量刷新按UPDATED倒序请求并逐步扩大limit, 直到覆盖上次刷新以来的全部变化;
+    远程删除的页面只在全量刷新时移除
+    """
+
+    def __init__(self, client: 'WikiJSGraphQLClient', db_file: Optional[Path] = None):
+        """
+        :param client: Wiki.js客户端
+        :param db_file: 镜像数据库文件, 默认为 tmp/wiki_mirror.sqlite
+        """
+        self.client = client
+        self.db_file = Path(db_file or pathUtil.getTmpDir() / "wiki_mirror.sqlite")
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # 上传使用多个线程, 共用一个连接并由锁保护
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+        # 镜像只对应一个Wiki.js实例, 地址或结构变化时清空
+        if self._meta("url") != client.base_url or self._meta("schema") != str(SCHEMA_VERSION):
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM pages")
+                self._conn.execute("DELETE FROM meta")
+            self._set_meta(url=client.base_url, schema=str(SCHEMA_VERSION))
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, **values: str) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", values.items())
+
+    @property
+    def watermark(self) -> Optional[str]:
+        """镜像中最新的updatedAt"""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(updated_at) AS value FROM pages").fetchone()
+        return row["value"]
+
+    @property
+    def refreshed(self) -> bool:
+        """是否已做过全量刷新(之后才能用镜像回答页面是否存在)"""
+        return self._meta("full_refreshed_at") is not None
+
+    def _upsert(self, pages: Iterable[Dict]) -> int:
+        rows = [
+            (page["id"], page["path"], page["locale"], page.get("title"), page.get("updatedAt"),
+             json.dumps(page_tags(page), ensure_ascii=False))
+            for page in pages
+        ]
+        with self._lock, self._conn:
+            # 同一locale/path被删除后重建时id会变化, 先删除旧行
+            self._conn.executemany(
+                "DELETE FROM pages WHERE locale = ? AND path = ? AND id != ?",
+                [(row[2], row[1], row[0]) for row in rows],
+            )
+            self._conn.executemany(
+                """
+                INSERT INTO pages (id, path, locale, title, updated_at, tags) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    path = excluded.path,
+                    locale = excluded.locale,
+                    title = excluded.title,
+                    tags = excluded.tags,
+                    content_updated_at = CASE WHEN pending THEN excluded.updated_at ELSE content_updated_at END,
+                    pending = 0,
+                    updated_at = excluded.updated_at
+                """,
+                rows,
+            )
+        return len(rows)
+
+    def refresh(self, full: bool = False) -> RefreshReport:
+        """
+        :param full: 全量刷新, 同时移除远程已删除的页面; 从未全量刷新过时总是全量刷新
+        :return: 刷新结果
+        """
+        full = full or not self.refreshed
+        report = RefreshReport(full)
+        if full:
+            pages = self.client.list_pages(limit=1000000)
+            report.requests += 1
+            if pages is None:
+                raise RuntimeError("获取远程页面列表失败")
+            report.fetched = len(pages)
+            report.upserted = self._upsert(pages)
+            ids = [(page["id"],) for page in pages]
+            with self._lock, self._conn:
+                self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (id INTEGER PRIMARY KEY)")
+                self._conn.execute("DELETE FROM seen")
+                self._conn.executemany("INSERT INTO seen (id) VALUES (?)", ids)
+                report.deleted = self._conn.execute("DELETE FROM pages WHERE id NOT IN (SELECT id FROM seen)").rowcount
+            self._set_meta(full_refreshed_at=str(time.time()))
+        else:
+            watermark = self.watermark or ""
+            limit = REFRESH_BATCH
+            while True:
+                pages = self.client.list_pages(limit=limit, order_by="UPDATED", order_by_direction="DESC")
+                report.requests += 1
+                if pages is None:
+                    raise RuntimeError("获取远程页面列表失败")
+                changed = [page for page in pages if (page.get("updatedAt") or "") >= watermark]
+                # 已经包含了上次刷新之前的页面, 或者已经是全部页面
+                if len(changed) < len(pages) or len(pages) < limit:
+                    break
+                limit *= 4
+            report.fetched = len(pages)
+            report.upserted = self._upsert(changed)
+        logger.info("%s", report)
+        return report
+
+    def get(self, locale: str, path: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM pages WHERE locale = ? AND path = ?", (locale, path)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def pages(self, locale: str) -> Dict[str, Dict]:
+        """某个语言的全部页面: path -> 页面"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM pages WHERE locale = ? ORDER BY path", (locale,)).fetchall()
+        return {row["path"]: self._to_dict(row) for row in rows}
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        page = dict(row)
+        page["tags"] = json.loads(page["tags"])
+        return page
+
+    @staticmethod
+    def content_known(page: Dict) -> bool:
+        """镜像中的内容摘要是否仍对应远程当前的内容"""
+        return bool(page["content_sha256"]) and (page["pending"] or page["content_updated_at"] == page["updated_at"])
+
+    def snapshot(self, locale: str, path: str) -> Optional[Dict]:
+        """
+        内容摘要仍然有效时返回页面信息(id, editor, tags, content_sha256), 可以代替getPageByPath做比较;
+        否则返回None, 需要请求远程页面
+        """
+        page = self.get(locale, path)
+        if page is None or not self.content_known(page):
+            return None
+        return page
+
+    def record_page(self, page: Dict) -> None:
+        """记录通过getPageByPath得到的完整页面"""
+        self._upsert([page])
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pages SET hash = ?, editor = ?, content_sha256 = ?, content_updated_at = ?, pending = 0 WHERE id = ?",
+                (page.get("hash"), page.get("editor"), content_digest(page.get("content") or ""), page.get("updatedAt"), page["id"]),
+            )
+
+    def record_published(self, page_id: int, locale: str, path: str, content: str, editor: str, tags: List[str],
+                         title: Optional[str] = None) -> None:
+        """记录刚上传的页面内容, 上传后的updatedAt在下次刷新时得到"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages WHERE locale = ? AND path = ? AND id != ?", (locale, path, page_id))
+            self._conn.execute(
+                """
+                INSERT INTO pages (id, path, locale, title, tags, editor, content_sha256, pending) VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+                ON CONFLICT (id) DO UPDATE SET
+                    title = COALESCE(excluded.title, title),
+                    tags = excluded.tags,
+                    editor = excluded.editor,
+                    content_sha256 = excluded.content_sha256,
+                    pending = 1
+                """,
+                (page_id, path, locale, title, json.dumps(normalize_tags(tags), ensure_ascii=False), editor, content_digest(content)),
+            )
+
+    def remove(self, page_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages WHERE id = ?", (page_id,))
@@ -10,16 +10,27 @@
 
 # import from official
 import json
-from typing import Dict, List, Optional, Any
+from typing import ClassVar, Dict, List, Optional, Any, TYPE_CHECKING
 from pathlib import Path
 # import from third-party
 
 # import from self-defined
+from com.util import data_relative_path
+from com.profiler import profiler
+from src.text_formater import strip_tokens
+from src.wiki_synchronizer import WikiSynchronizer
+from com.logger import get_logger, log_context
 from src.wiki_template import Template
 from src.wiki_renderer import WikiRenderer
+if TYPE_CHECKING:
+    from src.card_store import CardStore
+
+logger = get_logger("node")
 
 class WikiNode:
     """Wiki节点基类"""
+    # 设置后json数据优先从卡牌存储读取, 不在存储中的仍读取文件; 文件在写入存储后被直接修改过时以文件为准(并重新导入)
+    card_store: ClassVar[Optional["CardStore"]] = None
 
     def __init__(self, name: str, path: Path):
         self.name = name
@@ -30,6 +41,24 @@ class WikiNode:
         self.template_path: Optional[Path] = None  # 公共模板路径
         self.parent: Optional[WikiNode] = None  # 新增父节点引用
 
+    @property
+    def doc_key(self) -> str:
+        """节点的唯一标识(数据文件路径), 用于剖析等按文档汇总的场景"""
+        if self.data_file:
+            return (self.path / self.data_file).as_posix()
+        return self.path.as_posix()
+
+    @property
+    def data_key(self) -> Optional[str]:
+        """
+        数据文件相对data目录的路径(不在data目录下时为完整路径), 没有数据文件时为None
+        用作搜索索引、死信队列、分片等持久化记录的键
+        """
+        if not self.data_file:
+            return None
+        data_path = self.path / self.data_file
+        return data_relative_path(data_path) or data_path.as_posix()
+
     def is_directory(self) -> bool:
         return isinstance(self, DirectoryNode)
 
@@ -42,32 +71,57 @@ class WikiNode:
             return
 
         full_path = self.path / self.data_file
+        if self.card_store is not None and full_path.suffix == '.json':
+            with profiler.stage("load_data", doc=self.doc_key):
+                data = self.card_store.get_file(full_path)
+            if data is not None:
+                logger.debug("从卡牌存储加载: %s", full_path)
+                if full_path.exists():
+                    self._drop_stale_tokens(full_path, data)
+                self.data = data
+                return
+
         if not full_path.exists():
             raise FileNotFoundError(f"数据文件不存在: {full_path}")
 
-        print(f"加载数据文件: {full_path}")
-
-        if full_path.suffix == '.json':
-            with open(full_path, 'r', encoding='utf-8') as f:
-                self.data = json.load(f)
-        elif full_path.suffix == '.md':
-            with open(full_path, 'r', encoding='utf-8') as f:
-                self.data = {'text': f.read()}
+        logger.debug("加载数据文件: %s", full_path)
+
+        with profiler.stage("load_data", doc=self.doc_key):
+            if full_path.suffix == '.json':
+                with open(full_path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+                self._drop_stale_tokens(full_path, self.data)
+            elif full_path.suffix == '.md':
+                with open(full_path, 'r', encoding='utf-8') as f:
+                    self.data = {'text': f.read()}
+
+    @staticmethod
+    def _drop_stale_tokens(full_path: Path, data: Dict[str, Any]) -> None:
+        """
+        卡牌文件在同步后被手动修改过时, 其中的token可能与文本不一致, 移除token改为按文本渲染
+        按同步清单中的大小与修改时间判断, 不需要重新计算文本的摘要
+        """
+        if full_path.parent.parent.name == "card" and not WikiSynchronizer.is_synced(full_path):
+            logger.debug("卡牌文件在同步后被修改, 按文本渲染: %s", full_path)
+            strip_tokens(data)
 
     # 提取公共的渲染方法到父类
     def render(self, pre_renderer: Optional[WikiRenderer] = None) -> str:
         """渲染内容（目录节点和文档节点通用）"""
-        if not self.data and self.data_file:
-            self.load_data()
+        with log_context(doc=self.doc_key), profiler.stage("render", doc=self.doc_key):
+            if not self.data and self.data_file:
+                self.load_data()
 
-        if not self.template:
-            raise ValueError(f"节点 {self.name} 没有设置模板")
+            if not self.template:
+                raise ValueError(f"节点 {self.name} 没有设置模板")
 
-        render_data = self.data or {}
-        if pre_renderer and self.data is not None:
-            render_data = pre_renderer.render(self.data)
+            render_data = self.data or {}
+            if pre_renderer and self.data is not None:
+                with profiler.stage("pre_render"):
+                    render_data = pre_renderer.render(self.data)
 
-        return self.template.render(render_data)
+            with profiler.stage("template", template=self.template.template_path.as_posix()):
+                return self.template.render(render_data)
 
     def set_template(self, template: Template) -> None:
         """设置模板（目录节点和文档节点通用）"""
@@ -10,11 +10,14 @@
 
 # import from official
 import re
+import time
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Type, Union
 from pathlib import Path
 # import from third-party
 # import from self-defined
+from src.text_formater import TOKEN_BREAK, TOKEN_ICON, TOKEN_TEXT, TOKENS_SUFFIX, stored_tokens
 
 
 class WikiRenderer(ABC):
@@ -31,11 +34,27 @@ class WikiRenderer(ABC):
 class WikiPTLRenderer(WikiRenderer):
     """
     在模板渲染前对原始数据进行预渲染处理的类，主要处理HTML转义和图标替换
+
+    字段带有同级的token(key + TOKENS_SUFFIX, 由TextFormatter生成)时直接由token生成HTML,
+    不再对字符串做正则扫描; 文本被手动修改而与token的摘要不一致时仍按文本处理
     """
     IMAGE_STORAGE_PATH = "/icon"
     # 优化正则表达式，只匹配符合命名规范的图标（字母、数字、下划线、连字符）
     ICON_PATTERN = re.compile(r"\$\{([a-zA-Z0-9_-]+)\}")
 
+    def __init__(self, known_icons: Optional[Iterable[str]] = None):
+        """
+        :param known_icons: 已知的图标名, 提供时记录token中引用的未知图标到unknown_icons
+        """
+        self.known_icons: Optional[Set[str]] = set(known_icons) if known_icons is not None else None
+        self.unknown_icons: Set[str] = set()
+        # 上传时多个线程共用一个渲染器
+        self._lock = threading.Lock()
+
+    def _render_icon_tag(self, image_name: str) -> str:
+        image_path = f"{self.IMAGE_STORAGE_PATH}/{image_name}.png"
+        return f'<img src="{image_path}" alt="{image_name}" style="height: 1em; vertical-align: -0.15em;">'
+
     def _render_html_content(self, content: str) -> str:
         """将文本中的换行符转换为HTML的<br>标签"""
         return content.replace("\n", "<br>")
@@ -49,12 +68,28 @@ class WikiPTLRenderer(WikiRenderer):
         """
 
         def replace_icon(match: re.Match) -> str:
-            image_name = match.group(1)
-            image_path = f"{self.IMAGE_STORAGE_PATH}/{image_name}.png"
-            return f'<img src="{image_path}" alt="{image_name}" style="height: 1em; vertical-align: -0.15em;">'
+            return self._render_icon_tag(match.group(1))
 
         return self.ICON_PATTERN.sub(replace_icon, content)
 
+    def _render_tokens(self, tokens: List[List[str]]) -> str:
+        """由行内token直接生成HTML, 结果与_process_string处理原字符串相同"""
+        parts = []
+        for token in tokens:
+            kind = token[0]
+            if kind == TOKEN_TEXT:
+                parts.append(token[1])
+            elif kind == TOKEN_ICON:
+                if self.known_icons is not None and token[1] not in self.known_icons:
+                    with self._lock:
+                        self.unknown_icons.add(token[1])
+                parts.append(self._render_icon_tag(token[1]))
+            elif kind == TOKEN_BREAK:
+                parts.append("<br>")
+            else:
+                raise ValueError(f"未知的token类型: {kind}")
+        return "".join(parts)
+
     def _process_string(self, content: str) -> str:
         """处理字符串类型的内容：先处理HTML，再处理图标"""
         processed = self._render_html_content(content)
@@ -65,13 +100,23 @@ class WikiPTLRenderer(WikiRenderer):
         """
         递归渲染内容
 
-        对于字典：递归处理每个值
+        对于字典：递归处理每个值(有token的字段直接由token生成, token本身保持不变)
         对于列表：递归处理每个元素
         对于字符串：处理HTML和图标
         其他类型：保持不变
         """
         if isinstance(content, Dict):
-            return {key: self._recur_render(value) for key, value in content.items()}
+            rendered = {}
+            for key, value in content.items():
+                if key.endswith(TOKENS_SUFFIX):
+                    rendered[key] = value
+                    continue
+                tokens = stored_tokens(content, key)
+                if tokens is not None:
+                    rendered[key] = self._render_tokens(tokens)
+                else:
+                    rendered[key] = self._recur_render(value)
+            return rendered
         elif isinstance(content, List):
             return [self._recur_render(item) for item in content]
         elif isinstance(content, str):
@@ -92,6 +137,120 @@ class WikiPTLRenderer(WikiRenderer):
 
         return self._recur_render(content)
 
+class RendererChain(WikiRenderer):
+    """
+    将多个预处理步骤融合为一次递归遍历的渲染链
+
+    - 字符串步骤: 依次作用于每个字符串 (str -> str)
+    - 值步骤: 依次作用于每个非容器值 (Any -> Any)，在字符串步骤之后执行
+    - 类型分派表: 为特定类型注册专用处理函数，命中时跳过字符串/值步骤
+    开启profile后，会统计每个步骤的调用次数和耗时(多个线程共用时由锁保护)
+    """
+
+    def __init__(self, profile: bool = False):
+        self.profile = profile
+        self._string_stages: List[Tuple[str, Callable[[str], str]]] = []
+        self._value_stages: List[Tuple[str, Callable[[Any], Any]]] = []
+        self._type_dispatch: Dict[Type, Callable[[Any], Any]] = {}
+        self._counters: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add_string_stage(self, name: str, func: Callable[[str], str]) -> 'RendererChain':
+        """追加字符串处理步骤"""
+        self._string_stages.append((name, func))
+        self._counters.setdefault(name, {"calls": 0, "seconds": 0.0})
+        return self
+
+    def add_value_stage(self, name: str, func: Callable[[Any], Any]) -> 'RendererChain':
+        """追加值处理步骤"""
+        self._value_stages.append((name, func))
+        self._counters.setdefault(name, {"calls": 0, "seconds": 0.0})
+        return self
+
+    def register_type(self, value_type: Type, func: Callable[[Any], Any]) -> 'RendererChain':
+        """为指定类型注册专用处理函数（精确类型匹配）"""
+        self._type_dispatch[value_type] = func
+        self._counters.setdefault(f"type:{value_type.__name__}", {"calls": 0, "seconds": 0.0})
+        return self
+
+    @classmethod
+    def from_ptl(cls, renderer: Optional[WikiPTLRenderer] = None, profile: bool = False) -> 'RendererChain':
+        """由WikiPTLRenderer的处理步骤构建等价的渲染链"""
+        renderer = renderer or WikiPTLRenderer()
+        chain = cls(profile=profile)
+        chain.add_string_stage("html", renderer._render_html_content)
+        chain.add_string_stage("icon", renderer._render_icon_content)
+        return chain
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """返回各步骤的调用次数和累计耗时（秒）"""
+        with self._lock:
+            return {name: dict(counter) for name, counter in self._counters.items()}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for counter in self._counters.values():
+                counter["calls"] = 0
+                counter["seconds"] = 0.0
+
+    def _count(self, name: str, seconds: float) -> None:
+        with self._lock:
+            counter = self._counters[name]
+            counter["calls"] += 1
+            counter["seconds"] += seconds
+
+    def _run_stages(self, stages: List[Tuple[str, Callable[[Any], Any]]], value: Any) -> Any:
+        if not self.profile:
+            for _, func in stages:
+                value = func(value)
+            return value
+
+        for name, func in stages:
+            start = time.perf_counter()
+            value = func(value)
+            self._count(name, time.perf_counter() - start)
+        return value
+
+    def _process_value(self, content: Any) -> Any:
+        handler = self._type_dispatch.get(type(content))
+        if handler is not None:
+            if not self.profile:
+                return handler(content)
+            start = time.perf_counter()
+            result = handler(content)
+            self._count(f"type:{type(content).__name__}", time.perf_counter() - start)
+            return result
+
+        if isinstance(content, str):
+            content = self._run_stages(self._string_stages, content)
+        return self._run_stages(self._value_stages, content)
+
+    def _recur_render(self, content: Union[Dict, List, Any]) -> Union[Dict, List, Any]:
+        if isinstance(content, Dict):
+            # token由专门的渲染器使用, 不参与通用步骤
+            return {
+                key: value if key.endswith(TOKENS_SUFFIX) else self._recur_render(value)
+                for key, value in content.items()
+            }
+        elif isinstance(content, List):
+            return [self._recur_render(item) for item in content]
+        else:
+            return self._process_value(content)
+
+    def render(self, content: Any) -> Any:
+        """
+        渲染入口方法，对内容进行一次遍历并依次执行全部步骤
+
+        :param content: 需要处理的数据，必须是字典类型
+        :return: 处理后的内容
+        :raises TypeError: 如果输入内容不是字典类型
+        """
+        if not isinstance(content, Dict):
+            raise TypeError("Content must be a dictionary.")
+
+        return self._recur_render(content)
+
+
 if __name__ ==  "__main__":
     renderer = WikiPTLRenderer()
     data = {
@@ -107,4 +266,9 @@ if __name__ ==  "__main__":
         ]
     }
     rendered_data = renderer.render(data)
-    print(rendered_data)
\ No newline at end of file
+    print(rendered_data)
+
+    chain = RendererChain.from_ptl(profile=True)
+    chain.add_value_stage("none", lambda value: "无" if value is None else value)
+    assert chain.render(data) == rendered_data
+    print(chain.stats())
\ No newline at end of file
@@ -0,0 +1,269 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/10/5 15:40
+# @file         : wiki_search.py
+# @Desc         : 卡牌文本/标签/图标的倒排索引, 按数据文件增量更新并持久化, 提供 --match 查询表达式选择文档
+# -----------------------------------------
+
+# import from official
+import re
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+# import from third-party
+
+# import from self-defined
+from com.util import pathUtil, write_text_atomic
+from com.logger import get_logger
+from src.wiki_node import WikiNode
+from src.wiki_renderer import WikiPTLRenderer
+from src.wiki_tags import tag_key
+from src.text_formater import TOKENS_SUFFIX, iter_icons
+
+logger = get_logger("search")
+
+INDEX_VERSION = 1
+# 去掉图标占位符与块标记后再切分文本
+MARKUP_PATTERN = re.compile(r"\$\{[a-zA-Z0-9_-]+\}|<[^<>]*>")
+# 中文按字切分(单字与相邻两字), 其它按单词切分
+WORD_PATTERN = re.compile(r"[\u3400-\u9fff]+|[A-Za-z0-9_]+")
+# 查询表达式: 括号、带引号或不带引号的词
+QUERY_TOKEN_PATTERN = re.compile(r'\s*(\(|\)|(?:\w+:)?"[^"]*"|[^\s()]+)')
+FIELDS = ("icon", "tag", "text")
+
+
+def text_terms(text: str) -> Set[str]:
+    """文本的检索词: 中文的单字与两字组合, 其它为小写的单词"""
+    terms = set()
+    for word in WORD_PATTERN.findall(MARKUP_PATTERN.sub(" ", text)):
+        if word.isascii():
+            terms.add(word.lower())
+        else:
+            terms.update(word)
+            terms.update(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def keyword_terms(keyword: str) -> Set[str]:
+    """查询关键词需要全部包含的检索词(中文取两字组合, 单字时取单字)"""
+    terms = set()
+    for word in WORD_PATTERN.findall(keyword):
+        if word.isascii():
+            terms.add(word.lower())
+        elif len(word) == 1:
+            terms.add(word)
+        else:
+            terms.update(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def _iter_texts(content: Any) -> Iterator[str]:
+    """数据中的全部字符串(跳过由原字符串生成的token)"""
+    if isinstance(content, str):
+        yield content
+    elif isinstance(content, dict):
+        for key, value in content.items():
+            if not key.endswith(TOKENS_SUFFIX):
+                yield from _iter_texts(value)
+    elif isinstance(content, (list, tuple)):
+        for item in content:
+            yield from _iter_texts(item)
+
+
+def document_text(data: Optional[Dict]) -> str:
+    """用于核对关键词的文本(去掉标记后拼接, 字段之间以换行分隔)"""
+    return "\n".join(MARKUP_PATTERN.sub("", text) for text in _iter_texts(data or {}))
+
+
+def document_terms(data: Optional[Dict]) -> List[str]:
+    """文档的全部索引词, 形如 icon:tR01 / tag:造物 / text:弃置"""
+    if not data:
+        return []
+    terms = {f"tag:{tag_key(str(tag))}" for tag in data.get("tags") or []}
+    icons = set(iter_icons(data))
+    words = set()
+    for text in _iter_texts(data):
+        if "${" in text:
+            icons.update(WikiPTLRenderer.ICON_PATTERN.findall(text))
+        words.update(text_terms(text))
+    terms.update(f"icon:{icon}" for icon in icons)
+    terms.update(f"text:{word}" for word in words)
+    return sorted(terms)
+
+
+class Query:
+    """
+    查询表达式
+        icon:tR01 AND tag:造物
+        弃置 OR text:"从情报区" NOT tag:低级
+    词之间默认为AND, 支持OR、NOT与括号; 不带字段的词按文本检索
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self._tokens = QUERY_TOKEN_PATTERN.findall(expression)
+        if "".join(self._tokens).replace(" ", "") != re.sub(r"\s", "", expression):
+            raise ValueError(f"invalid query: {expression!r}")
+        self._pos = 0
+        self.tree = self._parse_or()
+        if self._pos != len(self._tokens):
+            raise ValueError(f"unexpected {self._tokens[self._pos]!r} in query: {expression!r}")
+
+    def _peek(self) -> Optional[str]:
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else None
+
+    def _next(self) -> str:
+        token = self._peek()
+        if token is None:
+            raise ValueError(f"unexpected end of query: {self.expression!r}")
+        self._pos += 1
+        return token
+
+    def _parse_or(self) -> Tuple:
+        node = self._parse_and()
+        while self._peek() == "OR":
+            self._next()
+            node = ("or", node, self._parse_and())
+        return node
+
+    def _parse_and(self) -> Tuple:
+        node = self._parse_not()
+        while self._peek() not in (None, ")", "OR"):
+            if self._peek() == "AND":
+                self._next()
+            node = ("and", node, self._parse_not())
+        return node
+
+    def _parse_not(self) -> Tuple:
+        token = self._next()
+        if token == "NOT":
+            return "not", self._parse_not()
+        if token == "(":
+            node = self._parse_or()
+            if self._next() != ")":
+                raise ValueError(f"missing ')' in query: {self.expression!r}")
+            return node
+        if token in (")", "AND", "OR"):
+            raise ValueError(f"unexpected {token!r} in query: {self.expression!r}")
+        field, _, value = token.partition(":") if re.match(r"^\w+:", token) else ("text", "", token)
+        if field not in FIELDS:
+            raise ValueError(f"unknown field {field!r}, expected one of {', '.join(FIELDS)}")
+        value = value.strip('"')
+        if not value:
+            raise ValueError(f"empty {field} in query: {self.expression!r}")
+        return "term", field, value
+
+
+class SearchIndex:
+    """
+    倒排索引: 检索词 -> 文档(相对data目录的数据文件路径)
+
+    按数据文件的大小与修改时间增量更新, 只重新读取变化的文件, 持久化在 tmp/search/<locale>.json;
+    文本检索先用倒排索引筛选候选文档, 再核对文档文本中是否包含完整的关键词
+    """
+
+    def __init__(self, locale: str, index_file: Optional[Path] = None):
+        """
+        :param locale: 语言
+        :param index_file: 索引文件, 默认为 tmp/search/<locale>.json
+        """
+        self.locale = locale
+        self.index_file = Path(index_file or pathUtil.getTmpDir() / "search" / f"{locale}.json")
+        self.docs: Dict[str, Dict] = {}  # 文档 -> {"sig": [size, mtime_ns], "terms": [...]}
+        self.postings: Dict[str, Set[str]] = {}
+        self._nodes: Dict[str, WikiNode] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        if index.get("version") == INDEX_VERSION:
+            self.docs = index["docs"]
+
+    def save(self) -> None:
+        text = json.dumps({"version": INDEX_VERSION, "locale": self.locale, "docs": dict(sorted(self.docs.items()))},
+                          ensure_ascii=False)
+        write_text_atomic(self.index_file, text)
+
+    def update(self, documents: Iterable[WikiNode]) -> int:
+        """
+        按文档更新索引, 移除已不存在的文档, 有变化时保存
+        :return: 重新建立索引的文档数
+        """
+        updated = 0
+        self._nodes = {}
+        for doc in documents:
+            if not doc.data_file:
+                continue
+            key = doc.data_key
+            self._nodes[key] = doc
+            stat = (doc.path / doc.data_file).stat()
+            sig = [stat.st_size, stat.st_mtime_ns]
+            entry = self.docs.get(key)
+            if entry is not None and entry["sig"] == sig:
+                continue
+            if doc.data is None:
+                doc.load_data()
+            self.docs[key] = {"sig": sig, "terms": document_terms(doc.data)}
+            updated += 1
+
+        removed = set(self.docs) - set(self._nodes)
+        for key in removed:
+            del self.docs[key]
+
+        self.postings = {}
+        for key, entry in self.docs.items():
+            for term in entry["terms"]:
+                self.postings.setdefault(term, set()).add(key)
+        if updated or removed:
+            self.save()
+        logger.info("检索索引: %d 个文档, %d 个检索词, 更新 %d 个, 移除 %d 个",
+                    len(self.docs), len(self.postings), updated, len(removed))
+        return updated
+
+    def _candidates(self, field: str, value: str) -> Set[str]:
+        if field == "icon":
+            return self.postings.get(f"icon:{value}", set())
+        if field == "tag":
+            return self.postings.get(f"tag:{tag_key(value)}", set())
+        terms = keyword_terms(value)
+        if not terms:
+            return set()
+        sets = sorted((self.postings.get(f"text:{term}", set()) for term in terms), key=len)
+        return set.intersection(*sets)
+
+    def _text_contains(self, key: str, keyword: str) -> bool:
+        doc = self._nodes.get(key)
+        if doc is None:
+            return True
+        if doc.data is None:
+            doc.load_data()
+        text = document_text(doc.data)
+        return keyword.lower() in text.lower() if keyword.isascii() else keyword in text
+
+    def _evaluate(self, node: Tuple) -> Set[str]:
+        kind = node[0]
+        if kind == "term":
+            _, field, value = node
+            candidates = self._candidates(field, value)
+            if field == "text":
+                candidates = {key for key in candidates if self._text_contains(key, value)}
+            return candidates
+        if kind == "not":
+            return set(self.docs) - self._evaluate(node[1])
+        left, right = self._evaluate(node[1]), self._evaluate(node[2])
+        return left & right if kind == "and" else left | right
+
+    def search(self, query: str) -> Set[str]:
+        """满足查询表达式的文档(相对data目录的数据文件路径)"""
+        return self._evaluate(Query(query).tree)
+
+    def selector(self, query: str) -> Callable[[WikiNode], bool]:
+        matched = self.search(query)
+        return lambda doc: bool(doc.data_file) and doc.data_key in matched
@@ -0,0 +1,219 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/9/30 10:36
+# @file         : wiki_shard.py
+# @Desc         : 按Wiki.js路径的稳定哈希将文档分片, 各分片输出上传清单, 合并时检查遗漏与重叠
+# -----------------------------------------
+
+# import from official
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+# import from third-party
+
+# import from self-defined
+from com.util import pathUtil, write_text_atomic
+from src.wiki_node import WikiNode
+
+MANIFEST_VERSION = 1
+
+
+def shard_key(doc: WikiNode) -> str:
+    """
+    文档的分片键: Wiki.js路径; 没有路径的文档(例如纯文本规则)使用相对data目录的数据文件路径
+    两者在不同机器上都相同
+    """
+    if doc.data is None:
+        doc.load_data()
+    path = (doc.data or {}).get("path")
+    return path or doc.data_key
+
+
+def shard_of(key: str, count: int) -> int:
+    """
+    稳定哈希分片(不使用受PYTHONHASHSEED影响的hash())
+    :return: 分片序号, 1..count
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count + 1
+
+
+class Shard(NamedTuple):
+    """第index个分片(从1开始), 共count个"""
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, text: str) -> 'Shard':
+        """解析形如 "2/4" 的分片参数"""
+        try:
+            index, count = (int(part) for part in text.split("/"))
+        except ValueError:
+            raise ValueError(f"invalid shard {text!r}, expected i/N, e.g. 1/4")
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"invalid shard {text!r}, expected 1 <= i <= N")
+        return cls(index, count)
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def contains(self, doc: WikiNode) -> bool:
+        return shard_of(shard_key(doc), self.count) == self.index
+
+    def selector(self, base: Optional[Callable[[WikiNode], bool]] = None) -> Callable[[WikiNode], bool]:
+        """与已有的过滤器组合, 先应用base以减少需要加载数据的文档"""
+        if base is None:
+            return self.contains
+        return lambda doc: base(doc) and self.contains(doc)
+
+    def default_manifest(self, locale: str) -> Path:
+        return pathUtil.getTmpDir() / "shards" / f"{locale}-shard-{self.index}-of-{self.count}.json"
+
+
+class UploadManifest:
+    """
+    一个分片的上传清单(线程安全)
+    记录每个文档的处理结果与渲染内容摘要, 供合并时检查
+    """
+
+    def __init__(self, locale: str, shard: Optional[Shard] = None):
+        self.locale = locale
+        self.shard = shard
+        self.documents: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, doc: WikiNode, status: str, content: Optional[str] = None, error: Optional[str] = None) -> None:
+        """
+        :param doc: 文档
+        :param status: uploaded / saved / exported / rendered / failed
+        :param content: 渲染结果, 记录其sha256
+        :param error: 失败原因
+        """
+        entry = {"status": status}
+        if content is not None:
+            entry["sha256"] = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        if error is not None:
+            entry["error"] = error
+        key = shard_key(doc)
+        with self._lock:
+            self.documents[key] = entry
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            documents = dict(sorted(self.documents.items()))
+        return {
+            "version": MANIFEST_VERSION,
+            "locale": self.locale,
+            "shard": str(self.shard) if self.shard else None,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "documents": documents,
+        }
+
+    def save(self, path: Path) -> None:
+        """写入临时文件后重命名, 上传中断时不会留下半个清单"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_text_atomic(path, json.dumps(self.to_dict(), indent=2, ensure_ascii=False))
+
+
+class MergeReport:
+    """合并多个分片清单的结果"""
+
+    def __init__(self):
+        self.locale: Optional[str] = None
+        self.count: Optional[int] = None
+        self.manifests = 0
+        self.documents: Dict[str, Dict] = {}
+        self.missing_shards: List[int] = []
+        self.duplicate_shards: List[int] = []
+        self.overlaps: Dict[str, List[str]] = {}  # 文档 -> 出现在的分片
+        self.misassigned: Dict[str, str] = {}  # 文档 -> 所在分片(与哈希结果不一致)
+        self.missing_documents: List[str] = []  # 本地索引中存在但没有任何分片处理的文档
+        self.failed: List[str] = []
+
+    @property
+    def ok(self) -> bool:
+        return not (self.missing_shards or self.duplicate_shards or self.overlaps or self.misassigned
+                    or self.missing_documents or self.failed)
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": MANIFEST_VERSION,
+            "locale": self.locale,
+            "shards": self.count,
+            "ok": self.ok,
+            "missing_shards": self.missing_shards,
+            "duplicate_shards": self.duplicate_shards,
+            "overlaps": self.overlaps,
+            "misassigned": self.misassigned,
+            "missing_documents": self.missing_documents,
+            "failed": self.failed,
+            "documents": dict(sorted(self.documents.items())),
+        }
+
+    def __str__(self) -> str:
+        lines = [f"合并 {self.manifests} 个清单(共 {self.count} 个分片): {len(self.documents)} 个文档"]
+        checks = [
+            ("缺少分片", self.missing_shards),
+            ("重复分片", self.duplicate_shards),
+            ("重叠文档", sorted(self.overlaps)),
+            ("分片不符", sorted(self.misassigned)),
+            ("遗漏文档", self.missing_documents),
+            ("失败文档", self.failed),
+        ]
+        for title, items in checks:
+            if items:
+                preview = ", ".join(str(item) for item in items[:10])
+                lines.append(f"  {title} {len(items)}: {preview}{' ...' if len(items) > 10 else ''}")
+        lines.append("检查通过" if self.ok else "检查未通过")
+        return "\n".join(lines)
+
+
+def merge_manifests(manifests: Iterable[Dict], expected: Optional[Set[str]] = None) -> MergeReport:
+    """
+    合并分片清单
+    :param manifests: 各分片的清单(UploadManifest.to_dict)
+    :param expected: 应当被处理的全部文档(分片键), 提供时检查遗漏
+    :return: 合并结果
+    """
+    report = MergeReport()
+    seen_shards: Dict[int, int] = {}
+    owners: Dict[str, List[str]] = {}
+
+    for manifest in manifests:
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"unsupported manifest version: {manifest.get('version')}")
+        if not manifest.get("shard"):
+            raise ValueError("manifest has no shard")
+        shard = Shard.parse(manifest["shard"])
+        if report.locale is None:
+            report.locale, report.count = manifest["locale"], shard.count
+        elif manifest["locale"] != report.locale:
+            raise ValueError(f"locale mismatch: {manifest['locale']} != {report.locale}")
+        elif shard.count != report.count:
+            raise ValueError(f"shard count mismatch: {shard} != */{report.count}")
+        seen_shards[shard.index] = seen_shards.get(shard.index, 0) + 1
+        report.manifests += 1
+
+        for key, entry in manifest["documents"].items():
+            owners.setdefault(key, []).append(str(shard))
+            if shard_of(key, shard.count) != shard.index:
+                report.misassigned[key] = str(shard)
+            if entry.get("status") == "failed":
+                report.failed.append(key)
+            report.documents[key] = {**entry, "shard": str(shard)}
+
+    if report.count is None:
+        raise ValueError("no manifests to merge")
+    report.missing_shards = [index for index in range(1, report.count + 1) if index not in seen_shards]
+    report.duplicate_shards = sorted(index for index, times in seen_shards.items() if times > 1)
+    report.overlaps = {key: shards for key, shards in owners.items() if len(shards) > 1}
+    report.failed.sort()
+    if expected is not None:
+        report.missing_documents = sorted(expected - set(report.documents))
+    return report
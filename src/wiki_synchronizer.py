@@ -9,27 +9,139 @@
 # -----------------------------------------
 
 # import from official
+import os
 import json
-from typing import Dict, Optional
+import hashlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, TYPE_CHECKING
 from pathlib import Path
 # import from third-party
 
 # import from self-defined
-from com.util import pathUtil
-from src.text_formater import TextFormatter
+from com.util import pathUtil, write_text_atomic, write_text_temp
+from src.deck_reader import DeckReader
+from src.text_formater import TextFormatter, thaw
+if TYPE_CHECKING:
+    from src.card_store import CardStore
+
+SYNC_MANIFEST_FILE = ".sync_manifest.json"
+# 已读取的同步清单: 清单文件 -> (清单文件的修改时间, 卡牌 -> 写入后的(大小, 修改时间))
+_synced_signatures: Dict[Path, Tuple[int, Dict[str, Tuple[int, int]]]] = {}
+
+
+class CardLocation(NamedTuple):
+    """卡牌在登记文件中的位置"""
+    deck_file: str  # 卡组设计文件名
+    position: int  # 在卡组中的序号
+    target: str  # 目标文件(相对card目录), 形如 accessory/card_std01_ac_01.json
+
+
+class SyncReport:
+    """一次同步的统计结果"""
+
+    def __init__(self):
+        self.unchanged: int = 0  # 输入未变化而跳过、或序列化结果相同未写入的卡牌
+        self.updated: int = 0  # 内容变化并重写的卡牌
+        self.created: int = 0  # 新建的卡牌文件
+        self.touched_dirs: Set[str] = set()  # 本次处理过的卡牌目录(相对card目录)
+        self.changed: Dict[str, Dict] = {}  # 内容有变化的卡牌(相对card目录) -> 写入的资料, 需要keep_changed
+
+    @property
+    def total(self) -> int:
+        return self.unchanged + self.updated + self.created
+
+    def count(self, status: str) -> None:
+        setattr(self, status, getattr(self, status) + 1)
+
+    def merge(self, other: 'SyncReport') -> 'SyncReport':
+        self.unchanged += other.unchanged
+        self.updated += other.updated
+        self.created += other.created
+        self.touched_dirs.update(other.touched_dirs)
+        self.changed.update(other.changed)
+        return self
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "unchanged": self.unchanged,
+            "updated": self.updated,
+            "created": self.created,
+        }
+
+    def __str__(self) -> str:
+        return f"同步完成，共 {self.total} 张卡牌，其中 {self.unchanged} 张未变化，{self.updated} 张已更新，{self.created} 张新建"
 
 
 class WikiSynchronizer:
-    def __init__(self, locale: str = "zh", register_file: str = "deck_json_register.json"):
+    # 修改dispose_card_info等影响输出的逻辑时需要提升版本号，使旧的清单失效
+    MANIFEST_VERSION = 5
+
+    def __init__(
+            self,
+            locale: str = "zh",
+            register_file: str = "deck_json_register.json",
+            manifest_file: str = SYNC_MANIFEST_FILE,
+            data_dir: Optional[Path] = None,
+            register_dict: Optional[Dict] = None,
+            card_store: Optional["CardStore"] = None
+    ):
+        """
+        :param locale: 语言
+        :param register_file: 卡组登记文件, 相对src目录(也可以是绝对路径)
+        :param manifest_file: 同步清单文件, 相对 data/<locale>
+        :param data_dir: 资料根目录, 默认为项目的data目录
+        :param register_dict: 已解析的登记信息(多个语言共用同一登记文件时避免重复解析), None时读取register_file
+        :param card_store: 卡牌存储, 提供时有变化的卡牌同时写入存储
+        """
         self.locale = locale
         self.register_file = pathUtil.getSrcDir() / register_file
-        self.data_dir = pathUtil.getDataDir()
-        self.register_dict: Optional[Dict] = None
+        self.data_dir = data_dir or pathUtil.getDataDir()
+        self.manifest_file = self.data_dir / locale / manifest_file
+        self.register_dict: Optional[Dict] = register_dict
+        self.card_store = card_store
+
+        if self.register_dict is None:
+            self.register_dict = self.load_register(self.register_file)
+
+        self.card_index: Dict[str, CardLocation] = self.build_card_index(self.register_dict)
 
-        if not self.register_file.exists():
-            raise FileNotFoundError(f"{self.register_file} not found")
-        with open(self.register_file, 'r', encoding='utf-8') as f:
-            self.register_dict = json.load(f)
+    def __getstate__(self) -> Dict:
+        # 并行同步时卡组在子进程中处理, 卡牌存储(SQLite连接与锁)不能也不需要传给子进程, 由主进程统一写入
+        state = self.__dict__.copy()
+        state["card_store"] = None
+        return state
+
+    @staticmethod
+    def load_register(register_file: Path) -> Dict:
+        if not register_file.exists():
+            raise FileNotFoundError(f"{register_file} not found")
+        with open(register_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def build_card_index(register_dict: Dict) -> Dict[str, CardLocation]:
+        """由登记文件构建 目标文件 -> 卡牌位置 的反向索引"""
+        card_index: Dict[str, CardLocation] = {}
+        for card_json_file, card_infos in register_dict.items():
+            for position, card_info in enumerate(card_infos):
+                target = f"{card_info['dir']}/{card_info['file']}"
+                if target in card_index:
+                    raise ValueError(f"{target} is registered twice: {card_index[target].deck_file}, {card_json_file}")
+                card_index[target] = CardLocation(card_json_file, position, target)
+        return card_index
+
+    def locate_card(self, card: str) -> CardLocation:
+        """
+        查找卡牌位置
+        :param card: 目标文件, 支持 accessory/card_std01_ac_01.json、card_std01_ac_01.json 或 card_std01_ac_01
+        :return:
+        """
+        name = card if card.endswith(".json") else f"{card}.json"
+        if name in self.card_index:
+            return self.card_index[name]
+        matches = [location for target, location in self.card_index.items() if target.rsplit("/", 1)[-1] == name]
+        if len(matches) != 1:
+            raise KeyError(f"{card} is not registered" if not matches else f"{card} is ambiguous")
+        return matches[0]
 
     @staticmethod
     def init_card_json(path: str):
@@ -47,22 +159,134 @@ class WikiSynchronizer:
         }
         return saved_info
 
-    def load_card_info(self, target_path: Path, force_sync: bool) -> Dict:
+    def load_card_info(self, target_path: Path, force_sync: bool, saved_text: Optional[str] = None) -> Dict:
+        """
+        读取已保存的卡牌资料(不存在或强制同步时初始化)
+        :param target_path: 卡牌资料文件
+        :param force_sync: 是否强制同步
+        :param saved_text: 已读取的文件内容, 为None时从target_path读取
+        :return:
+        """
         rel_path = target_path.relative_to(self.data_dir / self.locale)
         info_path = rel_path.as_posix().replace(".json", "")
 
-        if not target_path.exists():
-            target_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(target_path, "w", encoding='utf-8') as f:
-                f.write("{}")
+        if saved_text is None and target_path.exists():
+            with open(target_path, "r", encoding='utf-8') as f:
+                saved_text = f.read()
 
-        with open(target_path, "r+", encoding='utf-8') as f:
-            saved_info = json.load(f)
-            if saved_info is None or saved_info == {} or force_sync:
-                saved_info = self.init_card_json(info_path)
+        saved_info = json.loads(saved_text) if saved_text else None
+        if saved_info is None or saved_info == {} or force_sync:
+            saved_info = self.init_card_json(info_path)
 
         return saved_info
 
+    @staticmethod
+    def dump_card_info(saved_info: Dict) -> str:
+        """卡牌资料的序列化格式(与写入文件的内容一致)"""
+        return json.dumps(saved_info, indent=4, ensure_ascii=False)
+
+    def hash_card_input(self, card_json_file: str, image_idx: int, card_design_info: Dict, force_sync: bool) -> str:
+        """计算决定卡牌输出的全部输入的摘要"""
+        payload = json.dumps(
+            [self.MANIFEST_VERSION, card_json_file, image_idx, force_sync, card_design_info],
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def load_manifest(self) -> Dict[str, Dict]:
+        if not self.manifest_file.exists():
+            return {}
+        with open(self.manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") != self.MANIFEST_VERSION:
+            return {}
+        return manifest.get("cards", {})
+
+    @classmethod
+    def is_synced(cls, data_file: Path) -> bool:
+        """
+        卡牌文件是否仍是同步写出(或确认未变化)时的文件, 按清单中记录的大小与修改时间判断, 不读取文件内容
+        没有清单记录的文件(例如手动修改、从存储导出或在其它机器上同步)返回False
+        :param data_file: 卡牌文件, data/<locale>/card/<dir>/<file>
+        """
+        data_file = Path(data_file)
+        manifest_file = data_file.parents[2] / SYNC_MANIFEST_FILE
+        try:
+            file_stat = data_file.stat()
+            manifest_mtime = manifest_file.stat().st_mtime_ns
+        except (FileNotFoundError, IndexError):
+            return False
+        cached = _synced_signatures.get(manifest_file)
+        if cached is None or cached[0] != manifest_mtime:
+            try:
+                with open(manifest_file, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                return False
+            cards = manifest.get("cards", {}) if manifest.get("version") == cls.MANIFEST_VERSION else {}
+            signatures = {
+                key: (entry["size"], entry["mtime_ns"]) for key, entry in cards.items() if "size" in entry and "mtime_ns" in entry
+            }
+            cached = _synced_signatures[manifest_file] = (manifest_mtime, signatures)
+        key = f"{data_file.parent.name}/{data_file.name}"
+        return cached[1].get(key) == (file_stat.st_size, file_stat.st_mtime_ns)
+
+    def save_manifest(self, cards: Dict[str, Dict]) -> None:
+        manifest = {
+            "version": self.MANIFEST_VERSION,
+            "cards": dict(sorted(cards.items())),
+        }
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=4, ensure_ascii=False)
+
+    @staticmethod
+    def _stat_signature(target_path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = target_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def sync_card(
+            self,
+            card_json_file: str,
+            image_idx: int,
+            card_design_info: Dict,
+            target_path: Path,
+            force_sync: bool,
+            manifest_entry: Optional[Dict]
+    ) -> Tuple[str, Dict, Optional[Dict], Optional[str]]:
+        """
+        同步单张卡牌, 输入未变化且目标文件未被改动时直接跳过
+        文件不在这里写入: 卡组校验通过后由sync_deck统一写入, 并补充清单条目中的大小与修改时间
+        :return: (状态: unchanged/updated/created, 新的清单条目, 处理后的卡牌资料(跳过时为None), 需要写入的内容(不需要时为None))
+        """
+        input_hash = self.hash_card_input(card_json_file, image_idx, card_design_info, force_sync)
+        signature = self._stat_signature(target_path)
+        if (
+                manifest_entry is not None
+                and signature is not None
+                and manifest_entry.get("input") == input_hash
+                and (manifest_entry.get("size"), manifest_entry.get("mtime_ns")) == signature
+        ):
+            return "unchanged", manifest_entry, None, None
+
+        saved_text = None
+        if signature is not None:
+            with open(target_path, "r", encoding='utf-8') as f:
+                saved_text = f.read()
+        saved_info = self.load_card_info(target_path, force_sync, saved_text)
+        self.dispose_card_info(card_json_file, image_idx, card_design_info, saved_info)
+        new_text = self.dump_card_info(saved_info)
+
+        if new_text != saved_text:
+            return "created" if signature is None else "updated", {"input": input_hash}, saved_info, new_text
+
+        size, mtime_ns = signature
+        return "unchanged", {"input": input_hash, "size": size, "mtime_ns": mtime_ns}, saved_info, None
+
     @staticmethod
     def dispose_card_info(card_json_file: str, idx: int, card_design_info: Dict, saved_info: Dict):
         # ---------------------------------------------------------------------------
@@ -107,7 +331,8 @@ class WikiSynchronizer:
 
         # 处理卡牌效果并更新
         undisposed_card_info_effect = card_design_info.get("card_info_effect") or ""
-        disposed_card_info_effect = TextFormatter().parse_from_text(undisposed_card_info_effect).to_dict()
+        # 缓存的解析结果不可修改, 复制后再做事件卡牌等特殊处理
+        disposed_card_info_effect = thaw(TextFormatter.parse_cached(undisposed_card_info_effect))
 
         # 事件卡牌特殊处理
         if card_resource_type == "事件":
@@ -129,74 +354,228 @@ class WikiSynchronizer:
 
         # final update
         saved_info["card"] = card_design_info
-        saved_info["tags"] = list(set(saved_info["tags"]).union(set(card_design_tag)))
+        # 保持已有标签的顺序并按出现顺序追加新标签, 使输出与进程的哈希种子无关
+        saved_info["tags"] = list(dict.fromkeys([*saved_info.get("tags", []), *card_design_tag]))
 
-    def sync(self, design_dir: str = "card_json", force_sync: bool = False):
+    def sync_deck(
+            self,
+            card_json_file: str,
+            design_dir: Path,
+            force_sync: bool,
+            manifest: Dict[str, Dict],
+            positions: Optional[Set[int]] = None,
+            keep_changed: bool = False
+    ) -> Tuple[SyncReport, Dict[str, Dict]]:
         """
-        同步卡牌的设计资料到Wiki资料
+        同步一个卡组文件中的卡牌(卡组之间互不依赖, 可在独立进程中执行)
+        :param card_json_file: 卡组设计文件名
         :param design_dir: 设计文件夹
         :param force_sync: 是否强制同步
-        :return:
+        :param manifest: 该卡组相关的清单条目
+        :param positions: 只同步这些序号的卡牌, None表示全部
+        :param keep_changed: 是否在统计中保留有变化的卡牌资料
+        :return: (同步统计, 更新后的清单条目)
         """
-        locale = self.locale
-        locale_dir = self.data_dir / locale
-        design_dir = locale_dir / design_dir
-        sync_dir = locale_dir / "card"
-
-        for card_json_file, card_infos in self.register_dict.items():
-            card_design_path = design_dir / card_json_file
-            if not card_design_path.exists():
-                raise FileNotFoundError(f"{card_design_path} not found")
-            with open(card_design_path, 'r', encoding='utf-8') as f:
-                card_design_infos = json.load(f)
-            if len(card_design_infos) != len(card_infos):
-                raise ValueError(f"{card_design_path} has {len(card_design_infos)} cards, but {len(card_infos)} cards in register file")
+        card_infos = self.register_dict[card_json_file]
+        sync_dir = self.data_dir / self.locale / "card"
+        report = SyncReport()
+        deck_manifest: Dict[str, Dict] = {}
 
+        # 流式读取卡组, 读取过程中校验卡牌数量(数量不足会在读完最后一张后报错)
+        card_design_infos = DeckReader(design_dir / card_json_file, expected_count=len(card_infos))
+        # 有变化的卡牌边读边写入目标文件旁的临时文件(内存中只保留一张卡牌),
+        # 读完整个卡组并校验数量后才重命名为目标文件, 数量不一致时删除临时文件, 不改动任何卡牌文件
+        pending: List[Tuple[str, Path, Path]] = []  # (清单键, 目标文件, 临时文件)
+        try:
             image_idx = 0
-            for idx in range(len(card_design_infos)):
+            for idx, card_design_info in enumerate(card_design_infos):
                 card_register_info = card_infos[idx]
-                card_design_info = card_design_infos[idx]
+                card_num = card_design_info.get("card_num", 0)
+                if positions is not None and idx not in positions:
+                    image_idx += card_num
+                    continue
+
                 target_dir = card_register_info["dir"]
                 target_filename = card_register_info["file"]
                 target_path = sync_dir / target_dir / target_filename
-
-                # load saved info (or init it)
-                saved_info = self.load_card_info(target_path, force_sync)
+                manifest_key = f"{target_dir}/{target_filename}"
 
                 # --特殊处理-----------------------------------
-                card_num = card_design_info.get("card_num", 0)
-                self.dispose_card_info(card_json_file, image_idx, card_design_info, saved_info)
+                status, deck_manifest[manifest_key], saved_info, new_text = self.sync_card(
+                    card_json_file, image_idx, card_design_info, target_path, force_sync, manifest.get(manifest_key)
+                )
+                if new_text is not None:
+                    pending.append((manifest_key, target_path, write_text_temp(target_path, new_text)))
+                report.count(status)
+                if keep_changed and status != "unchanged":
+                    report.changed[manifest_key] = saved_info
+                report.touched_dirs.add(target_dir)
                 image_idx += card_num
                 # -------------------------------------------
 
-                with open(target_path, 'w', encoding='utf-8') as f:
-                    json.dump(saved_info, f, indent=4, ensure_ascii=False)
-
-        # sync contents.json
-        self.sync_content()
+            for manifest_key, target_path, tmp_path in pending:
+                os.replace(tmp_path, target_path)
+                size, mtime_ns = self._stat_signature(target_path)
+                deck_manifest[manifest_key].update(size=size, mtime_ns=mtime_ns)
+        finally:
+            # 出错(包括数量校验失败)时删除未重命名的临时文件
+            for _, _, tmp_path in pending:
+                tmp_path.unlink(missing_ok=True)
+        return report, deck_manifest
 
-    def sync_content(self):
-        sync_dir = self.data_dir / self.locale / "card"
+    def _select_targets(
+            self,
+            cards: Optional[Iterable[str]],
+            decks: Optional[Iterable[str]]
+    ) -> Dict[str, Optional[Set[int]]]:
+        """
+        计算需要处理的卡组及其中的卡牌序号
+        :return: 卡组文件名 -> 卡牌序号集合(None表示整个卡组)
+        """
+        if cards is None and decks is None:
+            return {card_json_file: None for card_json_file in self.register_dict}
 
-        for each_dir in sync_dir.iterdir():
-            if each_dir.is_file():
+        selected: Dict[str, Optional[Set[int]]] = {}
+        for deck in decks or []:
+            if deck not in self.register_dict:
+                raise KeyError(f"{deck} is not registered")
+            selected[deck] = None
+        for card in cards or []:
+            location = self.locate_card(card)
+            if location.deck_file in selected and selected[location.deck_file] is None:
                 continue
-            content_file_name = each_dir / f"contents.json"
+            selected.setdefault(location.deck_file, set()).add(location.position)
+
+        # 保持登记文件中的顺序
+        return {deck: selected[deck] for deck in self.register_dict if deck in selected}
+
+    def sync(
+            self,
+            design_dir: str = "card_json",
+            force_sync: bool = False,
+            jobs: int = 1,
+            cards: Optional[Iterable[str]] = None,
+            decks: Optional[Iterable[str]] = None,
+            keep_changed: bool = False
+    ) -> SyncReport:
+        """
+        同步卡牌的设计资料到Wiki资料
+
+        根据清单中记录的输入摘要跳过未变化的卡牌, 且只在序列化结果不同时写入文件
+        :param design_dir: 设计文件夹
+        :param force_sync: 是否强制同步
+        :param jobs: 并行处理卡组的进程数, 1表示在当前进程中顺序处理
+        :param cards: 只同步这些卡牌(目标文件名), 与decks均为None时同步全部
+        :param decks: 只同步这些卡组文件
+        :param keep_changed: 是否在统计中保留有变化的卡牌资料(供发布时直接使用, 避免重新读取)
+        :return: 同步统计
+        """
+        design_dir = self.data_dir / self.locale / design_dir
+        manifest = self.load_manifest()
+        report = SyncReport()
+        targets = self._select_targets(cards, decks)
+
+        # 写入存储需要有变化的卡牌资料; 新建的存储先导入已有的JSON文件, 之后只写入变化
+        if self.card_store is not None:
+            if self.card_store.count(self.locale) == 0:
+                self.card_store.import_json(self.locale)
+            keep_changed, return_changed = True, keep_changed
+
+        # 每个卡组只携带自己的清单条目, 减少进程间传输
+        deck_manifests: Dict[str, Dict[str, Dict]] = {}
+        for card_json_file in targets:
+            keys = [f"{info['dir']}/{info['file']}" for info in self.register_dict[card_json_file]]
+            deck_manifests[card_json_file] = {key: manifest[key] for key in keys if key in manifest}
+
+        results: List[Tuple[SyncReport, Dict[str, Dict]]] = []
+        try:
+            if jobs <= 1 or len(targets) <= 1:
+                for card_json_file, positions in targets.items():
+                    results.append(self.sync_deck(
+                        card_json_file, design_dir, force_sync, deck_manifests[card_json_file], positions, keep_changed
+                    ))
+            else:
+                from concurrent.futures import ProcessPoolExecutor, wait
+
+                with ProcessPoolExecutor(max_workers=jobs) as executor:
+                    futures = [
+                        executor.submit(
+                            self.sync_deck,
+                            card_json_file, design_dir, force_sync, deck_manifests[card_json_file], positions, keep_changed
+                        )
+                        for card_json_file, positions in targets.items()
+                    ]
+                    wait(futures)
+                results = [future.result() for future in futures if future.exception() is None]
+                errors = [future.exception() for future in futures if future.exception() is not None]
+                if errors:
+                    raise errors[0]
+        finally:
+            # 某个卡组失败时, 已完成的卡组仍然记入清单与存储, 下次不会重复处理也不会遗漏
+            for deck_report, deck_manifest in results:
+                report.merge(deck_report)
+                manifest.update(deck_manifest)
+
+            self.save_manifest(manifest)
+
+            if self.card_store is not None:
+                card_dir = self.data_dir / self.locale / "card"
+                self.card_store.put_many((self.card_store.key_of(card_dir / key), saved_info) for key, saved_info in report.changed.items())
+                if not return_changed:
+                    report.changed = {}
+
+        # sync contents.json, 定向同步时只刷新涉及的目录
+        self.sync_content(dirs=None if cards is None and decks is None else report.touched_dirs)
+
+        print(report)
+        return report
+
+    def sync_content(self, dirs: Optional[Iterable[str]] = None) -> List[Path]:
+        """
+        重新生成卡牌目录的contents.json, 内容未变化时不写入
+        :param dirs: 只处理这些目录(相对card目录), None表示全部
+        :return: 实际写入的contents.json
+        """
+        return self.write_contents(self.data_dir / self.locale / "card", dirs)
+
+    @classmethod
+    def write_contents(cls, sync_dir: Path, dirs: Optional[Iterable[str]] = None) -> List[Path]:
+        """
+        按目录中的卡牌文件生成contents.json(卡牌存储导出时也使用)
+        :param sync_dir: 卡牌目录 data/<locale>/card
+        :param dirs: 只处理这些目录(相对card目录), None表示全部
+        :return: 实际写入的contents.json
+        """
+        if dirs is None:
+            with os.scandir(sync_dir) as it:
+                dir_paths = [Path(entry.path) for entry in it if entry.is_dir()]
+        else:
+            dir_paths = [sync_dir / each_dir for each_dir in dirs]
+
+        written = []
+        for each_dir in sorted(dir_paths):
+            content_file_name = each_dir / "contents.json"
+            with os.scandir(each_dir) as it:
+                # DirEntry.is_file()在大多数平台上直接使用目录项中的类型信息, 不需要额外的stat调用
+                card_files = sorted(
+                    entry.name for entry in it
+                    if entry.name.endswith(".json") and entry.name != "contents.json" and entry.is_file()
+                )
             content = {"children": {}}
-            for each_file in each_dir.iterdir():
-                if not each_file.is_file():
-                    continue
-                if each_file.name == "contents.json":
-                    continue
-                if each_file.suffix != ".json":
-                    continue
-                content["children"][each_file.stem] = {
-                    "data": each_file.name
+            for each_file in card_files:
+                content["children"][Path(each_file).stem] = {
+                    "data": each_file
                 }
 
-            with open(content_file_name, 'w', encoding='utf-8') as f:
-                json.dump(content, f, indent=4, ensure_ascii=False)
+            new_text = json.dumps(content, indent=4, ensure_ascii=False)
+            if content_file_name.exists():
+                with open(content_file_name, 'r', encoding='utf-8') as f:
+                    if f.read() == new_text:
+                        continue
+            write_text_atomic(content_file_name, new_text)
+            written.append(content_file_name)
 
+        return written
 
 
 if __name__ == '__main__':
@@ -0,0 +1,145 @@
+# ----------------------------------------
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author       :
+# @email        :
+# @time         : 2025/10/2 10:05
+# @file         : wiki_tags.py
+# @Desc         : 标签规范化与远程标签目录缓存, 用于判断页面标签是否需要更新, 并将标签对齐到远程已有的写法
+# -----------------------------------------
+
+# import from official
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+# import from third-party
+
+# import from self-defined
+from com.util import pathUtil
+from com.logger import get_logger
+
+if TYPE_CHECKING:
+    from com.graphql import WikiJSGraphQLClient
+
+logger = get_logger("tags")
+
+
+def tag_key(tag: str) -> str:
+    """比较标签时使用的键: 忽略首尾空白与大小写"""
+    return tag.strip().casefold()
+
+
+def normalize_tags(tags: Optional[Iterable]) -> List[str]:
+    """
+    规范化标签列表: 去除首尾空白与空标签, 忽略大小写去重(保留第一次出现的写法), 按比较键排序
+    结果与输入顺序无关, 相同的标签集合总是得到相同的列表
+    """
+    unique: Dict[str, str] = {}
+    for tag in tags or []:
+        if tag is None:
+            continue
+        tag = str(tag).strip()
+        if tag:
+            unique.setdefault(tag_key(tag), tag)
+    return [unique[key] for key in sorted(unique)]
+
+
+def same_tags(a: Optional[Iterable], b: Optional[Iterable]) -> bool:
+    return [tag_key(tag) for tag in normalize_tags(a)] == [tag_key(tag) for tag in normalize_tags(b)]
+
+
+def page_tags(page: Dict) -> List[str]:
+    """getPageByPath返回的tags为对象列表, listPages返回的为字符串列表"""
+    return normalize_tags(tag["tag"] if isinstance(tag, dict) else tag for tag in page.get("tags") or [])
+
+
+class TagCatalogue:
+    """
+    远程标签目录(get_tags)的缓存
+
+    上传前通过reconcile()将标签对齐到远程已有的写法(例如本地的 "Creature" 对应远程已有的 "creature"),
+    避免同一标签因大小写或空白不同而在Wiki.js中出现多个写法;
+    在ttl秒内只查询一次, 并写入缓存文件供之后的运行使用; 上传引入的新标签通过add()加入目录, 不需要重新查询
+    """
+
+    def __init__(self, client: 'WikiJSGraphQLClient', ttl: float = 300, cache_file: Optional[Path] = None):
+        """
+        :param client: Wiki.js客户端
+        :param ttl: 缓存有效期(秒), 0表示每次都重新查询
+        :param cache_file: 缓存文件, 默认为 tmp/tag_catalogue.json
+        """
+        self.client = client
+        self.ttl = ttl
+        self.cache_file = Path(cache_file or pathUtil.getTmpDir() / "tag_catalogue.json")
+        self._lock = threading.Lock()
+        self._tags: Optional[Dict[str, str]] = None  # 比较键 -> 远程的写法
+        self._fetched_at = 0.0
+
+    def _expired(self, fetched_at: float) -> bool:
+        return time.time() - fetched_at >= self.ttl
+
+    def _load_cache(self) -> bool:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if cache.get("url") != self.client.base_url or self._expired(cache.get("fetched_at", 0)):
+            return False
+        self._tags = {tag_key(tag): tag for tag in cache["tags"]}
+        self._fetched_at = cache["fetched_at"]
+        return True
+
+    def _save_cache(self) -> None:
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump({"url": self.client.base_url, "fetched_at": self._fetched_at,
+                       "tags": sorted(self._tags.values())}, f, indent=2, ensure_ascii=False)
+
+    def refresh(self) -> None:
+        tags = self.client.get_tags()
+        if tags is None:
+            raise RuntimeError("获取远程标签失败")
+        self._tags = {tag_key(tag["tag"]): tag["tag"] for tag in tags}
+        self._fetched_at = time.time()
+        self._save_cache()
+        logger.info("已获取远程标签目录: %d 个标签", len(self._tags))
+
+    def tags(self) -> Dict[str, str]:
+        """远程已有的标签(比较键 -> 远程的写法), 过期时重新查询"""
+        with self._lock:
+            if self._tags is None or self._expired(self._fetched_at):
+                if not self._load_cache():
+                    self.refresh()
+            return dict(self._tags)
+
+    def reconcile(self, tags: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        将标签对齐到远程已有的写法(忽略大小写与首尾空白)
+        :return: (对齐后的标签, 远程目录中还不存在的标签)
+        """
+        known = self.tags()
+        reconciled, new = [], []
+        for tag in normalize_tags(tags):
+            remote = known.get(tag_key(tag))
+            if remote is None:
+                new.append(tag)
+            reconciled.append(remote or tag)
+        return reconciled, new
+
+    def add(self, tags: Iterable[str]) -> None:
+        """记录上传后已存在于远程的标签"""
+        with self._lock:
+            if self._tags is None:
+                return
+            added = {tag_key(tag): tag for tag in normalize_tags(tags) if tag_key(tag) not in self._tags}
+            if added:
+                self._tags.update(added)
+                self._save_cache()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._tags = None
+            self._fetched_at = 0.0
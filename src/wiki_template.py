@@ -9,10 +9,12 @@
 # -----------------------------------------
 
 # import from official
-from typing import Dict, Any
+import threading
+from typing import TYPE_CHECKING, ClassVar, Dict, Any, Optional, Tuple
 from pathlib import Path
 # import from third-party
-from jinja2 import Environment, FileSystemLoader, Template as JinjaTemplate
+if TYPE_CHECKING:
+    from jinja2 import Environment, Template as JinjaTemplate
 
 
 # import from self-defined
@@ -21,6 +23,33 @@ from jinja2 import Environment, FileSystemLoader, Template as JinjaTemplate
 class Template:
     """基于Jinja2的模板文件处理类"""
 
+    # 已加载的模板, (路径, 修改时间) -> 模板, 多个节点使用同一模板文件时共用编译结果
+    _cache: ClassVar[Dict[Tuple[Path, int], "Template"]] = {}
+    _cache_lock: ClassVar[threading.Lock] = threading.Lock()
+    # Jinja2字节码缓存目录, 设置后多个进程/多次运行共用编译结果
+    bytecode_cache_dir: ClassVar[Optional[Path]] = None
+
+    @classmethod
+    def load(cls, template_path: Path) -> "Template":
+        """
+        获取模板, 同一文件(且未修改)只创建一次
+        注意共用的模板上add_filter/add_global对所有使用者生效
+        """
+        resolved = template_path.resolve()
+        if not resolved.exists():
+            raise FileNotFoundError(f"模板文件不存在: {template_path}")
+        key = (resolved, resolved.stat().st_mtime_ns)
+        with cls._cache_lock:
+            template = cls._cache.get(key)
+            if template is None:
+                template = cls._cache[key] = cls(template_path)
+            return template
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        with cls._cache_lock:
+            cls._cache.clear()
+
     def __init__(self, template_path: Path):
         """初始化模板
 
@@ -28,28 +57,51 @@ class Template:
             template_path: 模板文件路径
         """
         self.template_path = template_path
-        self._jinja_env = self._init_jinja_env()
-        self._template = self._load_template()
-
-    def _init_jinja_env(self) -> Environment:
+        if not self.template_path.exists():
+            raise FileNotFoundError(f"模板文件不存在: {self.template_path}")
+        # Jinja2环境与模板在第一次使用时才创建, 构建索引时不导入jinja2也不解析模板
+        self._jinja_env_cache: Optional["Environment"] = None
+        self._template_cache: Optional["JinjaTemplate"] = None
+
+    @property
+    def _jinja_env(self) -> "Environment":
+        if self._jinja_env_cache is None:
+            self._jinja_env_cache = self._init_jinja_env()
+        return self._jinja_env_cache
+
+    @property
+    def _template(self) -> "JinjaTemplate":
+        if self._template_cache is None:
+            self._template_cache = self._load_template()
+        return self._template_cache
+
+    def _init_jinja_env(self) -> "Environment":
         """初始化Jinja2环境
 
         Returns:
             配置好的Jinja2环境
         """
+        from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+
         # 获取模板所在目录
         template_dir = self.template_path.parent
 
+        bytecode_cache = None
+        if self.bytecode_cache_dir is not None:
+            self.bytecode_cache_dir.mkdir(parents=True, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(str(self.bytecode_cache_dir))
+
         # 初始化Jinja2环境，配置模板加载器
         return Environment(
             loader=FileSystemLoader(template_dir),
+            bytecode_cache=bytecode_cache,
             trim_blocks=True,  # 去除块标签周围的空行
             lstrip_blocks=True,  # 去除块标签起始处的空格
             keep_trailing_newline=True,  # 保留末尾换行符
             autoescape=False  # Markdown不需要HTML转义
         )
 
-    def _load_template(self) -> JinjaTemplate:
+    def _load_template(self) -> "JinjaTemplate":
         """加载模板文件
 
         Returns:
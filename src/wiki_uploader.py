@@ -10,38 +10,113 @@
 
 # import from official
 import os
-from typing import Callable, Optional, Dict
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Callable, Optional, Dict, List, Tuple
 from pathlib import Path
-from dotenv import load_dotenv
 # import from third-party
 # import from self-defined
 from com.util import pathUtil
+from com.profiler import profiler
+from com.metrics import DOCUMENTS, RETRIES
+from com.logger import get_logger, log_context
+from com.stage_timer import StageTimer
 from com.graphql import WikiJSGraphQLClient
 from src.wiki_node import DocumentNode
 from src.wiki_indexer import WikiIndexer
 from src.wiki_renderer import WikiRenderer, WikiPTLRenderer
+from src.wiki_git_exporter import PageMeta, WikiGitExporter
+from src.wiki_shard import UploadManifest
+from src.wiki_tags import TagCatalogue, page_tags, same_tags
+from src.wiki_mirror import content_digest
+from src.wiki_dead_letter import DeadLetterQueue, RetryScheduler, UploadError
+if TYPE_CHECKING:
+    from src.wiki_synchronizer import WikiSynchronizer, SyncReport
+    from src.wiki_mirror import RemotePageMirror
 
+logger = get_logger("uploader")
+
+
+def stage_of(timer: Optional[StageTimer]):
+    """timer为None时返回不计时的stage"""
+    return timer.stage if timer else lambda name, items=0: nullcontext()
 
 
 class WikiUploader:
-    def __init__(self, locale: str = "zh", renderer: Optional[WikiRenderer] = None):
+    def __init__(self, locale: str = "zh", renderer: Optional[WikiRenderer] = None, mirror: Optional["RemotePageMirror"] = None):
         """
         :param locale:
         :param renderer:
+        :param mirror: 远程页面镜像, 提供时内容摘要仍然有效的页面不再逐个请求getPageByPath
         :return:
         """
         self.locale = locale
         self.renderer = renderer
+        self.mirror = mirror
+
+        # 索引与客户端在第一次使用时才构建, 只渲染或只查看帮助时不需要它们;
+        # upload --jobs N 时多个线程可能同时第一次使用, 由锁保证只构建一次
+        self._lazy_lock = threading.RLock()
+        self._wiki_indexer: Optional[WikiIndexer] = None
+        self._wiki_client: Optional[WikiJSGraphQLClient] = None
+        self._tag_catalogue: Optional[TagCatalogue] = None
+        self._dead_letters: Optional[DeadLetterQueue] = None
+
+    @property
+    def wiki_indexer(self) -> WikiIndexer:
+        if self._wiki_indexer is None:
+            with self._lazy_lock:
+                if self._wiki_indexer is None:
+                    self._wiki_indexer = WikiIndexer(self.locale).build_index()
+        return self._wiki_indexer
+
+    @wiki_indexer.setter
+    def wiki_indexer(self, indexer: WikiIndexer) -> None:
+        self._wiki_indexer = indexer
+
+    @property
+    def wiki_client(self) -> WikiJSGraphQLClient:
+        if self._wiki_client is None:
+            with self._lazy_lock:
+                if self._wiki_client is None:
+                    from dotenv import load_dotenv
 
-        # 读取环境变量
-        load_dotenv(pathUtil.getEnvFile())
-        wiki_url = os.getenv("WIKI_URL")
-        wiki_api_token = os.getenv("WIKI_API_TOKEN")
+                    # 读取环境变量
+                    load_dotenv(pathUtil.getEnvFile())
+                    wiki_url = os.getenv("WIKI_URL")
+                    wiki_api_token = os.getenv("WIKI_API_TOKEN")
+                    self._wiki_client = WikiJSGraphQLClient(wiki_url, wiki_api_token)
+        return self._wiki_client
 
-        self.wiki_indexer = WikiIndexer(locale).build_index()
-        self.wiki_client = WikiJSGraphQLClient(wiki_url, wiki_api_token)
+    @wiki_client.setter
+    def wiki_client(self, client: WikiJSGraphQLClient) -> None:
+        self._wiki_client = client
+        self._tag_catalogue = None
 
-    def _save(self, doc: DocumentNode, content: str) -> None:
+    @property
+    def tag_catalogue(self) -> TagCatalogue:
+        if self._tag_catalogue is None:
+            with self._lazy_lock:
+                if self._tag_catalogue is None:
+                    self._tag_catalogue = TagCatalogue(self.wiki_client)
+        return self._tag_catalogue
+
+    @property
+    def dead_letters(self) -> DeadLetterQueue:
+        """上传失败的文档, 持久化在 tmp/dead_letter/<locale>.json"""
+        if self._dead_letters is None:
+            with self._lazy_lock:
+                if self._dead_letters is None:
+                    self._dead_letters = DeadLetterQueue(self.locale)
+        return self._dead_letters
+
+    @dead_letters.setter
+    def dead_letters(self, queue: DeadLetterQueue) -> None:
+        self._dead_letters = queue
+
+    @staticmethod
+    def _save(doc: DocumentNode, content: str) -> None:
         """
         保存文档到本地
         :param doc:
@@ -58,33 +133,38 @@ class WikiUploader:
         with open(target_file, 'w', encoding='utf-8') as f:
             f.write(content)
 
-        print(f"已保存文件: {target_file}")
+        logger.debug("已保存文件: %s", target_file)
 
-    def _upload(self, doc: DocumentNode, content: str) -> None:
+    def _upload(self, doc: DocumentNode, content: str) -> str:
         """
         上传文档到Wiki.js
+        内容与标签都未变化的页面不更新
         :param doc:
         :param content:
-        :return:
+        :return: created / updated / retagged / unchanged
+        :raises UploadError: 请求失败或Wiki.js返回失败, 带有错误码与错误信息
         """
         name = doc.name
-        data = doc.data
-        path = doc.path.as_posix()
-        template_suffix = doc.template.template_path.suffix
+        meta = PageMeta.from_document(doc, self.locale)
 
+        wikijs_path = meta.path
+        wikijs_tags = meta.tags
+        wikijs_editor = meta.editor
+        wikijs_title = meta.title
 
-        wikijs_path = data.get("path")
-        wikijs_tags = data.get("tags")
-        wikijs_editor = "markdown"
-        if template_suffix == ".html":
-            wikijs_editor = "code"
-        wikijs_title = name
-        if data.get("card", {}).get("card_name", None):
-            wikijs_title = data["card"]["card_name"]
-
-        g_resp = self.wiki_client.get_page_by_path(locale=self.locale, path=wikijs_path)
+        g_resp = self.mirror.snapshot(self.locale, wikijs_path) if self.mirror is not None else None
+        if g_resp is None:
+            g_resp = self.wiki_client.get_page_by_path(locale=self.locale, path=wikijs_path)
+            # 页面不存在时返回GraphQL错误, 请求本身失败时不能当作页面不存在而重新创建
+            if g_resp is None and (self.wiki_client.last_error or {}).get("status") == "http_error":
+                raise UploadError.from_response("getPageByPath", name, self.wiki_client, None)
+            if g_resp is not None and self.mirror is not None:
+                self.mirror.record_page(g_resp)
+        created = g_resp is None
         retry_num = 0
         while g_resp is None and retry_num <= 3:
+            if retry_num > 0:
+                RETRIES.inc(operation="createPage")
             c_resp = self.wiki_client.create_page(
                 title=wikijs_title,
                 locale=self.locale,
@@ -93,69 +173,261 @@ class WikiUploader:
                 editor=wikijs_editor,
                 tags=[],
             )
-            if c_resp is None:
-                raise Exception(f"Failed to create page: {name}")
-            c_resp_result = c_resp.get("responseResult")
-            if isinstance(c_resp_result, Dict):
-                if not c_resp_result.get("succeeded", False):
-                    c_resp_result_error_code = c_resp_result.get('errorCode')
-                    c_resp_result_error_message = c_resp_result.get('message')
-                    raise Exception(f"Failed to create page: {name}, code: {c_resp_result_error_code}, message: {c_resp_result_error_message}")
-
-            print(f"已创建页面: {name}")
+            error = UploadError.from_response("createPage", name, self.wiki_client, c_resp)
+            if error is not None:
+                raise error
+
+            logger.debug("已创建页面: %s", name)
             g_resp = self.wiki_client.get_page_by_path(locale=self.locale, path=wikijs_path)
             retry_num += 1
+        if g_resp is None:
+            raise UploadError.from_response("getPageByPath", name, self.wiki_client, None)
 
+        # 来自镜像的页面只有内容摘要
+        remote_digest = g_resp.get("content_sha256") or content_digest(g_resp.get("content") or "")
+        content_changed = created or remote_digest != content_digest(content) or g_resp.get("editor") != wikijs_editor
+        tags_changed = created or not same_tags(page_tags(g_resp), wikijs_tags)
+        if not content_changed and not tags_changed:
+            logger.debug("内容与标签未变化: %s", name)
+            return "unchanged"
+
+        if tags_changed:
+            # 远程已有的标签使用远程的写法, 不因大小写不同而产生重复的标签
+            wikijs_tags, new_tags = self.tag_catalogue.reconcile(wikijs_tags)
+            if new_tags:
+                logger.info("%s: 新标签 %s", name, ", ".join(new_tags))
+        else:
+            # 标签未变化(只有写法不同)时保持页面现有的写法
+            wikijs_tags = page_tags(g_resp)
+
+        # 只有标签变化时也发送(未变化的)内容与编辑器: Wiki.js不接受空内容, 未指定的发布状态会被当作未发布
         u_resp = self.wiki_client.update_page(
             page_id=g_resp.get("id"),
             content=content,
             editor=wikijs_editor,
             tags=wikijs_tags,
         )
-        if u_resp is None:
-            raise Exception(f"Failed to update page: {name}")
+        error = UploadError.from_response("updatePage", name, self.wiki_client, u_resp)
+        if error is not None:
+            raise error
 
+        if tags_changed:
+            self.tag_catalogue.add(wikijs_tags)
+        if self.mirror is not None:
+            self.mirror.record_published(g_resp.get("id"), self.locale, wikijs_path, content, wikijs_editor, wikijs_tags, wikijs_title)
+        if created:
+            return "created"
+        return "updated" if content_changed else "retagged"
 
     def upload(
             self,
             is_save: bool = True,
             is_upload: bool = True,
-            filter_func: Callable[[DocumentNode], bool] = lambda x: False
+            filter_func: Callable[[DocumentNode], bool] = lambda x: False,
+            documents: Optional[List[DocumentNode]] = None,
+            jobs: int = 1,
+            timer: Optional[StageTimer] = None,
+            exporter: Optional[WikiGitExporter] = None,
+            commit_message: Optional[str] = None,
+            commit: bool = True,
+            manifest: Optional[UploadManifest] = None,
+            retry_wait: Optional[float] = None
     ):
         """
         上传满足条件的文档
         :param is_save: 是否缓存在本地
         :param is_upload: 是否上传到Wiki.js
         :param filter_func: 上传过滤器, 默认不满足任何条件
+        :param documents: 待处理的文档, 默认为索引中的全部文档
+        :param jobs: 并行处理文档的线程数(上传主要耗时在网络请求上)
+        :param timer: 分阶段计时器, 记录render/save/upload的耗时
+        :param exporter: git存储导出器, 文档写入本地仓库并在最后一次性提交(可与is_upload同时使用)
+        :param commit_message: 导出提交的提交信息
+        :param commit: 是否在最后提交导出的文件, False时由调用者通过exporter.commit提交
+        :param manifest: 上传清单, 记录每个文档的处理结果(分片发布时使用)
+        :param retry_wait: 上传失败的文档记入死信队列, 结束前最多等待retry_wait秒按退避时间重试; None时不重试
         :return:
         """
 
-        documents = self.wiki_indexer.get_all_documents()
+        if documents is None:
+            documents = self.wiki_indexer.get_all_documents()
         count_total = len(documents)
-        count_process = 0
-        count_upload = 0
-        count_save = 0
 
-        for doc in documents:
-            # apply filter
-            if not filter_func(doc):
-                continue
-            # 渲染文档内容
-            content = doc.render(pre_renderer=self.renderer)
-            count_process += 1
+        selected = [doc for doc in documents if filter_func(doc)]
+        DOCUMENTS.inc(count_total - len(selected), action="skipped")
+        if exporter is not None:
+            exporter.ensure_repo()
+        process = lambda doc: self._process(doc, is_save, is_upload, timer, exporter, manifest)
+        try:
+            if jobs <= 1:
+                results = [process(doc) for doc in selected]
+            else:
+                with ThreadPoolExecutor(max_workers=jobs) as executor:
+                    results = list(executor.map(process, selected))
 
-            if is_save:
-                self._save(doc, content)
-                count_save += 1
+            failed = [doc for doc, (_, status) in zip(selected, results) if status == "failed"]
+            if failed and retry_wait is not None:
+                scheduler = RetryScheduler(self, self.dead_letters, max_wait=retry_wait)
+                with stage_of(timer)("retry", len(failed)):
+                    retry_report = scheduler.run(failed, is_save=False, timer=timer, manifest=manifest)
+                results = [(saved, retry_report.statuses.get(doc.data_key, status)) if status == "failed"
+                           else (saved, status) for doc, (saved, status) in zip(selected, results)]
+        finally:
+            if self._dead_letters is not None:
+                self._dead_letters.save()
 
-            if is_upload:
-                self._upload(doc, content)
-                count_upload += 1
-                print(f"已上传文件: {doc.name}")
+        count_process = len(results)
+        count_save = sum(saved for saved, _ in results)
+        count_upload = sum(status in ("created", "updated", "retagged") for _, status in results)
+        count_retag = sum(status == "retagged" for _, status in results)
+        count_unchanged = sum(status == "unchanged" for _, status in results)
+        count_failed = sum(status == "failed" for _, status in results)
 
         print(f"处理完成，共处理 {count_total} 中的 {count_process} 条文档，其中 {count_upload} 条成功上传，{count_save} 条保存至本地")
+        if count_retag or count_unchanged:
+            print(f"上传的文档中 {count_retag} 条只更新了标签，{count_unchanged} 条内容与标签未变化而跳过")
+        if count_failed:
+            print(f"{count_failed} 条文档上传失败，已记入死信队列 {self.dead_letters.queue_file}，"
+                  f"可使用 retry 命令重试")
+
+        if exporter is not None and commit:
+            count_changed = len(exporter.changed_files)
+            with stage_of(timer)("commit", count_changed):
+                commit_hash = exporter.commit(commit_message)
+            count_export = exporter.exported
+            if commit_hash:
+                print(f"已导出 {count_export} 条文档，其中 {count_changed} 个文件有变化，提交 {commit_hash[:12]}")
+            else:
+                print(f"已导出 {count_export} 条文档，没有变化")
+            if exporter.skipped:
+                print(f"{exporter.skipped} 条文档没有页面路径，未导出")
         return count_process
 
+    def _process(
+            self,
+            doc: DocumentNode,
+            is_save: bool,
+            is_upload: bool,
+            timer: Optional[StageTimer] = None,
+            exporter: Optional[WikiGitExporter] = None,
+            manifest: Optional[UploadManifest] = None
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        渲染并保存/上传/导出单个文档
+        上传失败时不抛出异常, 记入死信队列并返回上传结果failed, 不影响其它文档; 渲染/保存/导出失败时仍然抛出
+        :return: (是否已保存, 上传结果), 未上传时上传结果为None
+        """
+        stage = stage_of(timer)
+        upload_status = None
+        upload_error = None
+
+        with log_context(doc=doc.doc_key):
+            try:
+                # 渲染文档内容
+                with stage("render", 1):
+                    content = doc.render(pre_renderer=self.renderer)
+                DOCUMENTS.inc(action="rendered")
+
+                if is_save:
+                    with stage("save", 1), profiler.stage("save", doc=doc.doc_key):
+                        self._save(doc, content)
+                    DOCUMENTS.inc(action="saved")
+
+                if is_upload:
+                    try:
+                        with stage("upload", 1), profiler.stage("upload", doc=doc.doc_key):
+                            upload_status = self._upload(doc, content)
+                    except Exception as e:
+                        upload_status, upload_error = "failed", e
+                        entry = self.dead_letters.record(doc, e)
+                        logger.warning("上传失败(第 %d 次), 已记入死信队列: %s", entry["attempts"], e)
+                        DOCUMENTS.inc(action="failed")
+                    else:
+                        self.dead_letters.resolve(doc)
+                        if upload_status == "unchanged":
+                            DOCUMENTS.inc(action="unchanged")
+                        else:
+                            DOCUMENTS.inc(action="uploaded")
+                            if upload_status == "retagged":
+                                DOCUMENTS.inc(action="retagged")
+                            logger.debug("已上传文件: %s", doc.name)
+
+                if exporter is not None:
+                    with stage("export", 1):
+                        exporter.export(PageMeta.from_document(doc, self.locale), content)
+                    DOCUMENTS.inc(action="exported")
+            except Exception as e:
+                DOCUMENTS.inc(action="failed")
+                if manifest is not None:
+                    manifest.record(doc, "failed", error=f"{type(e).__name__}: {e}")
+                raise
+
+            if manifest is not None and upload_error is not None:
+                manifest.record(doc, "failed", error=f"{type(upload_error).__name__}: {upload_error}")
+            elif manifest is not None:
+                status = "uploaded" if is_upload else "exported" if exporter else "saved" if is_save else "rendered"
+                manifest.record(doc, status, content)
+
+        return is_save, upload_status
+
+    def sync_and_publish(
+            self,
+            synchronizer: "WikiSynchronizer",
+            is_save: bool = True,
+            is_upload: bool = True,
+            upload_jobs: int = 1,
+            timer: Optional[StageTimer] = None,
+            retry_wait: Optional[float] = None,
+            **sync_kwargs
+    ) -> "SyncReport":
+        """
+        同步卡牌资料后只发布有变化的卡牌
+
+        同步得到的资料直接写入对应节点的data, 不再从磁盘重新读取卡牌文件
+        :param synchronizer: 卡牌同步器(与上传器使用相同的locale)
+        :param is_save: 是否缓存在本地
+        :param is_upload: 是否上传到Wiki.js
+        :param upload_jobs: 并行上传的线程数
+        :param timer: 分阶段计时器, 记录sync与render/save/upload的耗时
+        :param retry_wait: 上传失败的文档最多等待的重试秒数, None时不重试
+        :param sync_kwargs: 传给WikiSynchronizer.sync的参数
+        :return: 同步统计
+        """
+        if synchronizer.locale != self.locale:
+            raise ValueError(f"locale mismatch: {synchronizer.locale} != {self.locale}")
+
+        with stage_of(timer)("sync") as record:
+            report = synchronizer.sync(keep_changed=True, **sync_kwargs)
+            if record is not None:
+                record["items"] = report.total
+        if not report.changed:
+            return report
+
+        # 新建的卡牌需要重新构建索引才能找到对应节点(contents.json已由sync更新)
+        if report.created:
+            self.wiki_indexer = WikiIndexer(self.locale).build_index()
+
+        card_dir = synchronizer.data_dir / self.locale / "card"
+        changed = {(card_dir / key).resolve(): saved_info for key, saved_info in report.changed.items()}
+        documents = []
+        for doc in self.wiki_indexer.get_all_documents():
+            saved_info = changed.get((doc.path / doc.data_file).resolve())
+            if saved_info is None:
+                continue
+            doc.data = saved_info
+            documents.append(doc)
+
+        self.upload(
+            is_save=is_save,
+            is_upload=is_upload,
+            filter_func=lambda x: True,
+            documents=documents,
+            jobs=upload_jobs,
+            timer=timer,
+            retry_wait=retry_wait,
+        )
+        return report
+
 
 if __name__ == '__main__':
     def template_filter(doc: DocumentNode):